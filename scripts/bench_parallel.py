@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Scaling benchmark for the process pool (src/parallel.py): random-schedule simulations
+# (Strength of Schedule) for several synthetic league seasons, at each worker count.
+# Pools are started before timing, so the numbers are compute only. Every worker count
+# must produce the same wins as one worker; any difference is reported. Speedup is capped
+# by the shards per season (--sims / --chunk), since seasons run one after another.
+#
+#   python scripts/bench_parallel.py --seasons 4 --workers 1,2,4,8
+
+parser = argparse.ArgumentParser(description="Measure process-pool speedup on schedule simulations.")
+parser.add_argument('--workers', help="Comma-separated worker counts (defaults to 1, 2, 4, ... up to the core count)")
+parser.add_argument('--seasons', type=int, default=4, help="Synthetic league seasons to simulate")
+parser.add_argument('--teams', type=int, default=12)
+parser.add_argument('--weeks', type=int, default=14)
+parser.add_argument('--sims', type=int, default=100_000, help="Random seasons per league season")
+parser.add_argument('--chunk', type=int, default=None, help="Seasons per shard (defaults to schedule.CHUNK)")
+parser.add_argument('--repeat', type=int, default=3, help="Runs per worker count; the fastest is reported")
+args = parser.parse_args()
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from schedule import random_schedules, CHUNK
+
+def league_season(seed, teams, weeks):
+    # Random scores and a random pairing each week (odd team counts get a bye)
+    rng = np.random.default_rng(seed)
+    scores = rng.normal(110, 25, (teams, weeks))
+    opp = np.full((teams, weeks), -1, dtype=np.int64)
+    for w in range(weeks):
+        order = rng.permutation(teams)
+        a, b = order[0:teams - 1:2], order[1:teams:2]
+        opp[a, w], opp[b, w] = b, a
+    return scores, opp
+
+def run(seasons, workers):
+    return [random_schedules(scores, opp, args.sims, seed=i, chunk=args.chunk or CHUNK, workers=workers) for i, (scores, opp) in enumerate(seasons)]
+
+def main():
+    cores = os.cpu_count() or 1
+    levels = {int(n) for n in args.workers.split(',') if n.strip()} if args.workers else {2 ** i for i in range(cores.bit_length())} | {cores}
+    levels = sorted(levels | {1})  # one worker (in-process) is the baseline
+    seasons = [league_season(i, args.teams, args.weeks) for i in range(args.seasons)]
+    shards = -(-args.sims // (args.chunk or CHUNK))
+    print(f"{args.seasons} seasons x {args.sims:,} simulations ({args.teams} teams, {args.weeks} weeks), {shards} shards per season, {cores} cores")
+    header = f"{'workers':>7} {'wall s':>7} {'speedup':>7} {'eff %':>6} {'sims/s':>10} {'same':>5}"
+    print(header); print('-' * len(header))
+    baseline = reference = None
+    for n in levels:
+        if n > 1: random_schedules(*seasons[0], n=n, chunk=1, workers=n)  # spawn the pool outside the timing
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = run(seasons, n)
+            best = min(best, time.perf_counter() - start)
+        if reference is None: reference, baseline = result, best
+        same = all(np.array_equal(a, b) for a, b in zip(result, reference))
+        speedup = baseline / best
+        print(f"{n:>7} {best:>7.2f} {speedup:>7.2f} {100 * speedup / n:>6.0f} {args.seasons * args.sims / best:>10,.0f} {'yes' if same else 'NO':>5}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,8 @@
 import os
 import json
 import sys
-from unittest.mock import MagicMock
 
-# Mock streamlit before importing utils
-sys.modules['streamlit'] = MagicMock()
-import streamlit as st
-st.secrets = {} # Mock secrets
-st.cache_data = lambda ttl=None: lambda func: func # Mock cache decorator
-
-# Add src to path
+# Add src to path (utils is headless, no streamlit needed)
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 from utils import get_yahoo_session, LEAGUE_ID
 
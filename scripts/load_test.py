@@ -0,0 +1,158 @@
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from urllib.request import urlopen
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Concurrent-session load test: N headless sessions of src/app.py (Streamlit AppTest) run
+# side by side in one process, like viewers on one server, against the replay server.
+# Every session loads the app, then clicks through each page of the sidebar radio.
+# Each level starts cold (empty caches and dataset store) unless --warm is given.
+#
+#   python scripts/replay_server.py --latency 0.2 &
+#   python scripts/load_test.py --sessions 1,2,4,8,16
+
+parser = argparse.ArgumentParser(description="Load test the dashboard with concurrent headless sessions.")
+parser.add_argument('--sessions', default='1,2,4,8', help="Comma-separated concurrency levels")
+parser.add_argument('--base', default='http://127.0.0.1:8700', help="Replay server URL (scripts/replay_server.py)")
+parser.add_argument('--league', help="Yahoo league key (defaults to YAHOO_LEAGUE_ID)")
+parser.add_argument('--rounds', type=int, default=1, help="Page cycles per session")
+parser.add_argument('--warm', action='store_true', help="Keep caches between levels")
+parser.add_argument('--timeout', type=float, default=300, help="Seconds allowed per rerun")
+parser.add_argument('--any-streamlit', action='store_true', help="Run on a Streamlit release other than the one this harness was written for")
+args = parser.parse_args()
+
+# utils reads these at import time; never point a load test at the real Yahoo API
+os.environ['YAHOO_API_BASE'] = args.base
+os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'  # the replay server is plain http
+if args.league: os.environ['YAHOO_LEAGUE_ID'] = args.league
+scratch = tempfile.mkdtemp(prefix='ffl_load_')
+os.environ['FFL_DATA_DIR'] = os.path.join(scratch, 'data')  # no precomputed data: exercise the live path
+
+APP = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'app.py'))
+sys.path.append(os.path.dirname(APP))
+
+# The patches below reach into Streamlit internals (Runtime._instance, the ScriptCache that
+# AppTest's script runner builds). They were written against this release; on another one
+# they may silently do nothing and the latencies would be meaningless, so stop instead.
+STREAMLIT_RELEASE = '1.52'
+import streamlit
+if not (streamlit.__version__ == STREAMLIT_RELEASE or streamlit.__version__.startswith(STREAMLIT_RELEASE + '.')) and not args.any_streamlit:
+    sys.exit(f"❌ load_test.py was written for Streamlit {STREAMLIT_RELEASE}.x, found {streamlit.__version__}. "
+             "Check the patches below still apply, then rerun with --any-streamlit.")
+try:
+    from streamlit.testing.v1 import AppTest, local_script_runner
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    missing = [name for obj, name in ((Runtime, '_instance'), (Runtime, 'instance'), (Runtime, 'exists'), (local_script_runner, 'ScriptCache')) if not hasattr(obj, name)]
+except ImportError as e:
+    missing = [str(e)]
+if missing: sys.exit(f"❌ Streamlit {streamlit.__version__} lacks the internals this harness patches: {', '.join(missing)}")
+import runtime
+import charts
+from cache import DiskCache
+from store import STORE
+
+# The replay server ignores auth; a token without expiry never triggers a refresh.
+# Sessions run from the scratch dir and pick it up as yahoo_token.json, so the real
+# token is never sent anywhere (AppTest.secrets swaps st.secrets globally per run).
+os.chdir(scratch)
+with open('yahoo_token.json', 'w') as f: json.dump({'access_token': 'replay', 'token_type': 'Bearer'}, f)
+
+# AppTest installs a mock Runtime for each run and unsets it when the run ends, which
+# pulls it out from under sessions still running in other threads. Keep the latest one.
+_runtime = None
+def _instance(cls):
+    global _runtime
+    if cls._instance is not None: _runtime = cls._instance
+    if _runtime is None: raise RuntimeError("Runtime hasn't been created!")
+    return _runtime
+Runtime.instance = classmethod(_instance)
+Runtime.exists = classmethod(lambda cls: cls._instance is not None or _runtime is not None)
+
+# Like a real server, compile app.py once for every session instead of once per run
+# (AppTest makes a new ScriptCache per run, and concurrent ast.parse calls can crash).
+_script_cache = ScriptCache()
+local_script_runner.ScriptCache = lambda: _script_cache
+
+def replay_calls():
+    with urlopen(f"{args.base.rstrip('/')}/__replay/stats", timeout=10) as r:
+        return json.load(r)['calls']
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f: return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource  # peak, not current, outside Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def reset(level):
+    # Cold start: fresh disk cache directory, empty memo/st.cache_data, store and charts
+    runtime.clear_cache()
+    runtime.configure(disk=DiskCache(os.path.join(scratch, f'cache-{level}')))
+    STORE.clear()
+    charts._cache.clear()
+
+def run_session(start):
+    # Returns (session, first load seconds, page switch seconds, errors)
+    at = AppTest.from_file(APP, default_timeout=args.timeout)
+    times, errors = [], 0
+    start.wait()
+
+    def rerun(step):
+        nonlocal errors
+        t = time.perf_counter()
+        try: step().run()
+        except Exception: errors += 1  # a failed rerun is a result, not a reason to stop
+        times.append(time.perf_counter() - t)
+        errors += len(at.exception) + len(at.error)
+
+    rerun(lambda: at)
+    pages = at.sidebar.radio[0].options if at.sidebar.radio else []
+    for _ in range(args.rounds):
+        for page in pages: rerun(lambda: at.sidebar.radio[0].set_value(page))
+    return at, times[0], times[1:], errors
+
+def run_level(n):
+    if not args.warm: reset(n)
+    gc.collect()
+    rss0, calls0, t0 = rss_bytes(), replay_calls(), time.perf_counter()
+    start = threading.Barrier(n)
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        results = list(pool.map(lambda _: run_session(start), range(n)))
+    wall = time.perf_counter() - t0
+    gc.collect()
+    # Sessions are still alive here, so their state counts towards RSS
+    rss1, calls1 = rss_bytes(), replay_calls()
+    loads = np.array([load for _, load, _, _ in results])
+    times = np.array([t for _, _, ts, _ in results for t in ts] or [0.0]) * 1000
+    return {
+        'sessions': n, 'reruns': len(times), 'wall_s': wall, 'load_s': np.percentile(loads, 50),
+        'p50_ms': np.percentile(times, 50), 'p95_ms': np.percentile(times, 95), 'max_ms': times.max(),
+        'mb_per_session': (rss1 - rss0) / n / 2**20, 'yahoo_calls_per_session': (calls1 - calls0) / n,
+        'errors': sum(e for _, _, _, e in results),
+    }
+
+def main():
+    try: replay_calls()
+    except OSError:
+        print(f"❌ No replay server at {args.base}. Start it with 'python scripts/replay_server.py'.")
+        sys.exit(1)
+    levels = [int(n) for n in args.sessions.split(',') if n.strip()]
+    print(f"Load testing {APP} against {args.base} ({'warm' if args.warm else 'cold'} start per level)")
+    print("load s = median first load per session; p50/p95/max = page switch reruns")
+    header = f"{'sessions':>8} {'reruns':>7} {'wall s':>7} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'MB/sess':>8} {'calls/sess':>10} {'errors':>6}"
+    print(header); print('-' * len(header))
+    for n in levels:
+        r = run_level(n)
+        print(f"{r['sessions']:>8} {r['reruns']:>7} {r['wall_s']:>7.1f} {r['load_s']:>7.1f} {r['p50_ms']:>8.0f} {r['p95_ms']:>8.0f} {r['max_ms']:>8.0f} "
+              f"{r['mb_per_session']:>8.1f} {r['yahoo_calls_per_session']:>10.1f} {r['errors']:>6}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import argparse
+
+# Batch precompute: fetch every dataset for a league and write it to disk for the dashboard.
+# Example (cron): python scripts/precompute.py --league 461.l.12345 --out data
+
+parser = argparse.ArgumentParser(description="Precompute all Airport FFL datasets for a league.")
+parser.add_argument('--league', help="Yahoo league key (defaults to YAHOO_LEAGUE_ID)")
+parser.add_argument('--out', default=None, help="Output directory (defaults to FFL_DATA_DIR or ./data)")
+args = parser.parse_args()
+
+# utils reads the league from the environment at import time
+if args.league: os.environ['YAHOO_LEAGUE_ID'] = args.league
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+import runtime
+import tracing
+from datasets import compute_all, save_datasets, DATA_DIR
+from utils import get_yahoo_session, LEAGUE_ID
+
+class PrintProgress:
+    def __init__(self, value=0, text=None):
+        if text: print(f"  {text}")
+    def progress(self, value, text=None): pass
+    def empty(self): pass
+
+def main():
+    if not get_yahoo_session():
+        print("❌ No Yahoo token found. Run 'python scripts/auth.py' first.")
+        sys.exit(1)
+    runtime.configure(progress_factory=PrintProgress)
+    print(f"Precomputing datasets for League {LEAGUE_ID}...")
+    with tracing.load(f"Precompute {LEAGUE_ID}"):  # viewable on the dashboard's API Trace page
+        results = compute_all()
+    path = save_datasets(results, args.out or DATA_DIR, LEAGUE_ID)
+    print(f"✅ Wrote {len(results)} datasets to {path}")
+
+if __name__ == "__main__":
+    main()
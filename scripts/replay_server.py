@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Local stand-in for the Yahoo Fantasy API: replays recorded responses, so the dashboard
+# can run offline and be load tested without touching Yahoo's rate limits.
+#
+# 1. Record once (proxies to Yahoo with yahoo_token.json and saves every response):
+#      python scripts/replay_server.py --record
+#      YAHOO_API_BASE=http://127.0.0.1:8700 OAUTHLIB_INSECURE_TRANSPORT=1 streamlit run src/app.py
+#    ...then click through every page.
+# 2. Replay (no network):
+#      python scripts/replay_server.py --latency 0.2
+#
+# GET /__replay/stats returns call counters (used by scripts/load_test.py).
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils import YAHOO_API, LEAGUE_ID
+
+REPLAY_DIR = os.getenv('FFL_REPLAY_DIR', 'replay')
+
+class Recording:
+    # One JSON file per request path (including ;params and ?query)
+    def __init__(self, path):
+        self.path = path
+
+    def file_for(self, url_path):
+        return os.path.join(self.path, hashlib.sha1(url_path.encode()).hexdigest() + '.json')
+
+    def load(self, url_path):
+        try:
+            with open(self.file_for(url_path)) as f: entry = json.load(f)
+            return entry['status'], entry['body'].encode()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, url_path, status, body):
+        os.makedirs(self.path, exist_ok=True)
+        tmp = self.file_for(url_path) + '.tmp'
+        with open(tmp, 'w') as f: json.dump({'path': url_path, 'status': status, 'body': body.decode()}, f)
+        os.replace(tmp, self.file_for(url_path))
+
+    def __len__(self):
+        try: return len([f for f in os.listdir(self.path) if f.endswith('.json')])
+        except OSError: return 0
+
+
+def make_handler(recording, upstream=None, latency=0.0):
+    stats, lock = {'calls': 0, 'misses': 0, 'recorded': 0}, threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/__replay/stats'):
+                with lock: body = json.dumps({**stats, 'entries': len(recording)}).encode()
+                return self.send(200, body)
+            with lock: stats['calls'] += 1
+            entry = recording.load(self.path)
+            if entry is None and upstream:
+                r = upstream.get(YAHOO_API + self.path)
+                entry = (r.status_code, r.content)
+                if r.status_code == 200:
+                    recording.save(self.path, *entry)
+                    with lock: stats['recorded'] += 1
+            if entry is None:
+                with lock: stats['misses'] += 1
+                return self.send(404, json.dumps({'error': {'description': f'No recording for {self.path}'}}).encode())
+            if latency: time.sleep(latency)
+            self.send(*entry)
+
+        def send(self, status, body):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args): pass  # one line per call drowns a load test
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Record/replay server for the Yahoo Fantasy API.")
+    parser.add_argument('--port', type=int, default=8700)
+    parser.add_argument('--dir', default=None, help="Recording directory (defaults to FFL_REPLAY_DIR or ./replay, per league)")
+    parser.add_argument('--record', action='store_true', help="Proxy unrecorded requests to Yahoo and save them")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every replayed response")
+    args = parser.parse_args()
+
+    upstream = None
+    if args.record:
+        from utils import get_yahoo_session
+        upstream = get_yahoo_session()
+        if not upstream:
+            print("❌ No Yahoo token found. Run 'python scripts/auth.py' first.")
+            sys.exit(1)
+    recording = Recording(args.dir or os.path.join(REPLAY_DIR, str(LEAGUE_ID)))
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(recording, upstream, args.latency))
+    print(f"{'Recording' if upstream else 'Replaying'} {len(recording)} responses from {recording.path} on http://127.0.0.1:{args.port}")
+    try: server.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+# --- SHARED TEAM-WEEK TABLE ---
+# Every summary page (Optimal Standings, Luck Index, Power Rankings, Rivalry, Trends,
+# Manager Skill) used to run its own groupbys and merges on every rerun. They now
+# slice one table built once per data version.
+
+def build_team_week(df_history, efficiency_data):
+    tw = df_history[['Week', 'Team', 'Opponent', 'Score', 'Opponent Score', 'Result']].copy()
+    tw['Team'] = tw['Team'].astype(str)
+    tw['Opponent'] = tw['Opponent'].astype(str)
+    tw['Result'] = tw['Result'].astype(str)
+    tw['Margin'] = tw['Score'] - tw['Opponent Score']
+    tw['AbsMargin'] = tw['Margin'].abs()
+
+    # All-play: beat every lower score that week, lose to every higher one
+    by_week = tw.groupby('Week')['Score']
+    tw['All-Play Wins'] = (by_week.rank(method='min') - 1).astype(int)
+    tw['All-Play Losses'] = (by_week.transform('size') - by_week.rank(method='max')).astype(int)
+    tw['Week Rank'] = by_week.rank(method='min', ascending=False).astype(int)
+
+    tw = tw.sort_values(['Team', 'Week']).reset_index(drop=True)
+    tw['Cumulative Points'] = tw.groupby('Team')['Score'].cumsum()
+
+    # Optimal lineups (both sides play their best possible roster)
+    df_eff = pd.DataFrame(efficiency_data)
+    if not df_eff.empty:
+        eff = df_eff[['Week', 'Team', 'Roster Points', 'Max Points', 'Mistake_Count']]
+        tw = tw.merge(eff, on=['Week', 'Team'], how='left')
+        opp = eff[['Week', 'Team', 'Max Points']].rename(columns={'Team': 'Opponent', 'Max Points': 'Opponent Max Points'})
+        tw = tw.merge(opp, on=['Week', 'Opponent'], how='left')
+    else:
+        for col in ['Roster Points', 'Max Points', 'Mistake_Count', 'Opponent Max Points']: tw[col] = float('nan')
+    tw['Optimal Win'] = tw['Max Points'] > tw['Opponent Max Points']
+    tw['Points Left on Bench'] = tw['Max Points'] - tw['Roster Points']
+    return tw
+
+def build_team_summary(tw):
+    g = tw.groupby('Team')
+    summary = g.agg(
+        Games=('Week', 'size'),
+        mean=('Score', 'mean'), std=('Score', 'std'), median=('Score', 'median'),
+        **{'All-Play Wins': ('All-Play Wins', 'sum'), 'All-Play Losses': ('All-Play Losses', 'sum')},
+        Optimal_Wins=('Optimal Win', 'sum'), Potential_PF=('Max Points', 'sum'),
+        **{'Roster Points': ('Roster Points', 'sum'), 'Max Points': ('Max Points', 'sum'), 'Mistake_Count': ('Mistake_Count', 'sum')},
+    ).reset_index()
+    played = summary['All-Play Wins'] + summary['All-Play Losses']
+    summary['All-Play Pct'] = (summary['All-Play Wins'] / played).where(played > 0, 0)
+    summary['Power Score'] = summary['mean'] - (summary['std'] * 0.5)
+    summary['Eff %'] = (summary['Roster Points'] / summary['Max Points']) * 100
+    return summary
+
+# Built once per (history version, efficiency version) and shared through store.STORE
+def build_team_tables(df_history, efficiency_data):
+    tw = build_team_week(df_history, efficiency_data)
+    return tw, build_team_summary(tw)
+
+def build_luck_table(df_standings, summary):
+    # Actual win % vs All-Play win %; positive = lucky
+    df = pd.merge(df_standings, summary[['Team', 'All-Play Wins', 'All-Play Losses', 'All-Play Pct']], on='Team')
+    df['Luck Factor'] = (df['W'] / (df['W'] + df['L'])) - df['All-Play Pct']
+    return df.sort_values('All-Play Wins', ascending=False)
+
+def build_waiver_summary(df_waiver):
+    return df_waiver.groupby('Team').agg({
+        'Value Over Bench': 'sum',
+        'WAR': 'sum',
+        'Starter Points': 'sum',
+        'Player': 'count'
+    }).reset_index().rename(columns={'Player': 'Impact Pickups'})
+
+# --- INTERACTIVE PAGE INPUTS ---
+# Built once per data version; the pages' fragments (app.py) only slice them when a widget changes.
+
+def build_draft_table(df_draft, df_standings):
+    # Draft class with real team names and the scatter's x position, plus next year's keeper candidates
+    df = df_draft.copy()
+    if not df_standings.empty and 'Team Key' in df_standings.columns and 'Team Key' in df.columns:
+        names = df_standings[['Team', 'Team Key']].rename(columns={'Team': 'Team Name'})
+        df = df.merge(names, on='Team Key', how='left')
+        df['Team Name'] = df['Team Name'].fillna(df['Team Key'])
+    else:
+        df['Team Name'] = df['Team Key'] if 'Team Key' in df.columns else "Unknown"
+    # Keepers sit to the far left of the picks (a visual gap), everyone else at their pick number
+    league_size = len(df_standings) if not df_standings.empty else 12
+    df['Visual Slot'] = ((df['Round'] - 1) * league_size + df['Pick']).where(df['Type'] != 'Keeper', -15)
+    # Eligible next year: drafted in round 4 or later and not a keeper this season
+    keepers = df[(df['Type'] == 'Regular') & (df['Round'] > 3)].sort_values('Total Points', ascending=False)
+    return df, keepers
+
+def build_manager_audit(tw, games, swaps):
+    # {team: [(expander header, swap rows or None), ...]} for the Match Impact Analysis.
+    # games/swaps come from counterfactual.lineup_counterfactuals: a loss is "Caused Loss"
+    # only when the week's swaps would actually have flipped it.
+    flipped = set(games.loc[games['Lost To Lineup'], ['Team', 'Week']].itertuples(index=False, name=None)) if not games.empty else set()
+    by_week = {key: rows for key, rows in swaps.groupby(['Team', 'Week'])} if not swaps.empty else {}
+    audit = {}
+    for _, row in tw[tw['Max Points'].notna()].iterrows():
+        key = (row['Team'], row['Week'])
+        if row['Result'] == 'W': verdict_icon, verdict_text = "✅", "Won"
+        elif key in flipped: verdict_icon, verdict_text = "🚨", "Caused Loss"
+        else: verdict_icon, verdict_text = "💀", "Outmatched"
+        header = f"{verdict_icon} Week {row['Week']} vs {row['Opponent']} | Score: {row['Score']:.1f} - {row['Opponent Score']:.1f} | {verdict_text}"
+        week_swaps = by_week.get(key)
+        swap_table = None
+        if week_swaps is not None:
+            swap_table = pd.DataFrame({
+                "Pos": week_swaps['Pos'],
+                "You Played": week_swaps['Out'] + " (" + week_swaps['Out Points'].astype(str) + ")",
+                "Should Have": week_swaps['In'] + " (" + week_swaps['In Points'].astype(str) + ")",
+                "Cost": week_swaps['Gain'],
+                "Impact": np.select([week_swaps['Flips Alone'], week_swaps['In Smallest Fix']], ["🔥 FATAL ERROR (Caused Loss)", "⚠️ Contributor"], "No Impact"),
+            }).reset_index(drop=True)
+        audit.setdefault(row['Team'], []).append((header, swap_table))
+    return audit
@@ -0,0 +1,216 @@
+import os
+import argparse
+import hashlib
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+import pandas as pd
+try:
+    import pyarrow as pa
+except ImportError:  # JSON only
+    pa = None
+from aggregates import build_team_tables, build_luck_table, build_waiver_summary
+from counterfactual import lineup_counterfactuals, lineup_loss_summary
+from datasets import load_datasets, league_dir, split_impact, DATA_DIR
+from utils import LEAGUE_ID
+
+# --- READ-ONLY ANALYTICS API ---
+# Serves the datasets written by scripts/precompute.py to other tools (bots, emails).
+# It never calls Yahoo and never recomputes: tables are derived once per manifest and
+# each response body is built once per (table, format). Every response carries an
+# ETag (hash of the body) and Last-Modified (manifest time), so pollers that send
+# If-None-Match / If-Modified-Since get an empty 304 until the next precompute.
+#
+#   python src/api.py --port 8600
+#   curl localhost:8600/luck
+#   curl -H 'Accept: application/vnd.apache.arrow.stream' localhost:8600/standings
+
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+JSON_TYPE = 'application/json'
+MAX_AGE = int(os.getenv('FFL_API_MAX_AGE', '60'))
+
+STANDINGS_COLUMNS = ['Rank', 'Team', 'W', 'L', 'T', 'PF', 'PA']
+
+def _standings(d):
+    # Empty before the season starts (or after a failed fetch): an empty list, not a 500
+    df = pd.DataFrame(d['standings'])
+    if df.empty: return pd.DataFrame(columns=STANDINGS_COLUMNS)
+    df['Rank'] = pd.to_numeric(df['Rank'], errors='coerce').fillna(100).astype(int)
+    return df.sort_values('Rank')[STANDINGS_COLUMNS]
+
+def _team_tables(d):
+    return build_team_tables(d['history'].to_frame(), pd.DataFrame(d['efficiency']))
+
+def _luck(d):
+    standings = pd.DataFrame(d['standings'])
+    if standings.empty: return standings  # preseason, as for /standings
+    return build_luck_table(standings, _team_tables(d)[1])
+
+def _efficiency(d):
+    summary = _team_tables(d)[1]
+    return summary[['Team', 'Eff %', 'Mistake_Count', 'Roster Points', 'Max Points', 'Optimal_Wins']].sort_values('Eff %', ascending=False)
+
+def _efficiency_weekly(d):
+    # Per-week rows without the nested mistake lists
+    return pd.DataFrame(d['efficiency']).drop(columns=['Mistakes'], errors='ignore')
+
+def _lineup_losses(d):
+    tw, _ = _team_tables(d)
+    games, _ = lineup_counterfactuals(tw, pd.DataFrame(d['efficiency']))
+    return lineup_loss_summary(games)
+
+def _war(d):
+    # Waiver GM leaderboard
+    df = split_impact(d['impact'], d['draft'], d.get('transactions', ()))['waiver']
+    return build_waiver_summary(df).sort_values('Value Over Bench', ascending=False) if not df.empty else df
+
+def _war_players(kind):
+    def build(d):
+        df = split_impact(d['impact'], d['draft'], d.get('transactions', ()))[kind]
+        return df.sort_values(['WAR', 'Value Over Bench'], ascending=False) if not df.empty else df
+    return build
+
+# path -> (datasets it needs, builder)
+TABLES = {
+    '/standings': (('standings',), _standings),
+    '/luck': (('standings', 'history', 'efficiency'), _luck),
+    '/efficiency': (('history', 'efficiency'), _efficiency),
+    '/efficiency/weekly': (('efficiency',), _efficiency_weekly),
+    '/efficiency/lineup-losses': (('history', 'efficiency'), _lineup_losses),
+    '/war': (('impact', 'draft'), _war),
+    '/war/draft': (('impact', 'draft'), _war_players('draft')),
+    '/war/waiver': (('impact', 'draft'), _war_players('waiver')),
+    '/war/trade': (('impact', 'draft'), _war_players('trade')),
+}
+
+
+class Snapshot:
+    # Everything derived from one manifest; replaced wholesale when precompute runs again
+    def __init__(self, datasets, mtime):
+        self.datasets, self.mtime = datasets, mtime
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self.tables, self.bodies, self.lock = {}, {}, threading.Lock()
+
+    def table(self, path):
+        with self.lock:
+            if path not in self.tables:
+                needs, build = TABLES[path]
+                self.tables[path] = build(self.datasets) if all(n in self.datasets for n in needs) else None
+            return self.tables[path]
+
+    def body(self, path, fmt):
+        # Returns (body, etag) or None when the datasets behind it aren't available
+        key = (path, fmt)
+        with self.lock: cached = self.bodies.get(key)
+        if cached: return cached
+        df = self.table(path)
+        if df is None: return None
+        body = encode(df, fmt)
+        cached = (body, '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest())
+        with self.lock: self.bodies[key] = cached
+        return cached
+
+
+def encode(df, fmt):
+    df = df.reset_index(drop=True)
+    if fmt == 'arrow':
+        sink = pa.BufferOutputStream()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.ipc.new_stream(sink, table.schema) as writer: writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    return df.to_json(orient='records').encode()
+
+
+class AnalyticsAPI:
+    def __init__(self, out_dir=DATA_DIR, league_id=LEAGUE_ID):
+        self.out_dir, self.league_id = out_dir, league_id
+        self.manifest = os.path.join(league_dir(out_dir, league_id), 'manifest.json')
+        self.current, self.lock = None, threading.Lock()
+
+    def snapshot(self):
+        # One stat() per request; load_datasets itself re-reads only on a new manifest
+        try: mtime = os.path.getmtime(self.manifest)
+        except OSError: return None
+        with self.lock:
+            if self.current is None or self.current.mtime != mtime:
+                self.current = Snapshot(load_datasets(self.out_dir, self.league_id), mtime)
+            return self.current
+
+    def index(self, snap):
+        return pd.DataFrame([{'path': p, 'available': all(n in snap.datasets for n in needs)} for p, (needs, _) in TABLES.items()])
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        server_version = 'AirportFFL/1.0'
+
+        def do_HEAD(self): self.respond(head=True)
+        def do_GET(self): self.respond()
+
+        def respond(self, head=False):
+            url = urlsplit(self.path)
+            path = url.path.rstrip('/') or '/'
+            fmt = self.wanted_format(parse_qs(url.query))
+            if fmt is None: return self.error(406, f"Arrow responses need pyarrow; use {JSON_TYPE}")
+            if path != '/' and path not in TABLES: return self.error(404, f"Unknown endpoint {path}")
+            snap = api.snapshot()
+            if snap is None: return self.error(503, "No precomputed datasets yet; run scripts/precompute.py")
+
+            if path == '/':
+                body = encode(api.index(snap), fmt)
+                entry = (body, '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest())
+            else:
+                try: entry = snap.body(path, fmt)
+                except Exception as e: return self.error(500, f"Could not build {path}: {e}")
+                if entry is None: return self.error(503, f"Datasets for {path} have not been precomputed")
+            body, etag = entry
+
+            headers = {'ETag': etag, 'Last-Modified': snap.last_modified, 'Cache-Control': f'max-age={MAX_AGE}', 'Vary': 'Accept'}
+            if self.not_modified(etag, snap.mtime):
+                return self.send(304, headers)
+            headers['Content-Type'] = ARROW_TYPE if fmt == 'arrow' else JSON_TYPE
+            self.send(200, headers, body, head)
+
+        def wanted_format(self, query):
+            fmt = (query.get('format') or [''])[0]
+            if not fmt: fmt = 'arrow' if ARROW_TYPE in self.headers.get('Accept', '') else 'json'
+            if fmt == 'arrow' and pa is None: return None
+            return fmt if fmt in ('arrow', 'json') else 'json'
+
+        def not_modified(self, etag, mtime):
+            # If-None-Match wins over If-Modified-Since (RFC 9110)
+            inm = self.headers.get('If-None-Match')
+            if inm: return inm.strip() == '*' or etag in [t.strip().removeprefix('W/') for t in inm.split(',')]
+            ims = self.headers.get('If-Modified-Since')
+            if not ims: return False
+            try: return int(mtime) <= parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError): return False
+
+        def error(self, code, message):
+            self.send(code, {'Content-Type': JSON_TYPE, 'Cache-Control': 'no-store'}, pd.Series({'error': message}).to_json().encode())
+
+        def send(self, code, headers, body=b'', head=False):
+            self.send_response(code)
+            for k, v in headers.items(): self.send_header(k, v)
+            if code != 304: self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if body and not head and code != 304: self.wfile.write(body)
+
+    return Handler
+
+def serve(host='127.0.0.1', port=8600, out_dir=DATA_DIR, league_id=LEAGUE_ID):
+    server = ThreadingHTTPServer((host, port), make_handler(AnalyticsAPI(out_dir, league_id)))
+    print(f"Serving League {league_id} datasets from {league_dir(out_dir, league_id)} on http://{host}:{port}")
+    try: server.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read-only HTTP API over precomputed Airport FFL datasets.")
+    parser.add_argument('--host', default=os.getenv('FFL_API_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('FFL_API_PORT', '8600')))
+    parser.add_argument('--data', default=DATA_DIR, help="Directory written by scripts/precompute.py")
+    parser.add_argument('--league', default=LEAGUE_ID, help="Yahoo league key (defaults to YAHOO_LEAGUE_ID)")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.data, args.league)
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
+from datetime import datetime
+from runtime import use_streamlit, clear_cache, refreshing
 from utils import (
     fetch_standings, 
     fetch_all_weekly_scores, 
@@ -9,11 +11,42 @@ from utils import (
     fetch_draft_results, 
     fetch_impact_analysis, 
     fetch_projection_accuracy, 
+    projection_seasons,
     fetch_positional_performance, 
     fetch_draft_season_totals,
+    load_draft_weekly_points,
+    fetch_transactions,
+    fetch_league_settings,
+    fetch_player_weeks,
+    lineup_slots,
+    completeness,
+    player_matrix,
     get_yahoo_session, 
     LEAGUE_ID 
 )
+from aggregates import build_team_tables, build_luck_table, build_waiver_summary, build_draft_table, build_manager_audit
+from datasets import load_datasets, precomputed_at, analysis_week, split_impact
+from store import STORE, thaw
+from charts import boxplot_chart, trends_chart, draft_scatter_chart, win_distribution_chart, player_trend_chart, calibration_chart, projection_trend_chart, waterfall_chart
+from schedule import build_schedule_tables, sos_summary
+from scoring import PRESETS, BASELINE, season_tables, player_points
+from counterfactual import lineup_counterfactuals, lineup_loss_summary
+from war import BASELINES, DEFAULT_BASELINE, war_rows
+from projections import rollup, calibration_table, seasons_table
+import tracing
+import importlib.machinery
+
+# Streamlit runs this script as __main__, and spawned simulation workers (parallel.py)
+# re-run the parent's __main__ on start-up unless its spec is named '__main__', which
+# multiprocessing treats as main-only code and skips. So workers never run the dashboard.
+__spec__ = importlib.machinery.ModuleSpec('__main__', None)
+
+# Cached functions, progress bars and secrets go through Streamlit in the dashboard
+use_streamlit()
+
+# Pages get shallow views of the shared datasets (store.py); copy-on-write keeps a page's
+# filters and new columns from writing through to the copy every other session sees
+pd.set_option('mode.copy_on_write', True)
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(page_title="Airport FFL Analytics", page_icon="🏈", layout="wide")
@@ -22,79 +55,335 @@ st.set_page_config(page_title="Airport FFL Analytics", page_icon="🏈", layout=
 st.sidebar.title("🏈 Menu")
 
 # Add a manual Refresh button to the sidebar
+# Only the fetched datasets are dropped: Yahoo partitions are re-checked and recomputed
+# where they changed (utils: RECOMPUTE DAG). Page tables below are keyed by the versions
+# of what they're built from, so they're reused unless a refresh actually changed an input.
+FETCHED = ('standings', 'history', 'efficiency', 'positional', 'draft', 'draft_totals', 'draft_weekly', 'transactions', 'impact_rows', 'player_weeks', 'projections')
 if st.sidebar.button("🔄 Refresh Data"):
-    st.cache_data.clear()
+    clear_cache()
+    for name in FETCHED: STORE.drop(name)
     st.rerun()
 
 page = st.sidebar.radio(
     "Go to:",
-    ["🏆 Standings", "🤖 Optimal Standings", "🍀 Luck Index", "📊 Power Rankings", "💪 Positional Power", "📉 Draft Analysis", "⚔️ Rivalry", "📉 Trends", "🧠 Manager Skill", "💎 Draft & Waivers", "📈 Raw Data"]
+    ["🏆 Standings", "🤖 Optimal Standings", "🍀 Luck Index", "🧪 Scoring What-If", "🗓️ Strength of Schedule", "📊 Power Rankings", "💪 Positional Power", "🎯 Projection Accuracy", "📉 Draft Analysis", "⚔️ Rivalry", "📉 Trends", "🧠 Manager Skill", "💎 Draft & Waivers", "📈 Raw Data", "🐞 API Trace"]
 )
 
+# Every Yahoo request this run makes is recorded under the page (see tracing.py)
+tracing.begin(page)
+
 st.title("🏈 Airport FFL Analytics Center")
 
 # --- DATA LOADING (BULK) ---
+# Datasets live once per process in STORE; each session only keeps small handles.
 status_text = st.empty()
 df_standings = pd.DataFrame()
 df_history = pd.DataFrame()
+df_team_week, df_team_summary = pd.DataFrame(), pd.DataFrame()
+df_eff, df_draft_scatter = pd.DataFrame(), pd.DataFrame()
+pos_data, impact_data, draft_weekly = {}, {}, None
 analyze_week = 1
+team_week_handle = draft_totals_handle = standings_handle = None
+
+# Datasets written by scripts/precompute.py are used as-is; anything missing is fetched live
+precomputed = load_datasets()
+def dataset(name, compute, *args):
+    return precomputed[name] if name in precomputed else compute(*args)
+
+# Live results are served stale-while-revalidate (runtime.py). A dataset's "as of" time is
+# part of its STORE key, so while it is unchanged the fetcher isn't called at all; as_of()
+# therefore starts the background refresh of a stale or partial result itself, and what
+# the refresh writes is picked up (new time, new key) on a later rerun.
+stamps = {}
+def as_of(name, compute, *args):
+    stamps[name] = precomputed_at() if name in precomputed else compute.revalidate_if_stale(*args)
+    return stamps[name]
+
+handles = st.session_state.setdefault('handles', {})
+def shared(name, key_parts, loader, message=None):
+    # Re-resolve when the inputs moved on (new week, new versions) or the store was cleared.
+    # key_parts may be a function: it is read again after a load, since a result fetched
+    # just now only has an "as of" time once stored (keyed by None, the next rerun would reload).
+    parts = key_parts() if callable(key_parts) else key_parts
+    handle = handles.get(name)
+    if handle is None or handle.key != STORE.key_for(parts) or STORE.get(handle) is None:
+        if message: status_text.text(message)
+        handle = STORE.load(name, parts, loader)
+        if callable(key_parts): handle = STORE.rekey(handle, key_parts())
+        handles[name] = handle
+    return STORE.view(handle), handle
 
 try:
     with st.spinner('Crunching the numbers... Sorry, it\'s a lot of data, going to be a minute.'):
         # 1. Fetch Basic Standings & History
-        standings_data = fetch_standings()
-        df_standings = pd.DataFrame(standings_data)
+        df_standings, standings_handle = shared('standings', lambda: (as_of('standings', fetch_standings),), lambda: pd.DataFrame(dataset('standings', fetch_standings)))
 
-        current_week = get_current_week()
-        analyze_week = max(1, current_week - 1) 
+        current_week = dataset('current_week', get_current_week)
+        analyze_week = analysis_week(current_week)
         
-        history_data = fetch_all_weekly_scores(analyze_week)
-        df_history = pd.DataFrame(history_data)
+        history_data, history_handle = shared('history', lambda: (analyze_week, as_of('history', fetch_all_weekly_scores, analyze_week)), lambda: dataset('history', fetch_all_weekly_scores, analyze_week))
+        df_history = history_data.to_frame()
 
         # CRITICAL CHECK: If main data is empty, stop here and ask for retry
         if df_history.empty or df_standings.empty:
             st.warning("⚠️ League data could not be loaded. This often happens if the Yahoo token is expired or the API connection failed.")
             if st.button("Retry Connection"):
-                st.cache_data.clear()
+                clear_cache(); STORE.clear()
                 st.rerun()
         else:
+            # Everything below is keyed by small versions computed once at fetch time, so a
+            # rerun never re-hashes the draft, the team list or any other large argument.
             # 2. Manager Efficiency
-            if 'efficiency_data' not in st.session_state:
-                status_text.text("Analyzing Manager Decisions...")
-                # FIX: Sort the unique teams alphabetically. 
-                # This ensures the cache key is stable even if Yahoo returns games in a different order.
-                stable_team_list = sorted(df_history['Team'].unique())
-                st.session_state.efficiency_data = fetch_manager_efficiency(analyze_week, stable_team_list)
+            df_eff, eff_handle = shared('efficiency', lambda: (analyze_week, history_handle.version, as_of('efficiency', fetch_manager_efficiency, analyze_week, history_handle.version)), lambda: pd.DataFrame(dataset('efficiency', fetch_manager_efficiency, analyze_week, history_handle.version)), "Analyzing Manager Decisions...")
             
             # 3. Positional Power
-            if 'pos_data' not in st.session_state:
-                status_text.text("Calculating Positional Strength...")
-                st.session_state.pos_data = fetch_positional_performance(analyze_week)
+            pos_data, _ = shared('positional', lambda: (analyze_week, as_of('positional', fetch_positional_performance, analyze_week)), lambda: dataset('positional', fetch_positional_performance, analyze_week), "Calculating Positional Strength...")
 
             # 4. Draft Analysis (Auto-Load)
-            if 'draft_scatter' not in st.session_state:
-                status_text.text("Evaluating Draft Class...")
-                draft_res = fetch_draft_results()
-                st.session_state.draft_scatter = fetch_draft_season_totals(draft_res)
+            draft_res, draft_handle = shared('draft', lambda: (as_of('draft', fetch_draft_results),), lambda: dataset('draft', fetch_draft_results))
+            df_draft_scatter, draft_totals_handle = shared('draft_totals', lambda: (draft_handle.version, analyze_week, as_of('draft_totals', fetch_draft_season_totals, draft_handle.version, analyze_week)), lambda: pd.DataFrame(dataset('draft_totals', fetch_draft_season_totals, draft_handle.version, analyze_week, thaw(draft_res))), "Evaluating Draft Class...")
+            draft_weekly, _ = shared('draft_weekly', (draft_totals_handle.version, analyze_week), lambda: dataset('draft_weekly', load_draft_weekly_points, list(draft_res), analyze_week))
             
             # 5. Impact Analysis (WAR) (Auto-Load)
-            if 'impact_data' not in st.session_state:
-                status_text.text("Calculating Wins Above Replacement (WAR)...")
-                draft = fetch_draft_results() 
-                impact = fetch_impact_analysis(analyze_week)
-                d_gems, w_gems = [], []
-                if impact:
-                    for p in impact:
-                        if p['Player Key'] in draft: 
-                            p.update(draft[p['Player Key']]); d_gems.append(p)
-                        else: w_gems.append(p)
-                st.session_state.impact_data = {'draft': d_gems, 'waiver': w_gems}
+            # Transactions are ingested incrementally; they decide who acquired each player how
+            transactions, tx_handle = shared('transactions', lambda: (analyze_week, as_of('transactions', fetch_transactions, analyze_week)), lambda: dataset('transactions', fetch_transactions, analyze_week), "Reading league transactions...")
+            impact_rows, impact_handle = shared('impact_rows', lambda: (analyze_week, as_of('impact', fetch_impact_analysis, analyze_week)), lambda: dataset('impact', fetch_impact_analysis, analyze_week), "Calculating Wins Above Replacement (WAR)...")
+            impact_data, _ = shared('impact', (draft_handle.version, tx_handle.version, impact_handle.version), lambda: split_impact(thaw(impact_rows), draft_res, transactions))
+
+            # 6. Shared Team-Week Table (built once per data version, sliced by every summary page)
+            (df_team_week, df_team_summary), team_week_handle = shared('team_week', (history_handle.version, eff_handle.version), lambda: build_team_tables(df_history, df_eff))
 
 except Exception as e:
     st.error(f"An error occurred during data loading: {e}")
 
 status_text.empty() # Clear loading text
 
+# --- DATA FRESHNESS ---
+known = [t for t in stamps.values() if t]
+if known:
+    note = " · updating in the background…" if refreshing() else ""
+    st.sidebar.caption(f"🕒 Data as of {datetime.fromtimestamp(min(known)).strftime('%a %b %d, %I:%M %p')}{note}")
+
+# --- DATA COMPLETENESS ---
+# Which team-weeks Yahoo didn't return on the last sync; they're retried on their own
+try: coverage = dataset('completeness', completeness, analyze_week) or {}
+except Exception: coverage = {}
+def flag_incomplete(*kinds):
+    missing = sorted({m for k in kinds for m in coverage.get(k, {}).get('missing', ())}, key=lambda m: (m[1], m[0]))
+    if missing:
+        shown = ', '.join(f"{team} (Wk {week})" for team, week in missing[:6]) + ('…' if len(missing) > 6 else '')
+        st.warning(f"⚠️ **Incomplete data:** {len(missing)} team-week(s) couldn't be loaded from Yahoo yet: {shown}. Results below leave them out; they're retried automatically.")
+
+
+# --- INTERACTIVE FRAGMENTS ---
+# Widgets inside a fragment rerun only that function; its inputs are the prebuilt tables above.
+
+@st.fragment
+def draft_explorer(df_draft, draft_weekly, version):
+    # --- FILTERS (STANDARD DROPDOWNS) ---
+    with st.expander("🔎 Filter Options", expanded=True):
+        c1, c2, c3 = st.columns(3)
+        
+        # 1. Type Filter (Selectbox)
+        with c1:
+            acq_types = ["All Players", "Regular Draft", "Keepers"]
+            filter_type = st.selectbox("Type:", acq_types)
+        
+        # 2. Position Filter (Selectbox)
+        with c2:
+            # Get unique positions, sort, and add "All"
+            unique_pos = sorted([x for x in df_draft['Position'].unique() if x])
+            pos_options = ["All Positions"] + unique_pos
+            selected_pos = st.selectbox("Position:", pos_options)
+            
+        # 3. Team Filter (Selectbox)
+        with c3:
+            unique_teams = sorted([str(x) for x in df_draft['Team Name'].unique() if x])
+            team_options = ["All Teams"] + unique_teams
+            selected_team = st.selectbox("Team:", team_options)
+
+        # 4. Color By Preference
+        color_by = st.selectbox("Color Bubbles By:", ["Position", "Team Name", "Type"], index=0)
+
+    # --- APPLY FILTERS ---
+    # Type
+    if filter_type == "Regular Draft":
+        df_draft = df_draft[df_draft['Type'] == 'Regular']
+    elif filter_type == "Keepers":
+        df_draft = df_draft[df_draft['Type'] == 'Keeper']
+    
+    # Position
+    if selected_pos != "All Positions":
+        df_draft = df_draft[df_draft['Position'] == selected_pos]
+        
+    # Team
+    if selected_team != "All Teams":
+        df_draft = df_draft[df_draft['Team Name'] == selected_team]
+
+    if df_draft.empty:
+        st.info("No players match your filters.")
+        return
+
+    # --- SCATTER PLOT ---
+    scatter_data, scatter_spec = draft_scatter_chart(df_draft, version, (filter_type, selected_pos, selected_team), color_by)
+    st.vega_lite_chart(scatter_data, scatter_spec, use_container_width=True)
+    
+    # --- WEEKLY DRILLDOWN ---
+    st.subheader("🔍 Weekly Breakdown")
+    drill_rows = df_draft.sort_values('Total Points', ascending=False)
+    drill_labels = dict(zip(drill_rows['Player'] + " (" + drill_rows['Team Name'].astype(str) + ")", drill_rows['Player Key']))
+    drill_pick = st.selectbox("Player:", list(drill_labels))
+    df_weekly = draft_weekly.to_frame()
+    df_weekly = df_weekly[df_weekly['Player Key'] == drill_labels.get(drill_pick)]
+    if not df_weekly.empty:
+        st.altair_chart(alt.Chart(df_weekly).mark_bar().encode(x='Week:O', y=alt.Y('Points:Q', title='Fantasy Points'), tooltip=['Week', 'Points']).properties(height=250), use_container_width=True)
+    else:
+        st.caption("No weekly breakdown stored for this player yet.")
+    
+    st.divider()
+    
+    # --- DATAFRAME VIEW ---
+    st.subheader(f"💎 Roster Gems ({filter_type})")
+    
+    # Create a clean view
+    display_cols = ['Player', 'Position', 'Type', 'Total Points', 'Team Name']
+    if filter_type == "Regular Draft" or filter_type == "All Players":
+        display_cols.insert(2, 'Round')
+        
+    st.dataframe(
+        df_draft.sort_values('Total Points', ascending=False).head(20)[display_cols], 
+        use_container_width=True, 
+        hide_index=True
+    )
+
+@st.fragment
+def manager_audit(audit):
+    selected_team = st.selectbox("Select a Manager to Audit:", list(audit))
+    if selected_team:
+        st.markdown(f"**Season Log for {selected_team} (Click row to view details):**")
+        st.caption("Rows color-coded by outcome: Green = Won, Red = Lost, Yellow = Close Call")
+        for header, swaps in audit[selected_team]:
+            with st.expander(header):
+                if swaps is not None:
+                    st.dataframe(swaps, column_config={"Cost": st.column_config.NumberColumn("Pts Lost", format="+%.1f")}, use_container_width=True, hide_index=True)
+                else:
+                    st.success("Perfect lineup! No points left on bench.")
+
+@st.fragment
+def scoring_what_if(matrix, df_history, settings):
+    league = settings.get('stat_modifiers', {})
+    picked = st.multiselect("Compare against:", list(PRESETS), default=['PPR', '6-pt Passing TD'])
+    rule_sets = {BASELINE: {}, **{name: PRESETS[name] for name in picked}}
+    # Custom rules: any of the league's own modifiers, edited
+    with st.expander("✏️ Custom Rules"):
+        names = settings.get('stat_names', {})
+        editable = [sid for sid in matrix.stat_ids if sid in league]
+        cols = st.columns(4)
+        custom = {}
+        for i, sid in enumerate(editable):
+            value = cols[i % 4].number_input(names.get(sid, f"Stat {sid}"), value=float(league[sid]), step=0.5, key=f"rule_{sid}")
+            if value != league[sid]: custom[sid] = value
+        if custom: rule_sets['Custom'] = custom
+
+    df = season_tables(matrix, df_history, league, rule_sets, lineup_slots(settings.get('roster_positions')))
+    df['Standing'] = "#" + df['Rank'].astype(str) + " (" + df['W'].astype(str) + "-" + df['L'].astype(str) + df['T'].map(lambda t: f"-{t}" if t else "") + ")"
+    order = df[df['Rules'] == BASELINE].sort_values('Rank')['Team']
+    def wide(value): return df.pivot(index='Team', columns='Rules', values=value).reindex(index=order, columns=list(rule_sets)).reset_index()
+
+    st.subheader("🏆 Standings")
+    st.dataframe(wide('Standing'), use_container_width=True, hide_index=True)
+    st.subheader("🍀 Luck & Optimal Wins")
+    st.caption("Luck = actual win % minus all-play win %. Optimal W = wins if both sides had played their best lineup.")
+    c1, c2 = st.columns(2)
+    c1.dataframe(wide('Luck').style.format({r: "{:+.3f}" for r in rule_sets}), use_container_width=True, hide_index=True)
+    c2.dataframe(wide('Optimal W'), use_container_width=True, hide_index=True)
+    st.subheader("⭐ Top Players")
+    st.dataframe(player_points(matrix, league, rule_sets), use_container_width=True, hide_index=True)
+
+@st.fragment
+def projection_accuracy(stats, version, seasons):
+    cells, calibration = stats['cells'], stats['calibration']
+    c1, c2 = st.columns(2)
+    starters = c1.toggle("Starters only", value=True, help="Only player-weeks in an active lineup slot")
+    position = c2.selectbox("Calibration position:", ['All'] + sorted(cells['Position'].astype(str).unique()))
+    overall = rollup(cells, starters_only=starters).iloc[0]
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Player-Weeks", f"{int(overall['N']):,}")
+    m2.metric("MAE", f"{overall['MAE']:.2f}")
+    m3.metric("Bias", f"{overall['Bias']:+.2f}", help="Positive = players outscored their projections on average")
+    m4.metric("RMSE", f"{overall['RMSE']:.2f}")
+    fmt = {'MAE': "{:.2f}", 'Bias': "{:+.2f}", 'RMSE': "{:.2f}", 'Avg Projected': "{:.1f}", 'Avg Actual': "{:.1f}", 'N': "{:.0f}"}
+
+    st.subheader("📈 Weekly Trend")
+    weekly = rollup(cells, ('Week',), starters)
+    trend_data, trend_spec = projection_trend_chart(weekly, version, (starters,))
+    st.vega_lite_chart(trend_data, trend_spec, use_container_width=True)
+
+    c1, c2 = st.columns(2)
+    c1.subheader("🧩 By Position")
+    c1.dataframe(rollup(cells, ('Position',), starters).sort_values('MAE').style.format(fmt), use_container_width=True, hide_index=True)
+    c2.subheader("👥 By Team")
+    c2.dataframe(rollup(cells, ('Team',), starters).sort_values('MAE').style.format(fmt), use_container_width=True, hide_index=True)
+
+    st.subheader("🎯 Calibration")
+    st.caption("Player-weeks grouped by projected points. On the Perfect line, players scored exactly what they were projected on average; above it, projections in that range ran low.")
+    table = calibration_table(calibration, None if position == 'All' else position, starters)
+    cal_data, cal_spec = calibration_chart(table, version, (position, starters))
+    st.vega_lite_chart(cal_data, cal_spec, use_container_width=True)
+
+    if len(seasons) > 1:
+        st.subheader("🗂️ Season over Season")
+        df_seasons = seasons_table(seasons, starters)
+        st.dataframe(df_seasons.pivot(index='Position', columns='Season', values='MAE').style.format("{:.2f}"), use_container_width=True)
+    else:
+        st.caption("Each season analyzed here is remembered; once another league season has been loaded, its MAE shows up beside this one.")
+
+@st.fragment
+def api_trace_viewer(traces):
+    # Every full rerun adds a trace, which makes the selectbox a new widget; the pick is carried over by path
+    labels = {t['path']: f"{datetime.fromtimestamp(t['started']).strftime('%a %I:%M:%S %p')} · {t['name']} · {t['requests']} requests · {t['duration']:.2f}s" for t in traces}
+    paths = list(labels)
+    kept = st.session_state.get('trace_pick')
+    picked = st.session_state['trace_pick'] = st.selectbox("Load:", paths, index=paths.index(kept) if kept in labels else 0, format_func=labels.get)
+    try: doc = tracing.read_trace(picked)
+    except (OSError, ValueError):
+        st.warning("That trace was rotated out. Pick another.")
+        return
+    df = tracing.waterfall(doc)
+    requests = df[df['Kind'] == 'request']
+    busy = requests['ms'].sum() / 1000
+    m1, m2, m3, m4, m5 = st.columns(5)
+    m1.metric("Wall Time", f"{doc['duration']:.2f}s")
+    m2.metric("Yahoo Requests", len(requests))
+    m3.metric("Downloaded", f"{requests['Bytes'].fillna(0).sum() / 1024:,.0f} KB")
+    m4.metric("Avg In Flight", f"{busy / doc['duration']:.1f}" if doc['duration'] else "–", help="Request time / wall time. Near 1 = requests ran one after another.")
+    m5.metric("Duplicates", int(requests['Duplicate'].sum()), help="Requests for a URL already fetched in this load")
+
+    st.subheader("🌊 Waterfall")
+    st.caption("Blue = cached function calls (fetch_*), orange = Yahoo requests, nested under the call that made them. Outlined bars repeat a URL already requested in this load.")
+    wf_data, wf_spec = waterfall_chart(df, doc['id'])
+    st.vega_lite_chart(wf_data, wf_spec, use_container_width=True)
+
+    if len(requests):
+        st.subheader("🔌 By Endpoint")
+        by_endpoint = requests.assign(Endpoint=requests['Span'].str.strip('\u00a0')).groupby('Endpoint').agg(
+            Requests=('ms', 'size'), Duplicates=('Duplicate', 'sum'), **{'Total ms': ('ms', 'sum'), 'Max ms': ('ms', 'max'), 'KB': ('Bytes', lambda b: b.fillna(0).sum() / 1024)})
+        st.dataframe(by_endpoint.sort_values('Total ms', ascending=False).style.format({'Total ms': "{:,.0f}", 'Max ms': "{:,.0f}", 'KB': "{:,.1f}"}), use_container_width=True)
+    with st.expander("📋 All Spans"):
+        st.dataframe(df.drop(columns=['Order']), use_container_width=True, hide_index=True)
+
+@st.fragment
+def raw_data_inspector(df):
+    if df.empty:
+        st.write("No weekly scores loaded.")
+        return
+    c1, c2 = st.columns([2, 1])
+    teams = c1.multiselect("Teams:", sorted(df['Team'].astype(str).unique()))
+    first, last = int(df['Week'].min()), int(df['Week'].max())
+    weeks = c2.slider("Weeks:", first, last, (first, last)) if last > first else (first, last)
+    view = df[df['Week'].between(*weeks)]
+    if teams: view = view[view['Team'].astype(str).isin(teams)]
+    st.dataframe(view, use_container_width=True)
 
 # =========================================================
 # PAGE 1: STANDINGS
@@ -113,6 +402,7 @@ if page == "🏆 Standings":
 # =========================================================
 elif page == "🤖 Optimal Standings":
     st.header("🤖 Optimal Standings (What If?)")
+    flag_incomplete('history', 'efficiency')
     st.markdown("""
     **The Ultimate 'What If' Scenario:**
     This simulation answers: *"What if EVERY manager played their Perfect Lineup every single week?"*
@@ -121,26 +411,9 @@ elif page == "🤖 Optimal Standings":
     """)
     
     # Use cached data
-    if 'efficiency_data' in st.session_state and st.session_state.efficiency_data:
-        df_eff = pd.DataFrame(st.session_state.efficiency_data)
-        
-        if not df_eff.empty and not df_history.empty:
-            # Merge Schedule with Max Points
-            schedule = df_history[['Week', 'Team', 'Opponent']].drop_duplicates()
-            
-            # 1. Get My Max Points
-            sim_data = pd.merge(schedule, df_eff[['Week', 'Team', 'Max Points']], on=['Week', 'Team'], how='left')
-            # 2. Get Opponent's Max Points
-            sim_data = pd.merge(sim_data, df_eff[['Week', 'Team', 'Max Points']], left_on=['Week', 'Opponent'], right_on=['Week', 'Team'], suffixes=('', '_Opp'), how='left')
-            
-            # 3. Calculate Hypothetical Result
-            sim_data['Optimal Win'] = sim_data['Max Points'] > sim_data['Max Points_Opp']
-            
-            # 4. Aggregate Season Totals
-            optimal_standings = sim_data.groupby('Team').agg(
-                Optimal_Wins=('Optimal Win', 'sum'),
-                Potential_PF=('Max Points', 'sum')
-            ).reset_index()
+    if not df_eff.empty:
+        if not df_team_summary.empty:
+            optimal_standings = df_team_summary[['Team', 'Optimal_Wins', 'Potential_PF']]
             
             # 5. Merge with Actual Standings for comparison
             final_comp = pd.merge(optimal_standings, df_standings[['Team', 'W', 'Rank']], on='Team')
@@ -165,35 +438,77 @@ elif page == "🤖 Optimal Standings":
 # =========================================================
 elif page == "🍀 Luck Index":
     st.header(f"The Luck Index (Weeks 1-{analyze_week})")
+    flag_incomplete('history', 'efficiency')
     st.info("**Are you good, or just lucky?** This calculates your **'All-Play' record**—simulating what your record would be if you played every single team, every single week.")
-    if not df_history.empty:
-        luck_stats = []
-        for team in df_history['Team'].unique():
-            w, l = 0, 0
-            for wk in range(1, analyze_week + 1):
-                wk_scores = df_history[df_history['Week'] == wk]
-                match = wk_scores[wk_scores['Team'] == team]
-                if match.empty: continue
-                my_score = match['Score'].values[0]
-                w += (wk_scores['Score'] < my_score).sum()
-                l += (wk_scores['Score'] > my_score).sum()
-            luck_stats.append({'Team': team, 'All-Play Wins': w, 'All-Play Losses': l, 'All-Play Pct': w/(w+l) if (w+l)>0 else 0})
-        df_luck = pd.DataFrame(luck_stats)
-        if not df_luck.empty and not df_standings.empty:
-            df_final = pd.merge(df_standings, df_luck, on='Team')
-            df_final['Luck Factor'] = (df_final['W']/(df_final['W']+df_final['L'])) - df_final['All-Play Pct']
+    if not df_team_summary.empty:
+        if not df_standings.empty:
+            df_final = build_luck_table(df_standings, df_team_summary)
             def color_luck(val): color = '#d4edda' if val > 0 else '#f8d7da'; return f'background-color: {color}; color: {"green" if val > 0 else "red"}'
-            st.dataframe(df_final.sort_values('All-Play Wins', ascending=False).style.map(color_luck, subset=['Luck Factor']).format({"Luck Factor": "{:.2f}"}), use_container_width=True, hide_index=True)
+            st.dataframe(df_final.style.map(color_luck, subset=['Luck Factor']).format({"Luck Factor": "{:.2f}"}), use_container_width=True, hide_index=True)
+
+# =========================================================
+# PAGE 3A: SCORING WHAT-IF
+# =========================================================
+elif page == "🧪 Scoring What-If":
+    st.header(f"🧪 Scoring What-If (Weeks 1-{analyze_week})")
+    flag_incomplete('history', 'efficiency')
+    st.info("""
+    **What if the league scored differently?** Every player's weekly stat line is re-scored under the rules you pick.
+    * **Standings:** Each manager's actual lineups, re-scored. Ties on wins are broken by points.
+    * **Luck & Optimal Wins:** The all-play record and the best possible lineups, under each set of rules.
+    """)
+    # Memory-mapped player x week store with raw stat lines (no Yahoo calls when precomputed)
+    matrix = player_matrix(analyze_week, refresh='history' not in precomputed)
+    settings = dataset('settings', fetch_league_settings) or {}
+    if matrix is not None and len(matrix) and matrix.stat_ids and settings.get('stat_modifiers') and not df_history.empty:
+        scoring_what_if(matrix, df_history, settings)
+    else:
+        st.warning("Stat lines or league scoring settings aren't loaded yet. Please refresh.")
+
+# =========================================================
+# PAGE 3B: STRENGTH OF SCHEDULE
+# =========================================================
+elif page == "🗓️ Strength of Schedule":
+    st.header(f"🗓️ Strength of Schedule (Weeks 1-{analyze_week})")
+    flag_incomplete('history')
+    st.info("""
+    **Did the schedule make your record?** Same scores, different opponents.
+    * **Schedule Swap:** Your record if you had played another manager's schedule (if that schedule meets you, you play them instead).
+    * **Random Seasons:** 100,000 seasons that keep the league's real matchup structure but shuffle who gets which schedule. **Schedule Luck** = actual wins minus the average.
+    """)
+    if not df_history.empty:
+        with st.spinner("Simulating 100,000 seasons..."):
+            sos, sos_handle = shared('schedule', (history_handle.version,), lambda: build_schedule_tables(df_history))
+        teams = list(sos['teams'])
+        spots = st.slider("Playoff spots", 2, len(teams), min(6, len(teams)))
+        df_sos = sos_summary(teams, sos['scores'], sos['opp'], sos['swap'], sos['sims'], spots)
+        def color_luck(val): return f'color: {"green" if val > 0 else "red"}'
+        st.dataframe(df_sos.style.map(color_luck, subset=['Schedule Luck']).format({"Expected W": "{:.2f}", "Schedule Luck": "{:+.2f}", "Opp PPG": "{:.1f}", "W 10th pct": "{:.0f}", "W 90th pct": "{:.0f}"}),
+                     column_config={"Playoff %": st.column_config.ProgressColumn("Playoff %", format="%.1f%%", min_value=0, max_value=100, help="Share of random seasons finishing in a playoff spot (wins, then points for).")},
+                     use_container_width=True, hide_index=True)
+
+        st.divider()
+        st.subheader("🔀 Schedule Swap (Wins)")
+        st.caption("Row = team, column = whose schedule it plays. The diagonal is the actual record.")
+        df_swap = pd.DataFrame(sos['swap'], index=teams, columns=teams)
+        def color_swap(row):
+            actual = row[row.name]
+            return ['' if v == actual else ('background-color: #d4edda; color: green' if v > actual else 'background-color: #f8d7da; color: red') for v in row]
+        st.dataframe(df_swap.style.apply(color_swap, axis=1), use_container_width=True)
+
+        st.subheader("🎲 Win Distribution Over Random Seasons")
+        dist_data, dist_spec = win_distribution_chart(sos['teams'], sos['sims'], sos_handle.version)
+        st.vega_lite_chart(dist_data, dist_spec, use_container_width=True)
 
 # =========================================================
 # PAGE 4: POWER RANKINGS
 # =========================================================
 elif page == "📊 Power Rankings":
     st.header("📊 Power Rankings")
+    flag_incomplete('history', 'efficiency')
     st.info("**Strength of Roster.** This formula rewards high scoring but penalizes inconsistency (Volatility). High volatility means your team is unpredictable.")
-    if not df_history.empty:
-        power_stats = df_history.groupby('Team')['Score'].agg(['mean', 'std']).reset_index()
-        power_stats['Power Score'] = power_stats['mean'] - (power_stats['std'] * 0.5)
+    if not df_team_summary.empty:
+        power_stats = df_team_summary[['Team', 'mean', 'std', 'Power Score']]
         st.dataframe(
             power_stats.sort_values('Power Score', ascending=False), 
             column_config={
@@ -209,20 +524,16 @@ elif page == "📊 Power Rankings":
 
         st.subheader("💥 Boom/Bust Analysis")
         st.caption("Visualizing team volatility. A wider box means the team is unpredictable (Boom/Bust).")
-        sort_order = df_history.groupby('Team')['Score'].median().sort_values(ascending=False).index.tolist()
-        chart = alt.Chart(df_history).mark_boxplot(extent='min-max', size=50).encode(
-            x=alt.X('Team:N', sort=sort_order, title=None),
-            y=alt.Y('Score:Q', title='Weekly Scores', scale=alt.Scale(zero=False)),
-            color=alt.Color('Team:N', legend=None),
-            tooltip=['Team', 'Week', 'Score']
-        ).properties(height=500)
-        st.altair_chart(chart, use_container_width=True)
+        sort_order = df_team_summary.sort_values('median', ascending=False)['Team'].tolist()
+        box_data, box_spec = boxplot_chart(df_team_week, team_week_handle.version, sort_order)
+        st.vega_lite_chart(box_data, box_spec, use_container_width=True)
 
 # =========================================================
 # PAGE 5: POSITIONAL POWER RANKINGS
 # =========================================================
 elif page == "💪 Positional Power":
     st.header("💪 Positional Power Rankings")
+    flag_incomplete('positional')
     st.info("""
     **Where is your team strongest?** This analyzes Points Per Game (PPG) for your **STARTERS ONLY**.
     * **Logic:** Calculates the League Average Starter PPG for every position.
@@ -231,8 +542,8 @@ elif page == "💪 Positional Power":
     """)
     
     # Data is auto-loaded at startup
-    if 'pos_data' in st.session_state and st.session_state.pos_data:
-        raw_data = st.session_state.pos_data
+    if pos_data:
+        raw_data = pos_data
         
         # 1. Calculate League Averages
         all_scores = {'QB': [], 'RB': [], 'WR': [], 'TE': [], 'K': [], 'DEF': []}
@@ -273,6 +584,24 @@ elif page == "💪 Positional Power":
     else:
         st.warning("Positional data not loaded. Please refresh.")
 
+# =========================================================
+# PAGE 5B: PROJECTION ACCURACY
+# =========================================================
+elif page == "🎯 Projection Accuracy":
+    st.header(f"🎯 Projection Accuracy (Weeks 1-{analyze_week})")
+    flag_incomplete('projections')
+    st.info("""
+    **How far can you trust Yahoo's projections?** Every rostered player-week with a projection is compared to what the player actually scored.
+    * **MAE:** Average miss in points, either direction. **RMSE** weighs big misses more.
+    * **Bias:** Average of actual minus projected. Positive = Yahoo projects too low.
+    * **Calibration:** Do players projected for 15 actually score 15?
+    """)
+    stats, projections_handle = shared('projections', lambda: (analyze_week, as_of('projections', fetch_projection_accuracy, analyze_week)), lambda: dataset('projections', fetch_projection_accuracy, analyze_week), "Scoring Yahoo's projections...")
+    if stats and len(stats['cells']):
+        projection_accuracy(stats, projections_handle.version, projection_seasons())
+    else:
+        st.warning("Projection data not loaded. Please refresh.")
+
 # =========================================================
 # PAGE 6: DRAFT ANALYSIS (SCATTER PLOT)
 # =========================================================
@@ -286,144 +615,23 @@ elif page == "📉 Draft Analysis":
         * **💣 The Busts (Bottom-Left):** Players drafted early who scored low. These lose leagues.
     """)
     
-    # 1. Check if data key exists
-    data_missing = 'draft_scatter' not in st.session_state
-    
-    # 2. Check if data is empty (loaded but found nothing)
-    data_empty = False
-    if not data_missing:
-        if isinstance(st.session_state.draft_scatter, list) and len(st.session_state.draft_scatter) == 0:
-            data_empty = True
-
-    # 3. Main Logic
-    if not data_missing and not data_empty:
-        df_draft = pd.DataFrame(st.session_state.draft_scatter)
-        
-        # --- MERGE REAL TEAM NAMES (DRAFT) ---
-        if not df_standings.empty and 'Team Key' in df_standings.columns:
-            df_names = df_standings[['Team', 'Team Key']].rename(columns={'Team': 'Team Name'})
-            if 'Team Key' in df_draft.columns:
-                df_draft = pd.merge(df_draft, df_names, on='Team Key', how='left')
-                df_draft['Team Name'] = df_draft['Team Name'].fillna(df_draft['Team Key'])
-            else:
-                df_draft['Team Name'] = "Unknown"
-        else:
-             df_draft['Team Name'] = df_draft['Team Key'] if 'Team Key' in df_draft.columns else "Unknown"
-
-        # --- PRE-PROCESSING: CALCULATE 'VISUAL SLOT' ---
-        league_size = len(df_standings) if not df_standings.empty else 12
-        
-        def calculate_visual_slot(row):
-            # 1. Keepers: Fixed to the far left (negative value)
-            if row['Type'] == 'Keeper':
-                return -15 # Visual gap to the left
-            
-            # 2. Regular Draft: Actual Pick Number
-            return (row['Round'] - 1) * league_size + row['Pick']
-
-        df_draft['Visual Slot'] = df_draft.apply(calculate_visual_slot, axis=1)
-
-        # --- FILTERS (STANDARD DROPDOWNS) ---
-        with st.expander("🔎 Filter Options", expanded=True):
-            c1, c2, c3 = st.columns(3)
-            
-            # 1. Type Filter (Selectbox)
-            with c1:
-                acq_types = ["All Players", "Regular Draft", "Keepers"]
-                filter_type = st.selectbox("Type:", acq_types)
-            
-            # 2. Position Filter (Selectbox)
-            with c2:
-                # Get unique positions, sort, and add "All"
-                unique_pos = sorted([x for x in df_draft['Position'].unique() if x])
-                pos_options = ["All Positions"] + unique_pos
-                selected_pos = st.selectbox("Position:", pos_options)
-                
-            # 3. Team Filter (Selectbox)
-            with c3:
-                unique_teams = sorted([str(x) for x in df_draft['Team Name'].unique() if x])
-                team_options = ["All Teams"] + unique_teams
-                selected_team = st.selectbox("Team:", team_options)
-
-            # 4. Color By Preference
-            color_by = st.selectbox("Color Bubbles By:", ["Position", "Team Name", "Type"], index=0)
-
-        # --- APPLY FILTERS ---
-        # Type
-        if filter_type == "Regular Draft":
-            df_draft = df_draft[df_draft['Type'] == 'Regular']
-        elif filter_type == "Keepers":
-            df_draft = df_draft[df_draft['Type'] == 'Keeper']
-        
-        # Position
-        if selected_pos != "All Positions":
-            df_draft = df_draft[df_draft['Position'] == selected_pos]
-            
-        # Team
-        if selected_team != "All Teams":
-            df_draft = df_draft[df_draft['Team Name'] == selected_team]
-
-        # --- SCATTER PLOT ---
-        if not df_draft.empty:
-            chart = alt.Chart(df_draft).mark_point(filled=True, size=100).encode(
-                x=alt.X('Visual Slot', title='Draft Order (Left=Keepers, Right=Late Rounds)', scale=alt.Scale(zero=False)),
-                y=alt.Y('Total Points', title='Season Total Points', scale=alt.Scale(zero=False)),
-                color=alt.Color(color_by, title=color_by),
-                shape=alt.Shape('Type', title='Type'), 
-                tooltip=['Player', 'Position', 'Round', 'Total Points', 'Type', 'Team Name']
-            ).properties(height=600).interactive()
-            
-            st.altair_chart(chart, use_container_width=True)
-            
-            st.divider()
-            
-            # --- DATAFRAME VIEW ---
-            st.subheader(f"💎 Roster Gems ({filter_type})")
-            
-            # Create a clean view
-            display_cols = ['Player', 'Position', 'Type', 'Total Points', 'Team Name']
-            if filter_type == "Regular Draft" or filter_type == "All Players":
-                display_cols.insert(2, 'Round')
-                
-            st.dataframe(
-                df_draft.sort_values('Total Points', ascending=False).head(20)[display_cols], 
-                use_container_width=True, 
-                hide_index=True
-            )
-
-            # --- POTENTIAL KEEPERS (NEXT YEAR) ---
-            st.divider()
-            st.subheader("🔮 Potential Keepers (Next Year)")
-            st.caption("Eligible Candidates: Players drafted **Round 4 or later** this year (who were NOT Keepers this season).")
-            
-            # Use original unfiltered dataframe for this calculation to see all options
-            df_all = pd.DataFrame(st.session_state.draft_scatter)
-            # Must merge team names again for this new dataframe view
-            if not df_standings.empty and 'Team Key' in df_standings.columns:
-                df_names = df_standings[['Team', 'Team Key']].rename(columns={'Team': 'Team Name'})
-                if 'Team Key' in df_all.columns:
-                    df_all = pd.merge(df_all, df_names, on='Team Key', how='left')
-                    df_all['Team Name'] = df_all['Team Name'].fillna(df_all['Team Key'])
-
-            # Filter Logic:
-            # 1. Type == Regular (Was not a keeper this year)
-            # 2. Round > 3 (Drafted in Round 4 or later)
-            df_keepers = df_all[
-                (df_all['Type'] == 'Regular') & 
-                (df_all['Round'] > 3)
-            ].copy()
-
-            if not df_keepers.empty:
-                st.dataframe(
-                    df_keepers.sort_values('Total Points', ascending=False).head(20)[['Player', 'Position', 'Round', 'Total Points', 'Team Name']],
-                    use_container_width=True,
-                    hide_index=True
-                )
-            else:
-                st.info("No eligible keeper candidates found based on criteria.")
-
+    # Main Logic (empty means the load failed or found nothing)
+    if not df_draft_scatter.empty:
+        # Team names, visual slots and keeper candidates are built once per draft and standings
+        # version; the filters below rerun only draft_explorer (a fragment), not the whole script.
+        # Team names come from the standings, so a rename gets new tables and new chart labels.
+        draft_version = (draft_totals_handle.version, standings_handle.version)
+        (df_draft_all, df_keepers), _ = shared('draft_table', draft_version, lambda: build_draft_table(df_draft_scatter, df_standings))
+        draft_explorer(df_draft_all, draft_weekly, draft_version)
+
+        # --- POTENTIAL KEEPERS (NEXT YEAR) ---
+        st.divider()
+        st.subheader("🔮 Potential Keepers (Next Year)")
+        st.caption("Eligible Candidates: Players drafted **Round 4 or later** this year (who were NOT Keepers this season).")
+        if not df_keepers.empty:
+            st.dataframe(df_keepers.head(20)[['Player', 'Position', 'Round', 'Total Points', 'Team Name']], use_container_width=True, hide_index=True)
         else:
-            st.info("No players match your filters.")
+            st.info("No eligible keeper candidates found based on criteria.")
     
     else:
         # --- ERROR UI ---
@@ -432,6 +640,8 @@ elif page == "📉 Draft Analysis":
         
         if st.button("🔄 Retry Loading Draft Data"):
             fetch_draft_results.clear()
+            fetch_draft_season_totals.clear()
+            STORE.drop('draft'); STORE.drop('draft_totals')
             st.rerun()
 
 # =========================================================
@@ -439,45 +649,41 @@ elif page == "📉 Draft Analysis":
 # =========================================================
 elif page == "⚔️ Rivalry":
     st.header("⚔️ League Records")
+    flag_incomplete('history', 'efficiency')
     st.info("Season records and the head-to-head matrix. Check who you've dominated and who has your number.")
-    if not df_history.empty:
-        h, l = df_history.loc[df_history['Score'].idxmax()], df_history.loc[df_history['Score'].idxmin()]
+    if not df_team_week.empty:
+        h, l = df_team_week.loc[df_team_week['Score'].idxmax()], df_team_week.loc[df_team_week['Score'].idxmin()]
         c1, c2, c3 = st.columns(3)
         c1.metric("🚀 Season High", f"{h['Score']} pts", h['Team'])
         c2.metric("📉 Season Low", f"{l['Score']} pts", l['Team'])
-        losses = df_history[df_history['Result'] == 'L']
+        losses = df_team_week[df_team_week['Result'] == 'L']
         if not losses.empty: 
             hb = losses.loc[losses['Score'].idxmax()]
             c3.metric("💔 Heartbreak", f"{hb['Score']} pts", hb['Team'], help="Highest score in a losing effort.")
         
         st.divider()
         
-        if 'Opponent Score' in df_history.columns:
-            df_history['Margin'] = df_history['Score'] - df_history['Opponent Score']
-            df_history['AbsMargin'] = df_history['Margin'].abs()
-            wins = df_history[df_history['Result'] == 'W']
-            c4, c5, c6 = st.columns(3)
-            
-            if not wins.empty:
-                bw = wins.loc[wins['Margin'].idxmax()]
-                score_str = f"{bw['Team']} ({bw['Score']}) vs {bw['Opponent']} ({bw['Opponent Score']})"
-                c4.metric("😤 Largest Victory", f"+{bw['Margin']:.2f}", score_str, help="Biggest blowout win.")
-                
-            nb = df_history.loc[df_history['AbsMargin'].idxmin()]
-            nb_score_str = f"{nb['Team']} ({nb['Score']}) vs {nb['Opponent']} ({nb['Opponent Score']})"
-            c5.metric("😬 The Nail Biter", f"{nb['AbsMargin']:.2f}", nb_score_str, help="Closest game of the season.")
-            
-            if not wins.empty:
-                uw = wins.loc[wins['Score'].idxmin()]
-                uw_score_str = f"{uw['Team']} ({uw['Score']}) vs {uw['Opponent']} ({uw['Opponent Score']})"
-                c6.metric("🥴 The Ugly Win", f"{uw['Score']} pts", uw_score_str, help="Lowest score that resulted in a win.")
-
+        wins = df_team_week[df_team_week['Result'] == 'W']
+        c4, c5, c6 = st.columns(3)
+        
+        if not wins.empty:
+            bw = wins.loc[wins['Margin'].idxmax()]
+            score_str = f"{bw['Team']} ({bw['Score']}) vs {bw['Opponent']} ({bw['Opponent Score']})"
+            c4.metric("😤 Largest Victory", f"+{bw['Margin']:.2f}", score_str, help="Biggest blowout win.")
+        
+        nb = df_team_week.loc[df_team_week['AbsMargin'].idxmin()]
+        nb_score_str = f"{nb['Team']} ({nb['Score']}) vs {nb['Opponent']} ({nb['Opponent Score']})"
+        c5.metric("😬 The Nail Biter", f"{nb['AbsMargin']:.2f}", nb_score_str, help="Closest game of the season.")
+        
+        if not wins.empty:
+            uw = wins.loc[wins['Score'].idxmin()]
+            uw_score_str = f"{uw['Team']} ({uw['Score']}) vs {uw['Opponent']} ({uw['Opponent Score']})"
+            c6.metric("🥴 The Ugly Win", f"{uw['Score']} pts", uw_score_str, help="Lowest score that resulted in a win.")
+        
         st.divider()
         st.subheader("Head-to-Head Matrix")
-        matrix = pd.DataFrame(index=sorted(df_history['Team'].unique()), columns=sorted(df_history['Team'].unique())).fillna("-")
-        for team in matrix.index:
-            for _, row in df_history[df_history['Team'] == team].iterrows(): 
-                matrix.at[team, row['Opponent']] = row['Result'] if matrix.at[team, row['Opponent']] == "-" else matrix.at[team, row['Opponent']] + f", {row['Result']}"
+        teams = sorted(df_team_summary['Team'])
+        matrix = df_team_week.groupby(['Team', 'Opponent'])['Result'].agg(', '.join).unstack().reindex(index=teams, columns=teams).fillna("-")
         
         def color_results(val):
             if not isinstance(val, str) or val == "-": return ''
@@ -494,35 +700,46 @@ elif page == "⚔️ Rivalry":
 # =========================================================
 elif page == "📉 Trends":
     st.header("📉 Season Trends")
+    flag_incomplete('history', 'efficiency')
     st.info("Tracking the cumulative race for points. See which teams are gaining ground and which are falling behind.")
-    if not df_history.empty:
-        df_cum = df_history.sort_values(['Team', 'Week'])
-        df_cum['Total Points'] = df_cum.groupby('Team')['Score'].cumsum()
-        st.altair_chart(alt.Chart(df_cum).mark_line(point=True).encode(x='Week:O', y='Total Points:Q', color='Team:N').interactive(), use_container_width=True)
+    if not df_team_week.empty:
+        zoom = st.radio("Zoom:", ["Full History", "Last 4 Weeks"], horizontal=True)
+        trend_data, trend_spec = trends_chart(df_team_week, team_week_handle.version, 4 if zoom == "Last 4 Weeks" else None)
+        st.vega_lite_chart(trend_data, trend_spec, use_container_width=True)
+
+    st.divider()
+    st.subheader("🔎 Player Trends")
+    # Memory-mapped player x week store, shared by every session (no Yahoo calls when precomputed)
+    matrix = player_matrix(analyze_week, refresh='history' not in precomputed)
+    if matrix is not None and len(matrix):
+        leaders = matrix.leaders()
+        labels = {pk: f"{matrix.names[i]} ({matrix.positions[i]})" for pk, i in matrix.row.items()}
+        picked = st.multiselect("Players:", leaders, default=leaders[:5], format_func=labels.get)
+        if picked:
+            player_data, player_spec = player_trend_chart(matrix, tuple(picked))
+            st.vega_lite_chart(player_data, player_spec, use_container_width=True)
+    else:
+        st.write("No player-week data available yet.")
 
 # =========================================================
 # PAGE 9: MANAGER SKILL
 # =========================================================
 elif page == "🧠 Manager Skill":
     st.header("🧠 Manager Efficiency")
+    flag_incomplete('efficiency')
     st.info("""
     **Who sets the best lineup?** * **Efficiency:** Percentage of potential points captured.
     * **Mistakes:** Count of bench players outscoring starters at the same position.
-    * **Match Impact:** Click a row below to see if bad decisions caused a loss.
+    * **Match Impact:** Click a row below to see if bad decisions caused a loss (a swap is **fatal** if it alone flips the game, a **contributor** if it's part of the smallest set of swaps that would have).
     """)
     
     # Data is pre-loaded; check just in case
-    if 'efficiency_data' not in st.session_state or st.session_state.efficiency_data is None:
+    if df_eff.empty:
          st.warning("Data loading... please wait or reload.")
                 
-    if 'efficiency_data' in st.session_state and st.session_state.efficiency_data:
-        df_eff = pd.DataFrame(st.session_state.efficiency_data)
-        if not df_eff.empty:
-            df_merged = pd.merge(df_eff, df_history, on=['Week', 'Team'], how='inner')
-            df_merged['Points Left on Bench'] = df_merged['Max Points'] - df_merged['Roster Points']
-            
-            summary = df_merged.groupby('Team').agg({'Roster Points': 'sum', 'Max Points': 'sum', 'Mistake_Count': 'sum'}).reset_index()
-            summary['Eff %'] = (summary['Roster Points'] / summary['Max Points']) * 100
+    if not df_eff.empty:
+        if not df_team_week.empty:
+            summary = df_team_summary
             
             col1, col2 = st.columns(2)
             with col1:
@@ -533,75 +750,47 @@ elif page == "🧠 Manager Skill":
                 st.dataframe(summary[['Team', 'Mistake_Count']].sort_values('Mistake_Count', ascending=False), use_container_width=True, hide_index=True)
 
             st.divider()
+
+            # Every subset of every week's swaps against the opponent's score (counterfactual.py)
+            (cf_games, cf_swaps), cf_handle = shared('lineup_counterfactuals', (team_week_handle.version,), lambda: lineup_counterfactuals(df_team_week, df_eff))
+            st.subheader("⚖️ Games Lost to Lineup Decisions")
+            st.caption("A loss counts when starting the right bench players would have beaten the opponent's actual score. **One-Swap Losses** needed a single change.")
+            st.dataframe(lineup_loss_summary(cf_games), column_config={"Avg Swaps To Flip": st.column_config.NumberColumn(format="%.1f"), "Swap Points": st.column_config.NumberColumn("Points Left (Swaps)", format="%.1f")}, use_container_width=True, hide_index=True)
+
+            st.divider()
             
             st.subheader("🔬 Match Impact Analysis")
-            selected_team = st.selectbox("Select a Manager to Audit:", summary['Team'].unique())
-            
-            if selected_team:
-                manager_weeks = df_merged[df_merged['Team'] == selected_team].sort_values('Week')
-                
-                st.markdown(f"**Season Log for {selected_team} (Click row to view details):**")
-                st.caption("Rows color-coded by outcome: Green = Won, Red = Lost, Yellow = Close Call")
-
-                for _, row in manager_weeks.iterrows():
-                    gap = row['Opponent Score'] - row['Score']
-                    verdict_icon = "💀"
-                    verdict_text = "Outmatched"
-                    
-                    if row['Result'] == 'W':
-                        verdict_icon = "✅"
-                        verdict_text = "Won"
-                    elif row['Points Left on Bench'] > gap:
-                        verdict_icon = "🚨"
-                        verdict_text = "Caused Loss"
-                    
-                    header = f"{verdict_icon} Week {row['Week']} vs {row['Opponent']} | Score: {row['Score']:.1f} - {row['Opponent Score']:.1f} | {verdict_text}"
-                    
-                    with st.expander(header):
-                        if row['Mistakes']:
-                            swap_table = []
-                            for m in row['Mistakes']:
-                                cost = m['in']['points'] - m['out']['points']
-                                impact = "No Impact"
-                                if row['Result'] == 'L':
-                                    if cost > gap: impact = "🔥 FATAL ERROR (Caused Loss)"
-                                    elif (row['Points Left on Bench'] > gap): impact = "⚠️ Contributor"
-                                
-                                swap_table.append({
-                                    "Pos": m['pos'],
-                                    "You Played": f"{m['out']['name']} ({m['out']['points']})",
-                                    "Should Have": f"{m['in']['name']} ({m['in']['points']})",
-                                    "Cost": cost,
-                                    "Impact": impact
-                                })
-                            st.dataframe(pd.DataFrame(swap_table), column_config={"Cost": st.column_config.NumberColumn("Pts Lost", format="+%.1f")}, use_container_width=True, hide_index=True)
-                        else:
-                            st.success("Perfect lineup! No points left on bench.")
+            # Every manager's season log is built once per data version; switching managers reruns only the fragment
+            audit, _ = shared('manager_audit', (cf_handle.version,), lambda: build_manager_audit(df_team_week, cf_games, cf_swaps))
+            manager_audit(audit)
 
 # =========================================================
 # PAGE 10: DRAFT & WAIVERS
 # =========================================================
 elif page == "💎 Draft & Waivers":
     st.header("💎 Gem Mining (WAR Analysis)")
+    flag_incomplete('impact')
     st.info("""
     **Analysis Methodology:**
     1.  **Tenure & Usage:** Points are ONLY counted if the player was in your starting lineup. Bench points are ignored.
     2.  **Normalized Value (VOB):** To fix skewing from dropping players, we compare your pickup's score to a **Replacement Baseline**.
-        * **Baseline =** The higher of your actual bench player OR the League Average Bench score for that position.
+        * **Baseline =** The higher of your actual bench player OR the League Average Bench score for that position (switchable below).
+    3.  **Attribution:** Each team is credited only for the weeks it started the player. Draft picks, waiver/free-agent adds and trades come from the league's transaction log.
     """)
-    if 'impact_data' in st.session_state and st.session_state.impact_data:
+    if impact_data:
+        # Other baselines are recomputed from the stored player-week table (war.py), no Yahoo calls
+        baseline = st.selectbox("Replacement Baseline:", list(BASELINES), help="What a starter's points are compared against for Value Over Bench and WAR.")
+        if baseline != DEFAULT_BASELINE:
+            pw, pw_handle = shared('player_weeks', lambda: (analyze_week, as_of('player_weeks', fetch_player_weeks, analyze_week)), lambda: dataset('player_weeks', fetch_player_weeks, analyze_week))
+            impact_data, _ = shared('impact_baseline', (draft_handle.version, tx_handle.version, pw_handle.version, baseline), lambda: split_impact(war_rows(pw, baseline), draft_res, transactions))
+
         # GM LEADERBOARD
-        df_w = pd.DataFrame(st.session_state.impact_data['waiver'])
+        df_w = impact_data['waiver']
         if not df_w.empty:
             st.subheader("🏆 GM of the Year: Best Waiver Wire Management")
             st.caption("Ranking managers by Normalized Value (VOB). This penalizes streaming bad players even if you had no backup.")
             
-            waiver_summary = df_w.groupby('Team').agg({
-                'Value Over Bench': 'sum',
-                'WAR': 'sum',
-                'Starter Points': 'sum',
-                'Player': 'count'
-            }).reset_index().rename(columns={'Player': 'Impact Pickups'})
+            waiver_summary = build_waiver_summary(df_w)
             
             st.dataframe(
                 waiver_summary.sort_values('Value Over Bench', ascending=False),
@@ -618,7 +807,7 @@ elif page == "💎 Draft & Waivers":
         st.subheader("🎯 Best Draft Picks (WAR)")
         
         # --- UPDATE FOR KEEPERS ---
-        df_draft_gems = pd.DataFrame(st.session_state.impact_data['draft'])
+        df_draft_gems = impact_data['draft']
         if not df_draft_gems.empty:
             if 'is_keeper' in df_draft_gems.columns:
                 df_draft_gems['Type'] = df_draft_gems['is_keeper'].apply(lambda x: '🛡️ Keeper' if x else 'Regular')
@@ -640,10 +829,42 @@ elif page == "💎 Draft & Waivers":
                             "Value Over Bench": st.column_config.NumberColumn("Value Over Bench", format="%.1f")
                         }, use_container_width=True, hide_index=True)
         
+        df_t = impact_data['trade']
+        if not df_t.empty:
+            st.divider(); st.subheader("🤝 Trade Returns (WAR)")
+            st.caption("Value created for the team that traded for the player, counting only the weeks after the trade.")
+            st.dataframe(df_t.sort_values(['WAR', 'Value Over Bench'], ascending=False)[['Player', 'Team', 'First Week', 'Weeks Started', 'Starter Points', 'WAR', 'Value Over Bench']],
+                        column_config={
+                            "WAR": st.column_config.NumberColumn("WAR", help="Wins Created Above Replacement."),
+                            "Value Over Bench": st.column_config.NumberColumn("Value Over Bench", format="%.1f")
+                        }, use_container_width=True, hide_index=True)
+
         if st.button("Recalculate Data"): 
-            st.session_state.impact_data = None
+            fetch_impact_analysis.clear()
+            fetch_transactions.clear()
+            fetch_player_weeks.clear()
+            STORE.drop('impact_rows'); STORE.drop('transactions'); STORE.drop('player_weeks')
             st.rerun()
 
 elif page == "📈 Raw Data":
     st.header("📈 Raw Data Inspector")
-    st.dataframe(df_history, use_container_width=True)
\ No newline at end of file
+    flag_incomplete('history')
+    raw_data_inspector(df_history)
+
+# =========================================================
+# PAGE 12: API TRACE (DEBUG)
+# =========================================================
+elif page == "🐞 API Trace":
+    st.header("🐞 API Trace")
+    st.info("""
+    **Where does a load spend its time?** Every page load records each cached fetch and each Yahoo request it made, with timings.
+    * **Waterfall:** Bars that start one after another are requests made serially; stacked bars ran in parallel.
+    * **Cache:** hit / stale (served, refreshed in the background) / miss (computed during the load). Background refreshes are recorded as loads of their own.
+    * Traces are kept on the server (the newest `FFL_TRACE_KEEP`), not per viewer.
+    """)
+    traces = tracing.list_traces()
+    if traces: api_trace_viewer(traces)
+    elif tracing.TRACE_KEEP <= 0: st.warning("Tracing is off. Start the dashboard with `FFL_TRACE_KEEP=50` (traces to keep) to record loads.")
+    else: st.warning("No traces recorded yet. Open any page, then come back.")
+
+tracing.end()
@@ -0,0 +1,213 @@
+import os
+import glob
+import pickle
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:  # Windows: single-flight is per process only
+    fcntl = None
+
+# --- PERSISTENT RESULT CACHE ---
+# Replaces st.cache_data(persist="disk"), which pickled every result forever.
+# * Keys include PARSER_VERSION / SCHEMA_VERSION, so a code change never reads an old shape.
+# * Entries are zlib-compressed pickles, one file each: <function>-<key>.pkl.z
+# * The directory is kept under a byte budget, evicting least recently used files first.
+# * Empty results (failed fetches) are kept for a short TTL only, then retried.
+# * Every entry records when it was stored and whether it is partial (a fetch that hit
+#   its deadline), for stale-while-revalidate in runtime.PersistentCache.
+# A small in-memory tier holds the compressed bytes so reruns skip the disk read;
+# every hit still unpickles a fresh copy, like st.cache_data.
+# Incremental fetchers also keep named state here (<name>.state); state is neither
+# evicted nor wiped by "Refresh Data", since it is what makes the next refresh cheap.
+#
+# Point FFL_CACHE_DIR at a shared volume and every replica uses the same entries.
+# single_flight() holds a per-key thread lock plus an flock on <entry>.lock, so after
+# a miss exactly one session in one process runs the Yahoo loops and everyone else
+# waits and then reads its result. The .lock file is removed when the flight ends, so
+# lock files don't pile up outside the byte budget. Hot entries are checked against the
+# file's inode, so a refresh done by another replica is seen on the next read.
+
+CACHE_DIR = os.getenv('FFL_CACHE_DIR', '.ffl_cache')
+CACHE_MAX_BYTES = int(float(os.getenv('FFL_CACHE_MAX_MB', '256')) * 1024 * 1024)
+MEMORY_MAX_BYTES = int(float(os.getenv('FFL_CACHE_MEMORY_MB', '64')) * 1024 * 1024)
+NEGATIVE_TTL = float(os.getenv('FFL_NEGATIVE_TTL', '300'))
+
+HEADER = struct.Struct('<?dd?')  # (negative, expires_at, stored_at, partial); expires_at 0 = never
+FORMAT = 2  # entry layout; part of every key, so files from an older layout are never read
+
+def is_failure(value):
+    # Fetchers signal failure with an empty container
+    if value is None: return True
+    try: return len(value) == 0
+    except TypeError: return False
+
+
+class DiskCache:
+    def __init__(self, path=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, memory_bytes=MEMORY_MAX_BYTES, negative_ttl=NEGATIVE_TTL):
+        self.path, self.max_bytes, self.memory_bytes, self.negative_ttl = path, max_bytes, memory_bytes, negative_ttl
+        self.hot, self.hot_size = OrderedDict(), 0  # path -> (blob, inode)
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def file_for(self, name, key):
+        return os.path.join(self.path, f'{name}-{key}.pkl.z')
+
+    def get(self, name, key, meta=False):
+        # Returns (hit, value), or (hit, value, (stored_at, partial)) with meta=True
+        miss = (False, None, None) if meta else (False, None)
+        path = self.file_for(name, key)
+        try: inode = os.stat(path).st_ino
+        except OSError:
+            self._forget(path, remove=False)
+            return miss
+        blob = self._blob(path, inode)
+        if blob is None: return miss
+        negative, expires_at, stored_at, partial = HEADER.unpack_from(blob)
+        if expires_at and expires_at < time.time():
+            self._forget(path)
+            return miss
+        try:
+            value = pickle.loads(zlib.decompress(blob[HEADER.size:]))
+        except Exception:
+            self._forget(path)
+            return miss
+        try: os.utime(path)  # LRU clock
+        except OSError: pass
+        return (True, value, (stored_at, partial)) if meta else (True, value)
+
+    def _blob(self, path, inode):
+        with self.lock: entry = self.hot.get(path)
+        if entry is None or entry[1] != inode:
+            try:
+                with open(path, 'rb') as f: blob, inode = f.read(), os.fstat(f.fileno()).st_ino
+            except OSError:
+                return None
+            self._remember(path, blob, inode)
+            return blob
+        with self.lock: self.hot.move_to_end(path)
+        return entry[0]
+
+    def stored_at(self, name, key):
+        # When the entry was written (None = no usable entry)
+        meta = self.meta(name, key)
+        return None if meta is None else meta[0]
+
+    def meta(self, name, key):
+        # (stored_at, partial), None = no usable entry; reads only the header
+        path = self.file_for(name, key)
+        try: inode = os.stat(path).st_ino
+        except OSError: return None
+        with self.lock: entry = self.hot.get(path)
+        try:
+            if entry is not None and entry[1] == inode: header = entry[0][:HEADER.size]
+            else:
+                with open(path, 'rb') as f: header = f.read(HEADER.size)
+            negative, expires_at, stored_at, partial = HEADER.unpack(header)
+        except (OSError, struct.error): return None
+        if negative or (expires_at and expires_at < time.time()): return None
+        return stored_at, partial
+
+    def put(self, name, key, value, partial=False):
+        negative = is_failure(value)
+        now = time.time()
+        expires_at = now + self.negative_ttl if negative else 0.0
+        blob = HEADER.pack(negative, expires_at, now, partial) + zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 6)
+        path = self.file_for(name, key)
+        os.makedirs(self.path, exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f: f.write(blob)
+        os.replace(tmp, path)
+        self._remember(path, blob, os.stat(path).st_ino)
+        self.evict()
+
+    @contextmanager
+    def single_flight(self, name, key):
+        lock_path = self.file_for(name, key) + '.lock'
+        with self.lock:
+            flight = self.flights.setdefault(lock_path, [threading.Lock(), 0])  # [lock, threads using it]
+            flight[1] += 1
+        try:
+            with flight[0]:
+                f = self._lock_file(lock_path)
+                try: yield
+                finally:
+                    # The last thread out removes the sidecar while still holding it
+                    with self.lock: last = flight[1] == 1
+                    if last:
+                        try: os.remove(lock_path)
+                        except OSError: pass
+                    f.close()  # releases the flock
+        finally:
+            with self.lock:
+                flight[1] -= 1
+                if not flight[1]: self.flights.pop(lock_path, None)
+
+    def _lock_file(self, lock_path):
+        # Open and flock <entry>.lock. A holder may remove the file before we get the lock,
+        # so only a lock on the file still at lock_path counts; otherwise try again.
+        os.makedirs(self.path, exist_ok=True)
+        while True:
+            f = open(lock_path, 'a+b')
+            if not fcntl: return f
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.fstat(f.fileno()).st_ino == os.stat(lock_path).st_ino: return f
+            except OSError: pass
+            f.close()
+
+    def _remember(self, path, blob, inode):
+        with self.lock:
+            old = self.hot.pop(path, None)
+            if old is not None: self.hot_size -= len(old[0])
+            self.hot[path] = (blob, inode)
+            self.hot_size += len(blob)
+            while self.hot_size > self.memory_bytes and len(self.hot) > 1:
+                _, (dropped, _) = self.hot.popitem(last=False)
+                self.hot_size -= len(dropped)
+
+    def _forget(self, path, remove=True):
+        with self.lock:
+            old = self.hot.pop(path, None)
+            if old is not None: self.hot_size -= len(old[0])
+        if not remove: return
+        try: os.remove(path)
+        except OSError: pass
+
+    def evict(self):
+        entries = []
+        for path in glob.glob(os.path.join(self.path, '*.pkl.z')):
+            try:
+                st = os.stat(path)
+                entries.append((st.st_mtime, st.st_size, path))
+            except OSError: continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes: break
+            self._forget(path)
+            total -= size
+
+    def get_state(self, name, default=None):
+        try:
+            with open(os.path.join(self.path, f'{name}.state'), 'rb') as f:
+                return pickle.loads(zlib.decompress(f.read()))
+        except Exception:
+            return default
+
+    def put_state(self, name, value):
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, f'{name}.state')
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f: f.write(zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 6))
+        os.replace(tmp, path)
+
+    def clear(self, name=None):
+        pattern = f'{name}-*.pkl.z' if name else '*.pkl.z'
+        for path in glob.glob(os.path.join(self.path, pattern)):
+            self._forget(path)
+        if not name:
+            with self.lock: self.hot.clear(); self.hot_size = 0
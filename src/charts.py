@@ -0,0 +1,139 @@
+import threading
+from collections import OrderedDict
+import altair as alt
+from schedule import win_distribution
+
+# --- CHART DATA LAYER ---
+# Altair inlines the full DataFrame (every column) as JSON on every render. Instead,
+# each chart here is built as (projected/pre-aggregated frame, data-less Vega-Lite spec),
+# cached per data version, and drawn with st.vega_lite_chart(frame, spec), which ships
+# the frame as Arrow. Render cost then depends on the chart, not the history size.
+
+MAX_POINTS_PER_SERIES = 52  # Trends: longer histories are thinned to this many points per team
+_CACHE_SIZE = 64
+
+_cache, _lock = OrderedDict(), threading.Lock()
+
+def cached_chart(name, version, params, build):
+    # Process-wide, shared by every session; params must be small (filters, zoom, color)
+    key = (name, version, params)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    frame, chart = build()
+    spec = chart.to_dict()
+    spec.pop('data', None)  # data travels separately as Arrow
+    with _lock:
+        _cache[key] = (frame, spec)
+        while len(_cache) > _CACHE_SIZE: _cache.popitem(last=False)
+    return frame, spec
+
+def boxplot_chart(tw, version, sort_order):
+    # Power Rankings boom/bust: five-number summary per team instead of every team-week
+    def build():
+        stats = tw.groupby('Team')['Score'].describe()[['min', '25%', '50%', '75%', 'max', 'count']]
+        stats = stats.rename(columns={'25%': 'q1', '50%': 'median', '75%': 'q3'}).reset_index()
+        x = alt.X('Team:N', sort=sort_order, title=None)
+        base = alt.Chart().encode(x=x, color=alt.Color('Team:N', legend=None))
+        tooltip = ['Team:N', alt.Tooltip('median:Q', format='.1f'), alt.Tooltip('min:Q', format='.1f'), alt.Tooltip('max:Q', format='.1f'), alt.Tooltip('count:Q', title='Weeks')]
+        whiskers = base.mark_rule().encode(y=alt.Y('min:Q', title='Weekly Scores', scale=alt.Scale(zero=False)), y2='max:Q')
+        box = base.mark_bar(size=50).encode(y='q1:Q', y2='q3:Q', tooltip=tooltip)
+        median = base.mark_tick(color='white', size=50, thickness=2).encode(y='median:Q')
+        return stats, alt.layer(whiskers, box, median).properties(height=500)
+    return cached_chart('boxplot', version, tuple(sort_order), build)
+
+def trends_chart(tw, version, last_weeks=None):
+    # Cumulative points race; zoom = last N weeks, long series are thinned evenly
+    def build():
+        df = tw[['Week', 'Team', 'Cumulative Points']]
+        weeks = sorted(df['Week'].unique())
+        if last_weeks: weeks = weeks[-last_weeks:]
+        if len(weeks) > MAX_POINTS_PER_SERIES:
+            step = -(-len(weeks) // MAX_POINTS_PER_SERIES)
+            weeks = weeks[::-1][::step][::-1]  # keep the latest week
+        df = df[df['Week'].isin(weeks)].reset_index(drop=True)
+        chart = alt.Chart().mark_line(point=True).encode(
+            x='Week:O', y=alt.Y('Cumulative Points:Q', title='Total Points'), color='Team:N',
+            tooltip=['Team:N', 'Week:O', alt.Tooltip('Cumulative Points:Q', format='.1f')]
+        ).interactive()
+        return df, chart
+    return cached_chart('trends', version, (last_weeks,), build)
+
+def draft_scatter_chart(df_draft, version, filters, color_by):
+    # Only the columns the scatter encodes or shows in its tooltip
+    def build():
+        cols = ['Visual Slot', 'Total Points', 'Type', 'Player', 'Position', 'Round', 'Team Name']
+        df = df_draft[cols].copy()
+        df['Team Name'] = df['Team Name'].astype(str)
+        chart = alt.Chart().mark_point(filled=True, size=100).encode(
+            x=alt.X('Visual Slot:Q', title='Draft Order (Left=Keepers, Right=Late Rounds)', scale=alt.Scale(zero=False)),
+            y=alt.Y('Total Points:Q', title='Season Total Points', scale=alt.Scale(zero=False)),
+            color=alt.Color(f'{color_by}:N', title=color_by),
+            shape=alt.Shape('Type:N', title='Type'),
+            tooltip=['Player:N', 'Position:N', 'Round:Q', 'Total Points:Q', 'Type:N', 'Team Name:N']
+        ).properties(height=600).interactive()
+        return df, chart
+    return cached_chart('draft_scatter', version, (filters, color_by), build)
+
+def win_distribution_chart(teams, sims, version):
+    # Strength of Schedule: P(wins = k) per team over the simulated seasons, as a heatmap
+    def build():
+        df = win_distribution(list(teams), sims)
+        df = df[df['Share'] > 0].reset_index(drop=True)
+        chart = alt.Chart().mark_rect().encode(
+            x=alt.X('Wins:O', title='Wins'), y=alt.Y('Team:N', title=None),
+            color=alt.Color('Share:Q', title='Share of seasons', scale=alt.Scale(scheme='greens')),
+            tooltip=['Team:N', 'Wins:O', alt.Tooltip('Share:Q', format='.1%')]
+        ).properties(height=40 * len(teams))
+        return df, chart
+    return cached_chart('win_distribution', version, (), build)
+
+def player_trend_chart(matrix, player_keys):
+    # Weekly points for a handful of players, read straight from the player x week matrix
+    def build():
+        df = matrix.frame(list(player_keys))[['Player', 'Week', 'Team', 'Slot', 'Points', 'Projected']]
+        chart = alt.Chart().mark_line(point=True).encode(
+            x='Week:O', y=alt.Y('Points:Q', title='Fantasy Points'), color='Player:N',
+            tooltip=['Player:N', 'Week:O', 'Team:N', 'Slot:N', alt.Tooltip('Points:Q', format='.1f'), alt.Tooltip('Projected:Q', format='.1f')]
+        ).interactive()
+        return df, chart
+    return cached_chart('player_trend', matrix.version, tuple(player_keys), build)
+
+def calibration_chart(table, version, params):
+    # Projection Accuracy: mean actual per projection bin, with the perfectly calibrated line (actual = projected)
+    def build():
+        df = table.astype({'Bin': str}).assign(Perfect=table['Avg Projected'])
+        df = df.melt(['Bin', 'N', 'Avg Projected'], ['Avg Actual', 'Perfect'], var_name='Series', value_name='Points')
+        chart = alt.Chart().mark_line(point=True).encode(
+            x=alt.X('Avg Projected:Q', title='Projected (bin average)'), y=alt.Y('Points:Q', title='Actual (bin average)'),
+            color=alt.Color('Series:N', title=None), strokeDash=alt.StrokeDash('Series:N', legend=None),
+            tooltip=['Bin:N', 'N:Q', alt.Tooltip('Avg Projected:Q', format='.1f'), alt.Tooltip('Points:Q', format='.1f')]
+        )
+        return df, chart
+    return cached_chart('calibration', version, params, build)
+
+def projection_trend_chart(weekly, version, params):
+    # Projection Accuracy: MAE and bias per week
+    def build():
+        df = weekly[['Week', 'MAE', 'Bias']].melt('Week', var_name='Metric', value_name='Points')
+        chart = alt.Chart().mark_line(point=True).encode(
+            x='Week:O', y=alt.Y('Points:Q', title='Points per player-week'), color='Metric:N',
+            tooltip=['Week:O', 'Metric:N', alt.Tooltip('Points:Q', format='.2f')]
+        )
+        return df, chart
+    return cached_chart('projection_trend', version, params, build)
+
+def waterfall_chart(frame, version):
+    # API Trace: one bar per span (page fetches, their Yahoo requests) from start to end, in start order
+    def build():
+        df = frame.assign(Row=frame['Span'] + ' #' + frame['Order'].astype(str))
+        chart = alt.Chart().mark_bar(height=12, stroke='black').encode(
+            x=alt.X('Start ms:Q', title='ms since the load started'), x2='End ms:Q',
+            y=alt.Y('Row:N', sort=alt.EncodingSortField('Start ms'), title=None, axis=alt.Axis(labelLimit=420)),
+            color=alt.Color('Kind:N', scale=alt.Scale(domain=['fetch', 'request'], range=['#9ecae1', '#e6550d'])),
+            strokeWidth=alt.condition(alt.datum.Duplicate, alt.value(2), alt.value(0)),  # outlined: URL already requested in this load
+            tooltip=['Span:N', 'Kind:N', alt.Tooltip('ms:Q', format='.1f'), 'Cache:N', 'Status:N', 'Bytes:Q', 'Retries:Q', 'Duplicate:N', 'Params:N', 'Thread:N']
+        ).properties(height=max(18 * len(df), 120))
+        return df, chart
+    return cached_chart('waterfall', version, (), build)
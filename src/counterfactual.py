@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+# --- LINEUP COUNTERFACTUALS ---
+# Which lineup mistakes actually cost games. Each team-week's swaps (from the manager
+# efficiency data: bench player in, starter out, same slot) are joined with that week's
+# score and the opponent's. Every subset of a week's swaps is then evaluated at once:
+#   gains[g, k]     points swap k would have added in team-week g (0 = padding)
+#   subsets[s, k]   whether subset s makes swap k (all 2^K of them, K = most swaps in a week)
+#   totals = gains @ subsets.T  -> points each subset adds, for every team-week
+# A subset "flips" a game the team didn't win when it lifts the score past the
+# opponent's (whose lineup stays as played). The whole season is a few array operations.
+
+MAX_SWAPS = 12  # 4096 subsets; weeks with more swaps keep their biggest ones
+
+def _subsets(k):
+    return ((np.arange(2 ** k)[:, None] >> np.arange(k)) & 1).astype(bool)
+
+def lineup_counterfactuals(tw, df_eff):
+    # tw: team-week table (aggregates.build_team_week); df_eff: efficiency rows with Mistakes.
+    # Returns (games, swaps):
+    #   games: one row per team-week with swaps: gain, margin, whether the swaps flip it,
+    #          the fewest swaps that would have, and how many swap subsets would have
+    #   swaps: one row per swap: its gain, whether it flips the game alone, whether it's
+    #          part of a smallest flipping set, and whether every flipping set needs it
+    if df_eff.empty or tw.empty: return pd.DataFrame(), pd.DataFrame()
+    eff = df_eff[['Week', 'Team', 'Mistakes']]
+    eff = eff[eff['Mistakes'].map(lambda m: bool(m))]
+    games = eff.merge(tw[['Week', 'Team', 'Opponent', 'Score', 'Opponent Score', 'Result']], on=['Week', 'Team'])
+    if games.empty: return pd.DataFrame(), pd.DataFrame()
+    swaps = [sorted(m, key=lambda s: s['in']['points'] - s['out']['points'], reverse=True)[:MAX_SWAPS] for m in games['Mistakes']]
+
+    n, k = len(swaps), max(len(s) for s in swaps)
+    gains = np.zeros((n, k))
+    valid = np.zeros((n, k), dtype=bool)
+    for g, week_swaps in enumerate(swaps):
+        gains[g, :len(week_swaps)] = [s['in']['points'] - s['out']['points'] for s in week_swaps]
+        valid[g, :len(week_swaps)] = True
+
+    subsets = _subsets(k)
+    size = subsets.sum(axis=1)
+    usable = ~(subsets[None] & ~valid[:, None, :]).any(axis=2)        # (n, S): only real swaps
+    totals = gains @ subsets.T                                           # (n, S)
+    margin = (games['Opponent Score'] - games['Score']).to_numpy(dtype=float)
+    open_game = (games['Result'] != 'W').to_numpy()
+    flips = usable & (totals > margin[:, None]) & open_game[:, None]
+
+    fewest = np.where(flips, size[None], k + 1).min(axis=1)
+    smallest = flips & (size[None] == fewest[:, None])
+    in_smallest = (smallest[:, :, None] & subsets[None]).any(axis=1)      # (n, K)
+    any_flip = flips.any(axis=1)
+    needed = (~flips[:, :, None] | subsets[None]).all(axis=1) & any_flip[:, None]
+
+    games = games.drop(columns=['Mistakes']).assign(**{
+        'Swaps': valid.sum(axis=1), 'Swap Gain': gains.sum(axis=1), 'Margin': -margin,
+        'Lost To Lineup': any_flip, 'Fewest Swaps': np.where(any_flip, fewest, 0),
+        'Flipping Subsets': flips.sum(axis=1),
+    })
+    g, j = np.nonzero(valid)
+    swap_rows = pd.DataFrame({
+        'Week': games['Week'].to_numpy()[g], 'Team': games['Team'].to_numpy()[g],
+        'Pos': [swaps[a][b]['pos'] for a, b in zip(g, j)],
+        'In': [swaps[a][b]['in']['name'] for a, b in zip(g, j)], 'In Points': [swaps[a][b]['in']['points'] for a, b in zip(g, j)],
+        'Out': [swaps[a][b]['out']['name'] for a, b in zip(g, j)], 'Out Points': [swaps[a][b]['out']['points'] for a, b in zip(g, j)],
+        'Gain': gains[g, j],
+        'Flips Alone': (gains[g, j] > margin[g]) & open_game[g],
+        'In Smallest Fix': in_smallest[g, j], 'Needed': needed[g, j],
+    })
+    return games, swap_rows
+
+def lineup_loss_summary(games):
+    # Per manager: games a better lineup would have won, and how easy the fix was
+    if games.empty: return pd.DataFrame(columns=['Team', 'Games Lost To Lineup', 'One-Swap Losses', 'Ties Lost To Lineup', 'Avg Swaps To Flip', 'Swap Points'])
+    lost = games[games['Lost To Lineup']]
+    g = games.groupby('Team')
+    summary = pd.DataFrame({
+        'Games Lost To Lineup': lost[lost['Result'] == 'L'].groupby('Team').size(),
+        'One-Swap Losses': lost[lost['Fewest Swaps'] == 1].groupby('Team').size(),
+        'Ties Lost To Lineup': lost[lost['Result'] == 'T'].groupby('Team').size(),
+        'Avg Swaps To Flip': lost.groupby('Team')['Fewest Swaps'].mean(),
+        'Swap Points': g['Swap Gain'].sum(),
+    }).reindex(g.size().index)
+    counts = ['Games Lost To Lineup', 'One-Swap Losses', 'Ties Lost To Lineup']
+    summary[counts] = summary[counts].fillna(0).astype(int)
+    return summary.reset_index().rename(columns={'index': 'Team'}).sort_values(['Games Lost To Lineup', 'Swap Points'], ascending=False)
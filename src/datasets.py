@@ -0,0 +1,119 @@
+import os
+import json
+import pickle
+import time
+import pandas as pd
+from utils import (
+    fetch_standings,
+    fetch_all_weekly_scores,
+    get_current_week,
+    fetch_manager_efficiency,
+    fetch_draft_results,
+    fetch_impact_analysis,
+    fetch_player_weeks,
+    fetch_projection_accuracy,
+    fetch_positional_performance,
+    fetch_draft_season_totals,
+    load_draft_weekly_points,
+    fetch_transactions,
+    sync_week_partitions,
+    fetch_league_settings,
+    completeness,
+    player_matrix,
+    LEAGUE_ID
+)
+from ownership import OwnershipIndex
+
+# --- PRECOMPUTED DATASETS ---
+# scripts/precompute.py runs compute_all() on a schedule and writes every dataset to
+# DATA_DIR/<league>/; the dashboard reads those files and only falls back to live
+# Yahoo calls for datasets that haven't been precomputed.
+
+DATA_DIR = os.getenv('FFL_DATA_DIR', 'data')
+
+def analysis_week(current_week):
+    # The current week is still in progress, so analyze through last week
+    return max(1, current_week - 1)
+
+def compute_all(log=print):
+    results = {}
+    log("Fetching standings..."); results['standings'] = fetch_standings()
+    results['current_week'] = get_current_week()
+    results['settings'] = fetch_league_settings()
+    week = analysis_week(results['current_week'])
+    sync = sync_week_partitions(week) or {'checked': 0, 'changed': []}
+    log(f"Checked {sync['checked']} weekly scoreboards/rosters, {len(sync['changed'])} changed since the last run")
+    log(f"Fetching weekly scores (weeks 1-{week})..."); results['history'] = fetch_all_weekly_scores(week)
+    log("Analyzing manager efficiency..."); results['efficiency'] = fetch_manager_efficiency(week, results['history'].version)
+    log("Analyzing positional strength..."); results['positional'] = fetch_positional_performance(week)
+    log("Fetching draft results..."); results['draft'] = fetch_draft_results()
+    log("Fetching draft class totals..."); results['draft_totals'] = fetch_draft_season_totals(results['draft'].version, week, results['draft'])
+    results['draft_weekly'] = load_draft_weekly_points(list(results['draft']), week)
+    log("Fetching transactions..."); results['transactions'] = fetch_transactions(week)
+    log("Calculating WAR..."); results['impact'] = fetch_impact_analysis(week)
+    results['player_weeks'] = fetch_player_weeks(week)  # other WAR baselines are recomputed from it
+    log("Fetching projections..."); results['projections'] = fetch_projection_accuracy(week)
+    results['completeness'] = completeness(week)
+    missing = sorted({m for c in results['completeness'].values() for m in c['missing']}, key=lambda m: (m[1], m[0]))
+    if missing: log(f"Incomplete: {len(missing)} team-weeks could not be fetched ({', '.join(f'{t} wk {w}' for t, w in missing[:5])}{'…' if len(missing) > 5 else ''}); the next run retries only those")
+    matrix = player_matrix(week)  # memory-mapped, next to the cache rather than in the datasets
+    if matrix is not None: log(f"Player x week matrix: {len(matrix)} players x {matrix.weeks} weeks")
+    return results
+
+def split_impact(impact, draft, transactions=()):
+    # Each impact row is one player's starts for one team; the ownership index says how
+    # that team got the player. Draft picks get their draft info merged in. Without a
+    # transactions log, anything the team didn't draft counts as a waiver pickup.
+    # Builds new rows rather than updating the (cached) impact records in place.
+    index = OwnershipIndex(draft, transactions)
+    buckets = {'draft': [], 'waiver': [], 'trade': []}
+    for p in impact or []:
+        how = index.acquisition(p['Player Key'], p.get('Team Key'), p.get('First Week', 1)) or 'Waiver'
+        row = {**p, 'Acquired': how}
+        if how in ('Draft', 'Keeper'): buckets['draft'].append({**row, **draft[p['Player Key']]})
+        elif how == 'Trade': buckets['trade'].append(row)
+        else: buckets['waiver'].append(row)
+    return {name: pd.DataFrame(rows) for name, rows in buckets.items()}
+
+def league_dir(out_dir, league_id=LEAGUE_ID):
+    return os.path.join(out_dir, str(league_id))
+
+def save_datasets(results, out_dir=DATA_DIR, league_id=LEAGUE_ID):
+    path = league_dir(out_dir, league_id)
+    os.makedirs(path, exist_ok=True)
+    for name, value in results.items():
+        tmp = os.path.join(path, f'{name}.pkl.tmp')
+        with open(tmp, 'wb') as f: pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, os.path.join(path, f'{name}.pkl'))
+    # Manifest goes last so readers never see a half-written set
+    manifest = {'league_id': league_id, 'computed_at': time.time(), 'current_week': results.get('current_week'), 'datasets': sorted(results)}
+    tmp = os.path.join(path, 'manifest.json.tmp')
+    with open(tmp, 'w') as f: json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(path, 'manifest.json'))
+    return path
+
+_loaded = {}  # manifest path -> (mtime, datasets); one shared copy per process
+
+def load_datasets(out_dir=DATA_DIR, league_id=LEAGUE_ID):
+    # Re-read only when the manifest mtime changes, so reruns cost one stat()
+    manifest_path = os.path.join(league_dir(out_dir, league_id), 'manifest.json')
+    try: mtime = os.path.getmtime(manifest_path)
+    except OSError: return {}
+    if manifest_path not in _loaded or _loaded[manifest_path][0] != mtime:
+        _loaded[manifest_path] = (mtime, _read_datasets(manifest_path))
+    return _loaded[manifest_path][1]
+
+def precomputed_at(out_dir=DATA_DIR, league_id=LEAGUE_ID):
+    # When the current precomputed set was written (the manifest goes last), None if there is none
+    try: return os.path.getmtime(os.path.join(league_dir(out_dir, league_id), 'manifest.json'))
+    except OSError: return None
+
+def _read_datasets(manifest_path):
+    with open(manifest_path) as f: manifest = json.load(f)
+    path = os.path.dirname(manifest_path)
+    results = {}
+    for name in manifest.get('datasets', []):
+        try:
+            with open(os.path.join(path, f'{name}.pkl'), 'rb') as f: results[name] = pickle.load(f)
+        except Exception: continue
+    return results
@@ -0,0 +1,133 @@
+import os
+import json
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+
+# --- PLAYER x WEEK MATRIX (MEMORY-MAPPED) ---
+# Every (player, week) the league's rosters have seen, as dense arrays:
+#   actual[p, w], projected[p, w]   float32 points (NaN = not on a roster that week)
+#   slot[p, w]                      int8 code into .slots (-1 = not rostered)
+#   team[p, w]                      int16 code into .team_keys (-1 = not rostered)
+#   stats[p, w, s]                  float32 raw stat line, s indexes .stat_ids (0 = not recorded)
+# Column w is fantasy week w + 1. Each build is written once as .npy files into its own
+# version directory and opened with mmap_mode='r', so every session and every process
+# on the same disk (a shared FFL_CACHE_DIR included) reads the same pages instead of
+# holding a private copy. CURRENT names the live version; readers of an older one keep
+# their mapping until they reopen.
+
+FIELDS = (('actual', np.float32), ('projected', np.float32), ('slot', np.int8), ('team', np.int16), ('stats', np.float32))
+RESERVE_SLOTS = ('IR', 'IR+', 'Out', 'RES')
+BENCH_SLOTS = ('BN',) + RESERVE_SLOTS
+
+class PlayerWeekMatrix:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'index.json')) as f: index = json.load(f)
+        self.version, self.weeks = index['version'], index['weeks']
+        self.players, self.names, self.positions = index['players'], index['names'], index['positions']
+        self.team_keys, self.team_names, self.slots = index['team_keys'], index['team_names'], index['slots']
+        self.stat_ids = index['stat_ids']
+        self.row = {pk: i for i, pk in enumerate(self.players)}
+        for name, _ in FIELDS: setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r'))
+
+    def __len__(self): return len(self.players)
+
+    def leaders(self, n=None):
+        # Player keys by points over every stored week, best first
+        order = np.argsort(-np.nansum(self.actual, axis=1), kind='stable')
+        return [self.players[i] for i in order[:n]]
+
+    def rows(self, player_keys):
+        return np.array([self.row[pk] for pk in player_keys if pk in self.row], dtype=np.int64)
+
+    @property
+    def started(self):
+        # bool[p, w]: in an active lineup slot that week
+        active = np.array([s not in BENCH_SLOTS for s in self.slots] + [False])
+        return active[self.slot]  # -1 (not rostered) picks the trailing False
+
+    @property
+    def available(self):
+        # bool[p, w]: could have been started that week (rostered, not on IR/reserve)
+        usable = np.array([s not in RESERVE_SLOTS for s in self.slots] + [False])
+        return usable[self.slot]
+
+    def frame(self, player_keys=None):
+        # Long table (one row per rostered player-week), optionally for a few players only
+        rows = self.rows(player_keys) if player_keys is not None else np.arange(len(self))
+        p, w = np.nonzero(self.team[rows] >= 0)
+        p = rows[p]
+        return pd.DataFrame({
+            'Player Key': np.array(self.players, dtype=object)[p], 'Player': np.array(self.names, dtype=object)[p],
+            'Position': np.array(self.positions, dtype=object)[p], 'Week': w + 1,
+            'Team': np.array(self.team_names, dtype=object)[self.team[p, w]], 'Slot': np.array(self.slots, dtype=object)[self.slot[p, w]],
+            'Points': self.actual[p, w], 'Projected': self.projected[p, w], 'Started': self.started[p, w],
+        })
+
+
+def build_arrays(teams, rosters, weeks):
+    # teams: ((team_key, name), ...)
+    # rosters: {(team_key, week): ((player_key, name, position, slot, points, projected, stat line), ...)}
+    players, slots, stat_ids = {}, {}, {}
+    team_code = {tk: i for i, (tk, _) in enumerate(teams)}
+    for roster in rosters.values():
+        for pk, name, pos, slot, _, _, line in roster:
+            players[pk] = (name, pos)  # latest week wins (rosters iterate in week order)
+            slots.setdefault(slot, len(slots))
+            for sid, _ in line: stat_ids.setdefault(sid, len(stat_ids))
+    keys = sorted(players)
+    row = {pk: i for i, pk in enumerate(keys)}
+    shape = (len(keys), weeks)
+    arrays = {'actual': np.full(shape, np.nan, np.float32), 'projected': np.full(shape, np.nan, np.float32),
+              'slot': np.full(shape, -1, np.int8), 'team': np.full(shape, -1, np.int16),
+              'stats': np.zeros(shape + (len(stat_ids),), np.float32)}
+    for (tk, week), roster in rosters.items():
+        if tk not in team_code or not 1 <= week <= weeks: continue
+        for pk, _, _, slot, points, projected, line in roster:
+            p, w = row[pk], week - 1
+            # Dropped and re-added the same week: the roster that started the player keeps the week
+            if arrays['team'][p, w] >= 0 and slot in BENCH_SLOTS: continue
+            arrays['actual'][p, w], arrays['projected'][p, w] = points, projected
+            arrays['slot'][p, w], arrays['team'][p, w] = slots[slot], team_code[tk]
+            for sid, value in line: arrays['stats'][p, w, stat_ids[sid]] = value
+    index = {
+        'weeks': weeks, 'players': keys, 'names': [players[pk][0] for pk in keys], 'positions': [players[pk][1] for pk in keys],
+        'team_keys': [tk for tk, _ in teams], 'team_names': [n for _, n in teams], 'slots': list(slots), 'stat_ids': list(stat_ids),
+    }
+    return arrays, index
+
+_open, _lock = {}, threading.Lock()  # path -> PlayerWeekMatrix, one mapping per process
+
+def open_matrix(root):
+    # The live version under root, or None before the first build
+    try:
+        with open(os.path.join(root, 'CURRENT')) as f: version = f.read().strip()
+    except OSError: return None
+    path = os.path.join(root, version)
+    with _lock:
+        if path not in _open:
+            try: _open[path] = PlayerWeekMatrix(path)
+            except (OSError, ValueError, KeyError): return None
+            for old in [p for p in _open if os.path.dirname(p) == root and p != path]: del _open[old]
+        return _open[path]
+
+def write_matrix(root, version, arrays, index):
+    path = os.path.join(root, version)
+    if not os.path.isdir(path):
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        os.makedirs(tmp, exist_ok=True)
+        for name, dtype in FIELDS: np.save(os.path.join(tmp, f'{name}.npy'), arrays[name].astype(dtype, copy=False))
+        with open(os.path.join(tmp, 'index.json'), 'w') as f: json.dump({**index, 'version': version}, f)
+        try: os.rename(tmp, path)
+        except OSError: shutil.rmtree(tmp, ignore_errors=True)  # another process built it first
+    current = os.path.join(root, 'CURRENT')
+    tmp = f'{current}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w') as f: f.write(version)
+    os.replace(tmp, current)
+    # Older versions stay mapped by whoever has them open; only their directory entries go
+    for old in os.listdir(root):
+        if old not in (version, 'CURRENT') and not old.endswith('.tmp'):
+            shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+    return open_matrix(root)
@@ -0,0 +1,54 @@
+from collections import namedtuple
+
+# --- PLAYER OWNERSHIP INTERVALS ---
+# Who held each player, over which weeks, and how they got the player. Built from the draft
+# plus the ingested transactions log (utils.fetch_transactions), oldest move first.
+# Weeks are inclusive: a player dropped and re-added in week N belongs to both teams
+# that week (whoever started the player gets the points, from the weekly rosters).
+
+Interval = namedtuple('Interval', 'team_key start end how')  # end None = still on the roster
+
+SOURCES = {'waivers': 'Waiver', 'freeagents': 'Free Agent'}
+
+class OwnershipIndex:
+    def __init__(self, draft=None, transactions=()):
+        self.intervals = {}  # player_key -> [Interval] in time order
+        for pk, d in (draft or {}).items():
+            if d.get('team_key'): self.intervals[pk] = [Interval(d['team_key'], 1, None, 'Keeper' if d.get('is_keeper') else 'Draft')]
+        for t in sorted(transactions or (), key=lambda t: (t['timestamp'], t['id'])):
+            week = t.get('week') or 1
+            for move in t['players']:
+                pk = move['Player Key']
+                if move.get('source_type') == 'team': self._release(pk, move.get('source_team_key'), week)
+                if move.get('destination_type') == 'team':
+                    how = 'Trade' if move.get('type') == 'trade' else SOURCES.get(move.get('source_type'), 'Free Agent')
+                    self._acquire(pk, move.get('destination_team_key'), week, how)
+
+    def _release(self, pk, team_key, week):
+        spans = self.intervals.get(pk, [])
+        for i in range(len(spans) - 1, -1, -1):
+            if spans[i].team_key == team_key and spans[i].end is None:
+                spans[i] = spans[i]._replace(end=max(week, spans[i].start))
+                return
+
+    def _acquire(self, pk, team_key, week, how):
+        # A team can't hold a player twice; close anything the feed never dropped
+        spans = self.intervals.setdefault(pk, [])
+        for i, s in enumerate(spans):
+            if s.end is None: spans[i] = s._replace(end=max(week, s.start))
+        spans.append(Interval(team_key, week, None, how))
+
+    def acquisition(self, pk, team_key, week):
+        # How team_key came to have pk in that week (None when the log doesn't know)
+        spans = [s for s in self.intervals.get(pk, []) if s.team_key == team_key]
+        for s in reversed(spans):
+            if s.start <= week and (s.end is None or week <= s.end): return s.how
+        return spans[-1].how if spans else None
+
+    def owner(self, pk, week):
+        for s in reversed(self.intervals.get(pk, [])):
+            if s.start <= week and (s.end is None or week <= s.end): return s.team_key
+        return None
+
+    def history(self, pk):
+        return list(self.intervals.get(pk, []))
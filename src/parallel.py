@@ -0,0 +1,118 @@
+import os
+import atexit
+import threading
+import multiprocessing as mp
+from itertools import repeat
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+
+# --- PROCESS POOL (SHARED MEMORY) ---
+# CPU-bound analytics are split into independent shards and run on a pool of worker
+# processes, one shard per task. Only the Strength of Schedule simulation (schedule.py,
+# one block of simulated seasons per shard) uses it: lineup solving, WAR, scoring and the
+# lineup counterfactuals take 10-35 ms per league season in-process, less than shipping
+# their shards to workers would cost, so they are not sharded by week or season.
+# Arrays never travel by pickle: the parent copies inputs into named shared-memory blocks
+# once, every worker maps the same blocks, and each shard writes its own slice of the
+# output arrays in place. Only the small shard descriptions and results are pickled.
+# Shards must not depend on which worker runs them, so results are identical for any
+# number of workers (including the in-process path used with one worker or one shard).
+# Workers are spawned rather than forked: forking the Streamlit server would copy its
+# threads' locks mid-use. A spawned worker imports this module and each shard's function
+# by module name; the parent's __main__ (under Streamlit, the dashboard script) is skipped
+# because app.py marks itself as a main-only module (see the top of app.py).
+# The pool starts on the first run_sharded() call that needs it, so a server whose
+# viewers never open Strength of Schedule never starts workers. Default size is the core
+# count capped at MAX_WORKERS; FFL_WORKERS sets it outright. Speedup on more than one
+# core hasn't been measured yet: scripts/bench_parallel.py reports it per worker count.
+
+MAX_WORKERS = 4
+WORKERS = int(os.getenv('FFL_WORKERS', '0')) or min(os.cpu_count() or 1, MAX_WORKERS)
+
+class SharedArrays:
+    # inputs: {name: array} copied in; outputs: {name: (shape, dtype)} zero-filled.
+    # .arrays are the parent's views, .specs is what workers need to map them.
+    def __init__(self, inputs=None, outputs=None):
+        self.blocks, self.arrays, self.specs = [], {}, {}
+        try:
+            for name, array in (inputs or {}).items(): self._add(name, array.shape, array.dtype)[...] = array
+            for name, (shape, dtype) in (outputs or {}).items(): self._add(name, shape, dtype)[...] = 0
+        except BaseException:
+            self.close()
+            raise
+
+    def _add(self, name, shape, dtype):
+        dtype, shape = np.dtype(dtype), tuple(shape)
+        block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+        self.blocks.append(block)
+        self.specs[name] = (block.name, shape, dtype.str)
+        self.arrays[name] = np.ndarray(shape, dtype, buffer=block.buf)
+        return self.arrays[name]
+
+    def close(self):
+        self.arrays.clear()  # views must go before their blocks
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+def _run_shard(fn, shard, specs):
+    # Worker side: map the blocks, run one shard, unmap. fn must not keep the arrays.
+    blocks = {name: shared_memory.SharedMemory(name=block) for name, (block, _, _) in specs.items()}
+    try:
+        arrays = {name: np.ndarray(shape, dtype, buffer=blocks[name].buf) for name, (_, shape, dtype) in specs.items()}
+        result = fn(shard, arrays)
+        del arrays
+        return result
+    finally:
+        for block in blocks.values(): block.close()
+
+_pools, _lock = {}, threading.Lock()  # size -> ProcessPoolExecutor, started on first use
+_in_worker = False
+
+def _worker_init():
+    # Pool initializer: a worker runs its shards in-process, never starting a pool of its own
+    global _in_worker
+    _in_worker = True
+
+def pool(workers):
+    with _lock:
+        if workers not in _pools:
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn'), initializer=_worker_init)
+            # One task per worker while none is idle starts every process now, not on the first map
+            started = [executor.submit(os.getpid) for _ in range(workers)]
+            for f in started: f.result()
+            _pools[workers] = executor
+        return _pools[workers]
+
+def _drop_pool(workers):
+    with _lock: broken = _pools.pop(workers, None)
+    if broken: broken.shutdown(wait=False, cancel_futures=True)
+
+@atexit.register
+def shutdown():
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for p in pools: p.shutdown(wait=False, cancel_futures=True)
+
+def run_sharded(fn, shards, inputs=None, outputs=None, workers=None):
+    # fn(shard, arrays) -> small result, defined at module level so workers can import it.
+    # arrays holds the inputs (read-only) and outputs (each shard writes only its own part).
+    # Returns ([result per shard, in shard order], {output name: array})
+    shards, inputs, outputs = list(shards), inputs or {}, outputs or {}
+    workers = workers or WORKERS
+    if min(workers, len(shards)) > 1 and not _in_worker:
+        try:
+            with SharedArrays(inputs, outputs) as shared:
+                results = list(pool(workers).map(_run_shard, repeat(fn), shards, repeat(shared.specs)))
+                return results, {name: shared.arrays[name].copy() for name in outputs}
+        except (BrokenProcessPool, OSError):
+            _drop_pool(workers)  # a worker died or shared memory is unavailable: finish in-process
+    arrays = {**inputs, **{name: np.zeros(shape, dtype) for name, (shape, dtype) in outputs.items()}}
+    return [fn(shard, arrays) for shard in shards], {name: arrays[name] for name in outputs}
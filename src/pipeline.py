@@ -0,0 +1,47 @@
+import hashlib
+import pickle
+from collections import namedtuple
+
+# --- INCREMENTAL RECOMPUTE DAG ---
+# Yahoo applies stat corrections days after the games. Instead of clearing everything,
+# each raw partition (a week's scoreboard, a team's roster for a week) is stored with a
+# content hash, and every derived node remembers the hashes of the inputs it was built
+# from. Evaluating a node then:
+#   - reuses its memo when its inputs hash the same as last time,
+#   - otherwise recomputes it; if the new value hashes the same as before (a correction
+#     to a stat that doesn't score), nothing downstream changes either.
+# Keys are tuples whose first item names the rule, e.g. ('facts', 7) or ('roster', team_key, 7).
+
+Rule = namedtuple('Rule', 'deps compute keep', defaults=(True,))
+# deps(key, leaves) -> [input keys]; compute(key, {input key: value}) -> value
+# keep=False: not memoized between runs (cheap roll-ups whose callers cache the result)
+
+def digest(value):
+    return hashlib.blake2b(pickle.dumps(value, protocol=4), digest_size=8).hexdigest()
+
+class Graph:
+    def __init__(self, rules, leaves, memo=None):
+        self.rules = rules
+        self.leaves = leaves  # key -> (hash, value), the stored raw partitions
+        self.memo = memo if memo is not None else {}  # key -> (input hash, output hash, value)
+        self.recomputed, self.reused = [], []
+        self._seen = {}
+
+    def evaluate(self, key):
+        # Returns (hash, value) for key, recomputing only what changed upstream
+        if key in self.leaves: return self.leaves[key]
+        if key in self._seen: return self._seen[key]
+        rule = self.rules[key[0]]
+        inputs = {k: self.evaluate(k) for k in rule.deps(key, self.leaves)}
+        in_hash = digest((key, [(k, h) for k, (h, _) in inputs.items()]))
+        memo = self.memo.get(key)
+        if memo and memo[0] == in_hash:
+            out = memo[1:]
+            self.reused.append(key)
+        else:
+            value = rule.compute(key, {k: v for k, (_, v) in inputs.items()})
+            out = (digest(value), value)
+            if rule.keep: self.memo[key] = (in_hash, *out)
+            self.recomputed.append(key)
+        self._seen[key] = out
+        return out
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+from matrix import BENCH_SLOTS
+
+# --- PROJECTION ACCURACY ---
+# Yahoo's weekly projections against what players actually scored. Each week is reduced
+# once to additive sufficient statistics (count, error sums, calibration bin sums) per
+# (position, team, starter) cell; every metric and rollup is then a group sum over
+# those cells, so a new week adds its own cells and nothing else is recomputed
+# (utils: RECOMPUTE DAG memoizes the per-week cells).
+#   error = actual - projected     Bias = mean error (+ = Yahoo projects too low)
+#   MAE = mean |error|             RMSE = sqrt(mean error^2)
+# Player-weeks without a projection (byes, injured players) are left out.
+
+BINS = (0, 5, 10, 15, 20, 25, 30, np.inf)  # projected points
+BIN_LABELS = tuple(f'{lo}-{hi}' if hi != np.inf else f'{lo}+' for lo, hi in zip(BINS, BINS[1:]))
+SUMS = ['N', 'Error', 'Abs Error', 'Sq Error', 'Projected', 'Actual']
+
+def week_cells(week, facts):
+    # facts: ((team_key, team, player_key, player, position, slot, points, projected), ...)
+    # Returns (cells, calibration): additive sums for one week
+    df = pd.DataFrame.from_records([f[1:] for f in facts], columns=['Team', 'Player Key', 'Player', 'Position', 'Slot', 'Actual', 'Projected'])
+    df = df[df['Projected'] > 0]
+    err = (df['Actual'] - df['Projected']).to_numpy()
+    df = df.assign(**{
+        'Week': week, 'Starter': ~df['Slot'].isin(BENCH_SLOTS), 'N': 1,
+        'Error': err, 'Abs Error': np.abs(err), 'Sq Error': err ** 2,
+        'Bin': pd.cut(df['Projected'], BINS, labels=BIN_LABELS, right=False).astype(str),
+    })
+    cells = df.groupby(['Week', 'Position', 'Team', 'Starter'], as_index=False)[SUMS].sum()
+    calibration = df.groupby(['Week', 'Position', 'Starter', 'Bin'], as_index=False)[['N', 'Projected', 'Actual']].sum()
+    return cells, calibration
+
+def combine(weeks):
+    # [(cells, calibration), ...] -> one pair covering every week
+    weeks = list(weeks)
+    if not weeks: return {'cells': pd.DataFrame(columns=['Week', 'Position', 'Team', 'Starter'] + SUMS), 'calibration': pd.DataFrame()}
+    return {'cells': pd.concat([c for c, _ in weeks], ignore_index=True), 'calibration': pd.concat([k for _, k in weeks], ignore_index=True)}
+
+def metrics(sums):
+    out = sums.astype({'N': 'int64', **{c: 'float64' for c in SUMS[1:]}})
+    n = out['N'].where(out['N'] > 0)
+    out['MAE'] = out['Abs Error'] / n
+    out['Bias'] = out['Error'] / n
+    out['RMSE'] = np.sqrt(out['Sq Error'] / n)
+    out['Avg Projected'] = out['Projected'] / n
+    out['Avg Actual'] = out['Actual'] / n
+    return out.drop(columns=['Error', 'Abs Error', 'Sq Error', 'Projected', 'Actual'])
+
+def rollup(cells, by=(), starters_only=False):
+    # Metrics per group (e.g. ('Position',), ('Week',), ('Team',)); by=() = one overall row
+    if starters_only: cells = cells[cells['Starter']]
+    by = list(by)
+    sums = cells.groupby(by, as_index=False)[SUMS].sum() if by else cells[SUMS].sum().to_frame().T
+    return metrics(sums)
+
+def calibration_table(calibration, position=None, starters_only=False):
+    # Mean projected vs mean actual per projection bin; a calibrated projection sits on the diagonal
+    if calibration.empty: return pd.DataFrame(columns=['Bin', 'N', 'Avg Projected', 'Avg Actual'])
+    df = calibration
+    if starters_only: df = df[df['Starter']]
+    if position: df = df[df['Position'] == position]
+    out = df.groupby('Bin', as_index=False)[['N', 'Projected', 'Actual']].sum()
+    out['Avg Projected'] = out['Projected'] / out['N']
+    out['Avg Actual'] = out['Actual'] / out['N']
+    out['Bin'] = pd.Categorical(out['Bin'], BIN_LABELS, ordered=True)
+    return out.sort_values('Bin')[['Bin', 'N', 'Avg Projected', 'Avg Actual']].reset_index(drop=True)
+
+def season_summary(cells):
+    # Compact per-season record for multi-season trends: sums per (starter, position)
+    if cells.empty: return {}
+    return {(bool(starter), pos): sums for (starter, pos), sums in cells.groupby(['Starter', 'Position'])[SUMS].sum().to_dict('index').items()}
+
+def seasons_table(seasons, starters_only=False):
+    # {season label: season_summary} -> metrics per season and position, plus 'All'
+    rows = [{'Season': label, 'Position': pos, **sums} for label, summary in seasons.items()
+            for (starter, pos), sums in summary.items() if starter or not starters_only]
+    if not rows: return pd.DataFrame(columns=['Season', 'Position', 'N', 'MAE', 'Bias', 'RMSE'])
+    df = pd.DataFrame(rows)
+    sums = pd.concat([df.groupby(['Season', 'Position'], as_index=False)[SUMS].sum(),
+                      df.groupby('Season', as_index=False)[SUMS].sum().assign(Position='All')], ignore_index=True)
+    return metrics(sums)[['Season', 'Position', 'N', 'MAE', 'Bias', 'RMSE']].sort_values(['Season', 'Position'], ignore_index=True)
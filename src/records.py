@@ -0,0 +1,123 @@
+import array
+import hashlib
+import numpy as np
+import pandas as pd
+
+# --- COMPACT RECORD TABLES ---
+# Fetchers append rows into typed column buffers instead of building one dict per row.
+# Repeated strings (team names, player names, results) are interned into small
+# dimension tables and stored as integer codes, so a full season pickles to a fraction
+# of the size of a list of dicts and converts straight into categorical DataFrames.
+
+# Bump when a table layout changes; it is part of every persistent cache key
+SCHEMA_VERSION = 1
+
+class Dimension:
+    __slots__ = ('values', 'index')
+
+    def __init__(self, values=()):
+        self.values, self.index = [], {}
+        for v in values: self.code(v)
+
+    def code(self, value):
+        c = self.index.get(value)
+        if c is None:
+            c = self.index[value] = len(self.values)
+            self.values.append(value)
+        return c
+
+    def __len__(self): return len(self.values)
+
+    # The lookup dict is rebuilt on load, only the ordered values are pickled
+    def __getstate__(self): return self.values
+    def __setstate__(self, values): self.__init__(values)
+
+
+class ColumnTable:
+    # Subclasses set SCHEMA = ((column, typecode, dimension or None), ...)
+    # typecode is an array module code ('b'/'h'/'i' codes for dimension columns);
+    # '?' is stored as 'b' and viewed as bool.
+    SCHEMA = ()
+
+    def __init__(self):
+        self.dims = {dim: Dimension() for _, _, dim in self.SCHEMA if dim}
+        self.cols = {name: array.array('b' if code == '?' else code) for name, code, dim in self.SCHEMA}
+
+    def append(self, *values):
+        for (name, code, dim), v in zip(self.SCHEMA, values):
+            self.cols[name].append(self.dims[dim].code(v) if dim else v)
+
+    def __len__(self):
+        return len(self.cols[self.SCHEMA[0][0]]) if self.SCHEMA else 0
+
+    def column(self, name):
+        # Read-only numpy view over the buffer (the table can't grow while a view is alive).
+        # Read-only because the table itself may be shared (the dashboard's STORE).
+        code = next(c for n, c, _ in self.SCHEMA if n == name)
+        arr = np.frombuffer(self.cols[name], dtype=self.cols[name].typecode)
+        arr.flags.writeable = False
+        return arr.view(bool) if code == '?' else arr
+
+    def to_frame(self):
+        # Not fully zero-copy: pandas consolidates same-dtype columns into one block, which
+        # copies them; only a column with a dtype of its own stays a view of its buffer.
+        # The views are read-only, so an edit copies (copy-on-write) or raises, never
+        # writing through to the table.
+        data = {}
+        for name, code, dim in self.SCHEMA:
+            values = self.column(name)
+            if dim:
+                values = pd.Categorical.from_codes(values, categories=pd.Index(self.dims[dim].values, dtype=object))
+            data[name] = values
+        return pd.DataFrame(data, copy=False)
+
+    def records(self):
+        # Dict rows for the few callers that still iterate, decoded lazily
+        names = [n for n, _, _ in self.SCHEMA]
+        decoders = [self.dims[d].values if d else None for _, _, d in self.SCHEMA]
+        for row in zip(*(self.cols[n] for n in names)):
+            yield {n: (dec[v] if dec is not None else v) for n, v, dec in zip(names, row, decoders)}
+
+    def __iter__(self): return self.records()
+
+    @property
+    def version(self):
+        # Short content hash, used as a cache key for anything derived from this table.
+        # Computed once: tables are complete by the time anything asks for it.
+        if getattr(self, '_version', None) is None:
+            h = hashlib.blake2b(digest_size=8)
+            for name, _, dim in self.SCHEMA:
+                h.update(self.cols[name].tobytes())
+            for dim in sorted(self.dims):
+                h.update(repr(self.dims[dim].values).encode())
+            self._version = h.hexdigest()
+        return self._version
+
+    def __getstate__(self): return (self.dims, self.cols)
+    def __setstate__(self, state): self.dims, self.cols = state
+
+
+class MatchupTable(ColumnTable):
+    SCHEMA = (
+        ('Week', 'b', None), ('Team', 'h', 'team'), ('Score', 'd', None),
+        ('Opponent', 'h', 'team'), ('Opponent Score', 'd', None), ('Result', 'b', 'result'),
+    )
+
+    def add_game(self, week, n0, s0, n1, s1):
+        # One matchup produces a row from each team's perspective
+        self.append(week, n0, s0, n1, s1, 'W' if s0 > s1 else 'L' if s0 < s1 else 'T')
+        self.append(week, n1, s1, n0, s0, 'W' if s1 > s0 else 'L' if s1 < s0 else 'T')
+
+
+class PlayerWeekTable(ColumnTable):
+    SCHEMA = (
+        ('Player Key', 'i', 'player'), ('Week', 'b', None), ('Points', 'd', None),
+    )
+
+
+class VersionedDict(dict):
+    # A fetched mapping (e.g. draft results) that carries its content hash, so downstream
+    # cached calls can be keyed by the version instead of hashing the whole dict again
+    def __init__(self, data=(), version=None):
+        super().__init__(data)
+        self.version = version or hashlib.blake2b(repr(sorted(self.items())).encode(), digest_size=8).hexdigest()
@@ -0,0 +1,267 @@
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import threading
+import time
+from contextlib import contextmanager
+from cache import DiskCache, FORMAT, NEGATIVE_TTL, is_failure
+from records import SCHEMA_VERSION
+import tracing
+
+# --- PLUGGABLE RUNTIME HOOKS ---
+# The analytics code never imports streamlit. It asks this module for caching, progress
+# bars and secrets; the defaults are headless (in-process memo, silent progress, no
+# secrets) and the dashboard swaps in the Streamlit versions with use_streamlit().
+# cached(persist=True) results always go to the versioned DiskCache (see cache.py),
+# whichever backend is active.
+#
+# Persistent results are served stale-while-revalidate: a hit older than its fresh_for
+# window (or one stored as partial) is returned at once while a background thread
+# recomputes it. Each computation runs under a deadline; fetch loops check
+# time_left() and call mark_partial() when they stop early, so a partial result is
+# stored as such and replaced by the next refresh instead of being kept as complete.
+# Every cached call is a 'fetch' span in the load's API trace (tracing.py), noted as a
+# cache hit, stale hit or miss; background refreshes record traces of their own.
+
+LOAD_DEADLINE = float(os.getenv('FFL_LOAD_DEADLINE', '120'))  # seconds per dataset
+PARTIAL_RETRY = float(os.getenv('FFL_PARTIAL_RETRY', '60'))    # seconds between background retries of a still-partial result
+
+_local = threading.local()  # deadline / partial flag / background marker for the running computation
+
+def time_left():
+    # Seconds until the current computation's deadline (None = no deadline)
+    deadline = getattr(_local, 'deadline', None)
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+def mark_partial():
+    _local.partial = True
+
+def in_background():
+    return getattr(_local, 'background', False)
+
+def tracked(func, args, kwargs, seconds):
+    # Runs func under min(caller's deadline, now + seconds); returns (value, partial).
+    # A partial inner result makes every enclosing result partial too.
+    outer_deadline, outer_partial = getattr(_local, 'deadline', None), getattr(_local, 'partial', False)
+    deadlines = [d for d in (outer_deadline, time.monotonic() + seconds if seconds else None) if d is not None]
+    _local.deadline, _local.partial = (min(deadlines) if deadlines else None), False
+    partial = False
+    try:
+        value = func(*args, **kwargs)
+        partial = _local.partial
+        return value, partial
+    finally:
+        _local.deadline, _local.partial = outer_deadline, outer_partial or partial
+
+@contextmanager
+def background():
+    _local.background = True
+    try: yield
+    finally: _local.background = False
+
+class MemoryCache:
+    def __init__(self):
+        self.store, self.lock = {}, threading.Lock()
+
+    def wrap(self, func, persist):
+        sig = inspect.signature(func)
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (name, arg_key(sig, args, kwargs))
+            with self.lock:
+                if key in self.store: return self.store[key]
+            value = func(*args, **kwargs)
+            with self.lock: self.store[key] = value
+            return value
+
+        def clear():
+            with self.lock:
+                for k in [k for k in self.store if k[0] == name]: del self.store[k]
+        wrapper.clear = clear
+        return wrapper
+
+    def clear(self):
+        with self.lock: self.store.clear()
+
+
+class PersistentCache:
+    def __init__(self, disk):
+        self.disk = disk
+        self.refreshing, self.retry_at, self.lock = set(), {}, threading.Lock()
+
+    def wrap(self, func, version, fresh_for=None, deadline=LOAD_DEADLINE):
+        sig = inspect.signature(func)
+        name = func.__name__
+
+        def stale(meta):
+            stored_at, partial = meta
+            return partial or (fresh_for is not None and time.time() - stored_at > fresh_for)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = arg_key(sig, args, kwargs, (SCHEMA_VERSION, FORMAT, version))
+            hit, value, meta = self.disk.get(name, key, meta=True)
+            if hit and stale(meta):
+                # Inside a background refresh a stale input is refreshed inline, not served
+                if not in_background(): self.revalidate(name, key, lambda: tracked(func, args, kwargs, deadline), stale)
+                else: hit = False
+            if hit:
+                tracing.note(cache='stale' if stale(meta) else 'hit')
+                if meta[1]: mark_partial()
+                return value
+            # Single-flight: one caller computes, concurrent callers (any process) wait for it
+            with self.disk.single_flight(name, key):
+                hit, value, meta = self.disk.get(name, key, meta=True)
+                if hit and not (in_background() and stale(meta)):
+                    tracing.note(cache='waited')  # another caller computed it meanwhile
+                    if meta[1]: mark_partial()
+                    return value
+                tracing.note(cache='miss')
+                value, partial = tracked(func, args, kwargs, deadline)
+                self.disk.put(name, key, value, partial)
+            return value
+
+        def revalidate_if_stale(*args, **kwargs):
+            # as_of(), and starts the background refresh a stale hit would. For callers that
+            # skip the call itself while as_of() is unchanged (the dashboard's shared store).
+            key = arg_key(sig, args, kwargs, (SCHEMA_VERSION, FORMAT, version))
+            meta = self.disk.meta(name, key)
+            if meta is None: return None
+            if stale(meta) and not in_background(): self.revalidate(name, key, lambda: tracked(func, args, kwargs, deadline), stale)
+            return meta[0]
+
+        wrapper.clear = lambda: self.disk.clear(name)
+        wrapper.as_of = lambda *args, **kwargs: self.disk.stored_at(name, arg_key(sig, args, kwargs, (SCHEMA_VERSION, FORMAT, version)))
+        wrapper.revalidate_if_stale = revalidate_if_stale
+        return wrapper
+
+    def revalidate(self, name, key, compute, stale):
+        # At most one background refresh per entry per process; a failed one keeps the
+        # stale value and isn't retried for NEGATIVE_TTL
+        with self.lock:
+            if (name, key) in self.refreshing or self.retry_at.get((name, key), 0) > time.time(): return
+            self.refreshing.add((name, key))
+
+        def run():
+            try:
+                with tracing.load(f'Background refresh: {name}'), background(), self.disk.single_flight(name, key):
+                    hit, _, meta = self.disk.get(name, key, meta=True)
+                    if hit and not stale(meta): return  # refreshed meanwhile (another process)
+                    with tracing.span('fetch', name, cache='refresh'): value, partial = compute()
+                    if is_failure(value):
+                        with self.lock: self.retry_at[(name, key)] = time.time() + NEGATIVE_TTL
+                        return
+                    self.disk.put(name, key, value, partial)
+                    # Still partial (Yahoo keeps failing a partition): don't retry on every rerun
+                    if partial:
+                        with self.lock: self.retry_at[(name, key)] = time.time() + PARTIAL_RETRY
+            except Exception:
+                with self.lock: self.retry_at[(name, key)] = time.time() + NEGATIVE_TTL
+            finally:
+                with self.lock: self.refreshing.discard((name, key))
+        threading.Thread(target=run, name=f'revalidate-{name}', daemon=True).start()
+
+    def clear(self):
+        self.disk.clear()
+        with self.lock: self.retry_at.clear()
+
+
+class StreamlitCache:
+    def wrap(self, func, persist):
+        import streamlit as st
+        return st.cache_data(func)
+
+    def clear(self):
+        import streamlit as st
+        st.cache_data.clear()
+
+
+class NullProgress:
+    def progress(self, value, text=None): pass
+    def empty(self): pass
+
+
+def arg_key(sig, args, kwargs, version=None):
+    # Same convention as st.cache_data: parameters starting with "_" are not part of the key
+    bound = sig.bind(*args, **kwargs)
+    bound.apply_defaults()
+    hashed = {k: v for k, v in bound.arguments.items() if not k.startswith('_')}
+    return hashlib.md5(pickle.dumps((version, hashed), protocol=4)).hexdigest()
+
+
+_backend = MemoryCache()
+_persistent = PersistentCache(DiskCache())
+_progress_factory = lambda value=0, text=None: NullProgress()
+_secrets = {}
+
+def cached(persist=False, version=None, fresh_for=None, deadline=LOAD_DEADLINE):
+    # version: bump it (e.g. utils.PARSER_VERSION) when the result shape or parsing changes
+    # fresh_for: seconds a persistent result is served as is; after that it's served stale
+    # and refreshed in the background (None = until cleared)
+    def decorator(func):
+        state = {'impl': None, 'backend': None}
+
+        def impl():
+            backend = _persistent if persist else _backend
+            if state['backend'] is not backend:
+                state['impl'] = backend.wrap(func, version, fresh_for, deadline) if persist else backend.wrap(func, persist)
+                state['backend'] = backend
+            return state['impl']
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracing.span('fetch', func.__name__): return impl()(*args, **kwargs)
+        wrapper.clear = lambda: impl().clear()
+        # When the cached result was computed (epoch seconds), None if there is none yet
+        wrapper.as_of = lambda *args, **kwargs: getattr(impl(), 'as_of', lambda *a, **k: None)(*args, **kwargs)
+        # as_of(), refreshing a stale or partial result in the background (needs the full arguments)
+        wrapper.revalidate_if_stale = lambda *args, **kwargs: getattr(impl(), 'revalidate_if_stale', lambda *a, **k: None)(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def refreshing():
+    # Number of background refreshes in flight in this process
+    with _persistent.lock: return len(_persistent.refreshing)
+
+def clear_cache():
+    _backend.clear()
+    _persistent.clear()
+
+def get_state(name, default=None):
+    return _persistent.disk.get_state(name, default)
+
+def put_state(name, value):
+    _persistent.disk.put_state(name, value)
+
+def state_path(name):
+    # Directory next to the named state, for state kept as plain files (e.g. mmap arrays)
+    return os.path.join(_persistent.disk.path, name)
+
+def progress(value=0, text=None):
+    # Background refreshes have no page to draw on
+    if in_background(): return NullProgress()
+    return _progress_factory(value, text=text)
+
+def get_secret(section, key):
+    try:
+        if section in _secrets: return _secrets[section][key]
+    except Exception:
+        pass
+    return None
+
+def configure(cache=None, progress_factory=None, secrets=None, disk=None):
+    global _backend, _persistent, _progress_factory, _secrets
+    if cache is not None: _backend = cache
+    if disk is not None: _persistent = PersistentCache(disk)
+    if progress_factory is not None: _progress_factory = progress_factory
+    if secrets is not None: _secrets = secrets
+
+def use_streamlit():
+    # Called on every rerun, so only install the backend once
+    import streamlit as st
+    if not isinstance(_backend, StreamlitCache):
+        configure(cache=StreamlitCache(), progress_factory=st.progress, secrets=st.secrets)
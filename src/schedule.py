@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+from parallel import run_sharded
+
+# --- STRENGTH OF SCHEDULE ---
+# Everything works on two teams x weeks matrices built from the weekly history:
+#   scores[t, w]  points team t scored in week w (NaN = no game)
+#   opp[t, w]     index of t's opponent in week w (-1 = no game)
+# A "schedule" is a row of opp. Swapping schedules or relabeling teams is then just
+# fancy indexing, so the full teams x teams swap and 100k random seasons are a few
+# array operations instead of Python loops over games. The random seasons are
+# simulated in chunks spread over every core.
+
+SIMULATIONS = 100_000
+CHUNK = 10_000  # seasons per batch; bounds memory to CHUNK x teams x weeks
+
+def build_matrices(df_history):
+    # df_history: one row per team per game with Week, Team, Opponent, Score
+    df = df_history[['Week', 'Team', 'Opponent', 'Score']]
+    teams = sorted(set(df['Team'].astype(str)) | set(df['Opponent'].astype(str)))
+    weeks = sorted(df['Week'].unique())
+    t_idx = {t: i for i, t in enumerate(teams)}
+    w_idx = {w: i for i, w in enumerate(weeks)}
+    rows = df['Team'].astype(str).map(t_idx).to_numpy()
+    cols = df['Week'].map(w_idx).to_numpy()
+    scores = np.full((len(teams), len(weeks)), np.nan)
+    opp = np.full((len(teams), len(weeks)), -1, dtype=np.int64)
+    scores[rows, cols] = df['Score'].to_numpy(dtype=float)
+    opp[rows, cols] = df['Opponent'].astype(str).map(t_idx).to_numpy()
+    return teams, weeks, scores, opp
+
+def _wins(own, scores, opp_team):
+    # own: each team's scores, broadcastable to opp_team (..., weeks), the opponent
+    # per team-week under some schedule
+    w = np.arange(scores.shape[1])
+    played = opp_team >= 0
+    opp_scores = scores[np.where(played, opp_team, 0), w]
+    return ((own > opp_scores) & played).sum(axis=-1)
+
+def schedule_swap(scores, opp):
+    # wins[i, j] = team i's wins had it played team j's schedule. Where j's schedule
+    # meets i itself, i plays j instead (the usual convention). Diagonal = actual record.
+    n = len(scores)
+    i = np.arange(n)[:, None, None]
+    j = np.arange(n)[None, :, None]
+    theirs = np.broadcast_to(opp[None, :, :], (n, n, opp.shape[1]))
+    return _wins(scores[:, None, :], scores, np.where(theirs == i, j, theirs))
+
+def random_schedules(scores, opp, n=SIMULATIONS, seed=0, chunk=CHUNK, workers=None):
+    # Random valid seasons: relabel which team plays which slot of the real schedule.
+    # Every matchup constraint the league had (pairs, byes, rematches) still holds.
+    # Each chunk is a shard with its own seed, run across processes (parallel.py) and
+    # written straight into the shared wins array. Returns wins per season: (n, teams)
+    shards = [(start, min(chunk, n - start), seed, i) for i, start in enumerate(range(0, n, chunk))]
+    _, out = run_sharded(_simulate, shards, {'scores': scores, 'opp': opp}, {'wins': ((n, len(scores)), np.int16)}, workers)
+    return out['wins']
+
+def _simulate(shard, arrays):
+    start, k, seed, i = shard
+    scores, opp = arrays['scores'], arrays['opp']
+    rng = np.random.default_rng([seed, i])
+    t = len(scores)
+    slot_of = rng.random((k, t)).argsort(axis=1)            # team -> schedule slot
+    team_in = slot_of.argsort(axis=1)                       # slot -> team
+    opp_slot = opp[slot_of]                                 # (k, teams, weeks)
+    sims = np.arange(k)[:, None, None]
+    opp_team = np.where(opp_slot >= 0, team_in[sims, np.maximum(opp_slot, 0)], -1)
+    arrays['wins'][start:start + k] = _wins(scores[None], scores, opp_team)
+
+def playoff_odds(wins, points_for, spots):
+    # Share of seasons each team finishes in the top `spots` (wins, then points for)
+    t = wins.shape[1]
+    pf_rank = np.argsort(np.argsort(points_for))            # points for never depends on the schedule
+    key = wins * t + pf_rank
+    place = (-key).argsort(axis=1).argsort(axis=1)
+    return (place < spots).mean(axis=0)
+
+def sos_summary(teams, scores, opp, swap, sims, spots):
+    actual = np.diag(swap)
+    pf = np.nansum(scores, axis=1)
+    played = opp >= 0
+    opp_scores = np.where(played, scores[np.maximum(opp, 0), np.arange(opp.shape[1])], np.nan)
+    df = pd.DataFrame({
+        'Team': teams,
+        'Actual W': actual,
+        'Expected W': sims.mean(axis=0),
+        'Schedule Luck': actual - sims.mean(axis=0),
+        'Best Schedule W': swap.max(axis=1),
+        'Worst Schedule W': swap.min(axis=1),
+        'W 10th pct': np.percentile(sims, 10, axis=0),
+        'W 90th pct': np.percentile(sims, 90, axis=0),
+        'Playoff %': playoff_odds(sims, pf, spots) * 100,
+        'Opp PPG': np.nanmean(opp_scores, axis=1),
+    })
+    return df.sort_values('Schedule Luck', ascending=False).reset_index(drop=True)
+
+def win_distribution(teams, sims):
+    # Long table of P(wins = k) per team, for charts
+    counts = np.stack([np.bincount(sims[:, i], minlength=int(sims.max()) + 1) for i in range(sims.shape[1])])
+    wins = np.arange(counts.shape[1])
+    return pd.DataFrame({
+        'Team': np.repeat(teams, len(wins)),
+        'Wins': np.tile(wins, len(teams)),
+        'Share': (counts / len(sims)).ravel(),
+    })
+
+def build_schedule_tables(df_history, n=SIMULATIONS, seed=0):
+    # Everything the page needs except playoff odds, which depend on the spots slider
+    teams, weeks, scores, opp = build_matrices(df_history)
+    swap = schedule_swap(scores, opp)
+    sims = random_schedules(scores, opp, n, seed)
+    return {'teams': teams, 'scores': scores, 'opp': opp, 'swap': swap, 'sims': sims}
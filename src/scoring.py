@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+# --- SCORING WHAT-IF ---
+# Re-scores the season under other scoring rules from the raw stat lines stored in the
+# player x week matrix (matrix.py). A rule set is {stat_id: points per unit}, overriding
+# the league's own modifiers. Every rule set, player and week is re-scored in one matrix
+# multiply on the difference to the league's rules:
+#   points[r, p, w] = actual[p, w] + stats[p, w, :] @ (rules[r] - league)
+# so anything the modifiers don't describe (Yahoo bonuses, rounding) stays as Yahoo
+# scored it. Team scores, optimal lineups, standings and all-play records are then
+# segment sums over (rule set, team, week) groups, with no Python loop over players.
+
+# Overrides of the league's modifiers, by Yahoo NFL stat id (5 = passing TD, 11 = reception)
+PRESETS = {
+    'PPR': {'11': 1.0},
+    'Half PPR': {'11': 0.5},
+    'Standard': {'11': 0.0},
+    '6-pt Passing TD': {'5': 6.0},
+    '4-pt Passing TD': {'5': 4.0},
+}
+BASELINE = 'League'
+
+def rule_deltas(stat_ids, league, rule_sets):
+    # (rules, stats): points per unit each rule set adds on top of the league's modifiers
+    base = np.array([league.get(s, 0.0) for s in stat_ids], dtype=np.float32)
+    rules = np.array([[r.get(s, league.get(s, 0.0)) for s in stat_ids] for r in rule_sets], dtype=np.float32)
+    return rules.reshape(len(rule_sets), len(stat_ids)) - base
+
+def rescore(matrix, deltas):
+    # points[r, p, w] under each rule set (0 where the player wasn't rostered)
+    actual = np.nan_to_num(np.asarray(matrix.actual, dtype=np.float64))
+    return actual[None] + np.moveaxis(np.asarray(matrix.stats, dtype=np.float64) @ deltas.T.astype(np.float64), -1, 0)
+
+def _segment_sum(points, mask, group, n_groups):
+    # Sums points[r][mask] into group ids (r, group) -> (rules, n_groups)
+    r = points.shape[0]
+    ids = (np.arange(r)[:, None] * n_groups + group[mask][None]).ravel()
+    return np.bincount(ids, points[:, mask].ravel(), minlength=r * n_groups).reshape(r, n_groups)
+
+def _top_k_sum(points, mask, group, n_groups, k):
+    # Per (rule set, group): sum of the k best points among the masked entries
+    r = points.shape[0]
+    if k <= 0 or not mask.any(): return np.zeros((r, n_groups))
+    ids = (np.arange(r)[:, None] * n_groups + group[mask][None]).ravel()
+    pts = points[:, mask].ravel()
+    order = np.lexsort((-pts, ids))
+    ids, pts = ids[order], pts[order]
+    rank = np.arange(len(ids)) - np.searchsorted(ids, ids, side='left')
+    keep = rank < k
+    return np.bincount(ids[keep], pts[keep], minlength=r * n_groups).reshape(r, n_groups)
+
+def team_scores(matrix, points, slots):
+    # (actual, optimal) points per (rule set, team, week). Actual = the lineup each
+    # manager started; optimal = best `slots` lineup ((position, count), ...) from the
+    # roster that week, as in utils.optimal_lineup.
+    t, w = len(matrix.team_keys), matrix.weeks
+    team = np.asarray(matrix.team).astype(np.int64)
+    group = team * w + np.arange(w)[None, :]
+    actual = _segment_sum(points, matrix.started, group, t * w)
+    available = matrix.available
+    positions = np.array(matrix.positions, dtype=object)[:, None]
+    optimal = np.zeros_like(actual)
+    for pos, count in slots: optimal += _top_k_sum(points, available & (positions == pos), group, t * w, count)
+    r = points.shape[0]
+    return actual.reshape(r, t, w), optimal.reshape(r, t, w)
+
+def opponents(matrix, df_history):
+    # opp[t, w]: index of team t's opponent in week w (-1 = no game), from the weekly scores
+    code = {name: i for i, name in enumerate(matrix.team_names)}
+    opp = np.full((len(matrix.team_names), matrix.weeks), -1, dtype=np.int64)
+    df = df_history[df_history['Week'].between(1, matrix.weeks)]
+    t = df['Team'].astype(str).map(code)
+    o = df['Opponent'].astype(str).map(code)
+    ok = t.notna() & o.notna()
+    opp[t[ok].astype(int).to_numpy(), df['Week'][ok].to_numpy() - 1] = o[ok].astype(int).to_numpy()
+    return opp
+
+def season_tables(matrix, df_history, league, rule_sets, slots):
+    # One row per (rule set, team): record, points, optimal wins, all-play and luck under those rules
+    names = list(rule_sets)
+    points = rescore(matrix, rule_deltas(matrix.stat_ids, league, list(rule_sets.values())))
+    actual, optimal = team_scores(matrix, points, slots)
+    opp = opponents(matrix, df_history)
+    played = opp >= 0
+    wk = np.arange(opp.shape[1])[None, :]
+    opp_actual = actual[:, np.maximum(opp, 0), wk]
+    opp_optimal = optimal[:, np.maximum(opp, 0), wk]
+    wins = ((actual > opp_actual) & played).sum(axis=2)
+    losses = ((actual < opp_actual) & played).sum(axis=2)
+    ties = ((actual == opp_actual) & played).sum(axis=2)
+    # All-play: every team that played that week, against every other one
+    scores = np.where(played[None], actual, np.nan)
+    ap_wins = ((scores[:, :, None, :] > scores[:, None, :, :]) & played[None, None]).sum(axis=(2, 3))
+    ap_losses = ((scores[:, :, None, :] < scores[:, None, :, :]) & played[None, None]).sum(axis=(2, 3))
+    games = np.maximum(wins + losses + ties, 1)
+    ap_games = np.maximum(ap_wins + ap_losses, 1)
+    pf = np.where(played[None], actual, 0).sum(axis=2)
+    max_pf = np.where(played[None], optimal, 0).sum(axis=2)
+    r, t = wins.shape
+    df = pd.DataFrame({
+        'Rules': np.repeat(names, t), 'Team': np.tile(matrix.team_names, r),
+        'W': wins.ravel(), 'L': losses.ravel(), 'T': ties.ravel(),
+        'PF': pf.ravel().round(2), 'Max PF': max_pf.ravel().round(2),
+        'Optimal W': ((optimal > opp_optimal) & played).sum(axis=2).ravel(),
+        'All-Play W': ap_wins.ravel(), 'All-Play L': ap_losses.ravel(),
+        'Luck': (wins / games - ap_wins / ap_games).ravel(),
+    })
+    df = df[played.any(axis=1).tolist() * r].reset_index(drop=True)
+    # Standings order: wins, then points for
+    df['Rank'] = df.sort_values(['Rules', 'W', 'PF'], ascending=[True, False, False]).groupby('Rules', sort=False).cumcount().reindex(df.index) + 1
+    if BASELINE in rule_sets:
+        base = df[df['Rules'] == BASELINE].set_index('Team')['Rank']
+        df['Rank Δ'] = df['Team'].map(base) - df['Rank']
+    return df
+
+def player_points(matrix, league, rule_sets, n=25):
+    # Season points per player under each rule set, for the n best under the first one
+    points = rescore(matrix, rule_deltas(matrix.stat_ids, league, list(rule_sets.values())))
+    rostered = np.asarray(matrix.team) >= 0
+    totals = np.where(rostered[None], points, 0).sum(axis=2)
+    top = np.argsort(-totals[0], kind='stable')[:n]
+    df = pd.DataFrame({name: totals[i, top].round(2) for i, name in enumerate(rule_sets)})
+    df.insert(0, 'Position', np.array(matrix.positions, dtype=object)[top])
+    df.insert(0, 'Player', np.array(matrix.names, dtype=object)[top])
+    return df
@@ -0,0 +1,87 @@
+import hashlib
+import pickle
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+import pandas as pd
+
+# --- SHARED DATASET STORE ---
+# One copy of each loaded dataset per process, shared by every session. Sessions keep
+# only a small Handle in st.session_state and look the data up here on each rerun.
+# With pandas copy-on-write on (the dashboard turns it on in app.py), every DataFrame
+# filter/assignment on a view is private, so a page can never change what another
+# viewer sees; plain dicts/lists are frozen into read-only mappings and tuples.
+
+Handle = namedtuple('Handle', 'name key version')
+
+def freeze(value):
+    if isinstance(value, dict): return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list): return tuple(freeze(v) for v in value)
+    return value
+
+def thaw(value):
+    # Plain, picklable copy of a frozen value (e.g. to pass into a cached fetcher)
+    if isinstance(value, MappingProxyType): return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple): return [thaw(v) for v in value]
+    return value
+
+def session_view(value):
+    if isinstance(value, pd.DataFrame): return value.copy(deep=False)
+    if isinstance(value, tuple): return tuple(session_view(v) for v in value)
+    if isinstance(value, MappingProxyType): return MappingProxyType({k: session_view(v) for k, v in value.items()})
+    return value
+
+def content_version(value):
+    try: return hashlib.blake2b(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), digest_size=8).hexdigest()
+    except Exception: return hex(id(value))
+
+class DatasetStore:
+    def __init__(self):
+        self.entries, self.lock = {}, threading.Lock()  # (name, key) -> (Handle, value)
+
+    def key_for(self, key_parts):
+        # key_parts: small identifiers (week, versions...), never the data itself
+        return hashlib.md5(pickle.dumps(key_parts, protocol=4)).hexdigest()
+
+    def load(self, name, key_parts, loader):
+        key = self.key_for(key_parts)
+        with self.lock:
+            entry = self.entries.get((name, key))
+        if entry: return entry[0]
+        value = loader()
+        handle = Handle(name, key, value.version if hasattr(value, 'version') else content_version(value))
+        with self.lock:
+            # If another session loaded it meanwhile, keep the first copy
+            entry = self.entries.setdefault((name, key), (handle, freeze(value)))
+            # Older versions of this dataset are unreachable now (sessions re-resolve by key)
+            for k in [k for k in self.entries if k[0] == name and k[1] != key]: del self.entries[k]
+        return entry[0]
+
+    def rekey(self, handle, key_parts):
+        # Files a loaded entry under new key parts, same value and version
+        key = self.key_for(key_parts)
+        if key == handle.key: return handle
+        with self.lock:
+            entry = self.entries.pop((handle.name, handle.key), None)
+            if entry is None: return handle
+            entry = self.entries.setdefault((handle.name, key), (handle._replace(key=key), entry[1]))
+        return entry[0]
+
+    def get(self, handle):
+        entry = self.entries.get((handle.name, handle.key)) if handle else None
+        return entry[1] if entry else None
+
+    def view(self, handle):
+        # Per-session view: shallow DataFrame copies (copy-on-write), so adding a column
+        # or filtering on a page never touches the shared object
+        return session_view(self.get(handle))
+
+    def drop(self, name):
+        with self.lock:
+            for k in [k for k in self.entries if k[0] == name]: del self.entries[k]
+
+    def clear(self):
+        with self.lock: self.entries.clear()
+
+# Module level, so it lives for the whole Streamlit server process
+STORE = DatasetStore()
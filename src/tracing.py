@@ -0,0 +1,178 @@
+import os
+import re
+import glob
+import json
+import time
+import uuid
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from urllib.parse import urlsplit, parse_qsl
+import pandas as pd
+from cache import CACHE_DIR
+
+# --- API CALL TRACES ---
+# Each dashboard load (one run of the page script) and each background refresh records a
+# trace: a tree of spans with start/end times relative to the start of the load,
+#   load (page) > fetch_* (cached function: hit, stale or computed) > Yahoo request
+# Request spans also carry endpoint, params, status, bytes, retries, and whether the same
+# URL was already requested in this trace. A finished trace is written as one JSON file
+# under TRACE_DIR (the newest TRACE_KEEP are kept) and drawn as a waterfall on the API
+# Trace page, so serial request chains and repeated fetches stand out.
+# Tracing is opt-in (it writes a file per rerun): set FFL_TRACE_KEEP, e.g. to 50.
+# The open span lives in a context variable; worker threads pick it up through carry().
+
+TRACE_DIR = os.getenv('FFL_TRACE_DIR', os.path.join(CACHE_DIR, 'traces'))
+TRACE_KEEP = int(os.getenv('FFL_TRACE_KEEP', '0'))  # 0 = tracing off
+
+_current = contextvars.ContextVar('ffl_trace', default=None)  # (Trace, open span id or None)
+
+class Trace:
+    def __init__(self, name):
+        self.id, self.name, self.started = uuid.uuid4().hex[:12], name, time.time()
+        self.t0 = time.perf_counter()
+        self.spans, self.urls, self.lock = [], set(), threading.Lock()
+
+    def open(self, kind, name, parent, fields):
+        span = {'kind': kind, 'name': name, 'parent': parent, 'start': time.perf_counter() - self.t0, 'end': None,
+                'thread': threading.current_thread().name, **fields}
+        with self.lock:
+            span['id'] = len(self.spans)
+            if kind == 'request':
+                span['duplicate'] = span['url'] in self.urls
+                self.urls.add(span['url'])
+            self.spans.append(span)
+        return span
+
+    def close(self, span):
+        span['end'] = time.perf_counter() - self.t0
+
+    def save(self):
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        end = time.perf_counter() - self.t0
+        with self.lock: spans = [{**s, 'end': end if s['end'] is None else s['end']} for s in self.spans]
+        doc = {'id': self.id, 'name': self.name, 'started': self.started, 'duration': end, 'spans': spans}
+        path = os.path.join(TRACE_DIR, f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))}-{self.id}.json")
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f: json.dump(doc, f, default=str)
+        os.replace(tmp, path)
+        for old in sorted(glob.glob(os.path.join(TRACE_DIR, '*.json')))[:-TRACE_KEEP]:
+            try: os.remove(old)
+            except OSError: pass
+
+# --- RECORDING ---
+def begin(name):
+    # Starts the trace for this load (the dashboard calls it once per script run)
+    if TRACE_KEEP <= 0: return None
+    trace = Trace(name)
+    _current.set((trace, None))
+    return trace
+
+def end():
+    # Writes this load's trace; a run cut short by st.rerun() never gets here and is dropped
+    current = _current.get()
+    if current is None: return
+    _current.set(None)
+    try: current[0].save()
+    except OSError: pass  # tracing must never break a page
+
+@contextmanager
+def load(name):
+    # begin()/end() around a block, for code with its own entry point (background refreshes)
+    token = _current.set(None)
+    begin(name)
+    try: yield
+    finally:
+        end()
+        _current.reset(token)
+
+@contextmanager
+def span(kind, name, **fields):
+    current = _current.get()
+    if current is None:
+        yield None
+        return
+    trace, parent = current
+    s = trace.open(kind, name, parent, fields)
+    token = _current.set((trace, s['id']))
+    try: yield s
+    finally:
+        _current.reset(token)
+        trace.close(s)
+
+def note(**fields):
+    # Adds fields to the innermost open span (e.g. cache='hit')
+    current = _current.get()
+    if current is None or current[1] is None: return
+    trace, span_id = current
+    with trace.lock: trace.spans[span_id].update(fields)
+
+def carry(fn):
+    # fn bound to the caller's open span, for submitting to a worker thread
+    return functools.partial(contextvars.copy_context().run, fn)
+
+_KEY = re.compile(r'^\d+(\.[a-z]+\.\d+)*$|^nfl$')  # game, league, team and player keys
+
+def endpoint(url):
+    # '/league/{key}/scoreboard' and its params ({'week': '3'}), keys and matrix params split out
+    parts = urlsplit(url)
+    path, params = [], {}
+    for segment in parts.path.split('/'):
+        name, *matrix = segment.split(';')
+        path.append('{key}' if _KEY.match(name) else name)
+        params.update(m.split('=', 1) for m in matrix if '=' in m)
+    params.update((k, v) for k, v in parse_qsl(parts.query) if k != 'format')
+    return '/'.join(path).split('/fantasy/v2', 1)[-1], params
+
+def request(method, url, send):
+    # Runs send() (the HTTP call) as a request span and returns its response
+    path, params = endpoint(url)
+    with span('request', path, method=method, url=url, params=params) as s:
+        try: response = send()
+        except Exception as e:
+            if s is not None: s['error'] = type(e).__name__
+            raise
+        if s is not None:
+            retries = getattr(getattr(getattr(response, 'raw', None), 'retries', None), 'history', None) or ()
+            s.update(status=response.status_code, bytes=len(response.content or b''), retries=len(retries))
+        return response
+
+# --- READING ---
+_summaries = {}  # path -> (mtime, summary); a trace file is written once, so each is parsed once
+
+def list_traces():
+    # Newest first: [{'path', 'id', 'name', 'started', 'duration', 'requests'}]
+    global _summaries
+    out, seen = [], {}
+    for path in sorted(glob.glob(os.path.join(TRACE_DIR, '*.json')), reverse=True):
+        try: mtime = os.stat(path).st_mtime
+        except OSError: continue
+        summary = _summaries.get(path)
+        if summary is None or summary[0] != mtime:
+            try:
+                with open(path) as f: doc = json.load(f)
+            except (OSError, ValueError): continue
+            summary = (mtime, {'path': path, 'id': doc['id'], 'name': doc['name'], 'started': doc['started'], 'duration': doc['duration'],
+                               'requests': sum(s['kind'] == 'request' for s in doc['spans'])})
+        seen[path] = summary
+        out.append(summary[1])
+    _summaries = seen  # rotated-out traces drop out
+    return out
+
+def read_trace(path):
+    with open(path) as f: return json.load(f)
+
+def waterfall(doc):
+    # One row per span in start order, children indented under their parent
+    spans = doc['spans']
+    depth = {}
+    for s in spans: depth[s['id']] = 0 if s['parent'] is None else depth.get(s['parent'], 0) + 1
+    df = pd.DataFrame([{
+        'Order': s['id'], 'Span': '\u00a0' * 3 * depth[s['id']] + s['name'], 'Kind': s['kind'],
+        'Start ms': s['start'] * 1000, 'End ms': s['end'] * 1000, 'ms': (s['end'] - s['start']) * 1000,
+        'Cache': s.get('cache', ''), 'Status': str(s.get('status', s.get('error', ''))), 'Bytes': s.get('bytes'),
+        'Retries': s.get('retries'), 'Duplicate': s.get('duplicate', False), 'Params': json.dumps(s.get('params')) if s.get('params') else '',
+        'Thread': s['thread'],
+    } for s in spans], columns=['Order', 'Span', 'Kind', 'Start ms', 'End ms', 'ms', 'Cache', 'Status', 'Bytes', 'Retries', 'Duplicate', 'Params', 'Thread'])
+    return df.sort_values(['Start ms', 'Order'], ignore_index=True)
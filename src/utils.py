@@ -1,10 +1,21 @@
 import os
 import json
 import time
-import streamlit as st
+import functools
+import threading
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 import pandas as pd
 from requests_oauthlib import OAuth2Session
 from dotenv import load_dotenv
+from records import MatchupTable, PlayerWeekTable, VersionedDict
+from runtime import cached, progress, get_secret, get_state, put_state, state_path, time_left, mark_partial
+from pipeline import Graph, Rule, digest
+from matrix import build_arrays, open_matrix, write_matrix
+from war import player_week_table, war_rows, DEFAULT_BASELINE
+from projections import week_cells, combine, season_summary
+import tracing
 
 # Load environment variables
 load_dotenv()
@@ -12,12 +23,35 @@ load_dotenv()
 CLIENT_ID = os.getenv('YAHOO_CLIENT_ID')
 CLIENT_SECRET = os.getenv('YAHOO_CLIENT_SECRET')
 LEAGUE_ID = os.getenv('YAHOO_LEAGUE_ID')
+# Point at a local replay server (scripts/replay_server.py) for offline runs and load tests
+YAHOO_API = 'https://fantasysports.yahooapis.com/fantasy/v2'
+API_BASE = os.getenv('YAHOO_API_BASE', YAHOO_API).rstrip('/')
+
+# Bump when the way a Yahoo payload is parsed changes; old cache entries are then ignored
+PARSER_VERSION = 5
+
+# (connect, read) seconds for every Yahoo request; a hung connection fails instead of stalling the page
+REQUEST_TIMEOUT = (float(os.getenv('FFL_CONNECT_TIMEOUT', '5')), float(os.getenv('FFL_READ_TIMEOUT', '20')))
+
+# Freshness windows (seconds). Older results are served immediately and refreshed in the
+# background (stale-while-revalidate, see runtime.py); the dashboard shows their "as of" time.
+FRESH_LIVE = int(os.getenv('FFL_FRESH_LIVE', '900'))        # standings, transactions, current week
+FRESH_WEEKLY = int(os.getenv('FFL_FRESH_WEEKLY', '3600'))   # weekly scores/rosters and everything built on them
+FRESH_SEASON = int(os.getenv('FFL_FRESH_SEASON', '86400'))  # draft, team names
+FRESH_SETTINGS = int(os.getenv('FFL_FRESH_SETTINGS', '604800'))  # roster positions and scoring, fixed once the season starts
+
+class YahooSession(OAuth2Session):
+    def request(self, method, url, *args, **kwargs):
+        # Every call (token refreshes included) is a span in the current load's trace (tracing.py)
+        kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+        return tracing.request(method, url, functools.partial(super().request, method, url, *args, **kwargs))
 
 def get_yahoo_session():
     token = None
     try:
-        if "yahoo_token" in st.secrets:
-            token = json.loads(st.secrets["yahoo_token"]["token_json"])
+        token_json = get_secret("yahoo_token", "token_json")
+        if token_json:
+            token = json.loads(token_json)
     except Exception:
         pass
     if not token and os.path.exists('yahoo_token.json'):
@@ -33,15 +67,15 @@ def get_yahoo_session():
                 json.dump(new_token, f)
 
     extra = {'client_id': CLIENT_ID, 'client_secret': CLIENT_SECRET}
-    return OAuth2Session(CLIENT_ID, token=token, auto_refresh_url='https://api.login.yahoo.com/oauth2/get_token', auto_refresh_kwargs=extra, token_updater=token_updater)
+    return YahooSession(CLIENT_ID, token=token, auto_refresh_url='https://api.login.yahoo.com/oauth2/get_token', auto_refresh_kwargs=extra, token_updater=token_updater)
 
-# --- CACHING UPDATE: persist="disk" saves to local file so it survives restarts ---
+# --- CACHING: persist=True saves to a versioned, size-capped disk cache so it survives restarts (see cache.py) ---
 
-@st.cache_data(persist="disk")
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_LIVE)
 def fetch_standings():
     yahoo = get_yahoo_session()
     if not yahoo: return []
-    url = f'https://fantasysports.yahooapis.com/fantasy/v2/league/{LEAGUE_ID}/standings?format=json'
+    url = f'{API_BASE}/league/{LEAGUE_ID}/standings?format=json'
     try:
         response = yahoo.get(url)
         if response.status_code != 200: return []
@@ -72,36 +106,16 @@ def fetch_standings():
         return parsed_teams
     except Exception: return []
 
-@st.cache_data(persist="disk")
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_WEEKLY)
 def fetch_all_weekly_scores(current_week):
-    yahoo = get_yahoo_session()
-    if not yahoo: return []
-    all_matchups = []
-    for week in range(1, current_week + 1):
-        url = f'https://fantasysports.yahooapis.com/fantasy/v2/league/{LEAGUE_ID}/scoreboard;week={week}?format=json'
-        try:
-            r = yahoo.get(url)
-            if r.status_code == 200:
-                data = r.json()
-                matchups = data['fantasy_content']['league'][1]['scoreboard']['0']['matchups']
-                for i in range(matchups['count']):
-                    m = matchups[str(i)]['matchup']['0']['teams']
-                    t0, t1 = m['0']['team'], m['1']['team']
-                    s0, n0 = float(t0[1]['team_points']['total']), t0[0][2]['name']
-                    s1, n1 = float(t1[1]['team_points']['total']), t1[0][2]['name']
-                    all_matchups.append({'Week': week, 'Team': n0, 'Score': s0, 'Opponent': n1, 'Opponent Score': s1, 'Result': 'W' if s0>s1 else 'L' if s0<s1 else 'T'})
-                    all_matchups.append({'Week': week, 'Team': n1, 'Score': s1, 'Opponent': n0, 'Opponent Score': s0, 'Result': 'W' if s1>s0 else 'L' if s1<s0 else 'T'})
-        except: continue
-    return all_matchups
+    # Rolled up from the stored scoreboard partitions (see RECOMPUTE DAG)
+    return season_result('history', current_week, MatchupTable())
 
-@st.cache_data(persist="disk")
-def get_current_week():
-    yahoo = get_yahoo_session()
-    if not yahoo: return 1
-    try:
-        url = f'https://fantasysports.yahooapis.com/fantasy/v2/league/{LEAGUE_ID}?format=json'
-        return int(yahoo.get(url).json()['fantasy_content']['league'][0]['current_week'])
-    except: return 1
+def season_history(key, inputs):
+    all_matchups = MatchupTable()
+    for (_, week), games in inputs.items():
+        for n0, s0, n1, s1 in games: all_matchups.add_game(week, n0, s0, n1, s1)
+    return all_matchups
 
 def find_key_recursive(data, target_key):
     if isinstance(data, dict):
@@ -115,118 +129,281 @@ def find_key_recursive(data, target_key):
             if result is not None: return result
     return None
 
-# --- MANAGER EFFICIENCY & OPTIMIZATION ---
-@st.cache_data(persist="disk")
-def fetch_manager_efficiency(current_week, team_list):
+# --- LEAGUE METADATA ---
+# Small lookups every analysis shares, each cached on its own freshness tier:
+#   league info (current week)        FRESH_LIVE      the week rolls over mid-session
+#   teams (team_key -> name)          FRESH_SEASON    managers rarely rename
+#   settings (roster slots, scoring)  FRESH_SETTINGS  fixed once the season starts
+# Failures return an empty value, so they're retried after NEGATIVE_TTL instead of being kept.
+
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_LIVE)
+def fetch_league_info():
     yahoo = get_yahoo_session()
-    if not yahoo: return []
-    efficiency_data = []
-    
-    url_keys = f'https://fantasysports.yahooapis.com/fantasy/v2/league/{LEAGUE_ID}/teams?format=json'
+    if not yahoo: return {}
     try:
-        r = yahoo.get(url_keys)
-        if r.status_code != 200: return []
-        team_map = {} 
-        teams_data = r.json()['fantasy_content']['league'][1]['teams']
-        for i in range(teams_data['count']):
-            t = teams_data[str(i)]['team']
-            team_map[t[0][0]['team_key']] = t[0][2]['name']
-    except Exception: return []
+        r = yahoo.get(f'{API_BASE}/league/{LEAGUE_ID}?format=json')
+        if r.status_code != 200: return {}
+        meta = r.json()['fantasy_content']['league'][0]
+        info = {'name': meta.get('name', ''), 'season': str(meta.get('season', '')), 'current_week': int(meta['current_week']), 'is_finished': bool(int(meta.get('is_finished') or 0))}
+        for k in ('start_week', 'end_week'):
+            if meta.get(k): info[k] = int(meta[k])
+        return info
+    except Exception: return {}
+
+def get_current_week():
+    return fetch_league_info().get('current_week', 1)
 
-    my_bar = st.progress(0, text="Calculating Best Lineups...")
-    total_steps = (current_week) * len(team_map)
-    step_count = 0
-
-    for week in range(1, current_week + 1):
-        for team_key, team_name in team_map.items():
-            step_count += 1
-            my_bar.progress(min(step_count / total_steps, 0.99), text=f"Analyzing Week {week}: {team_name}")
-            time.sleep(0.05) 
-            
-            url_roster = f'https://fantasysports.yahooapis.com/fantasy/v2/team/{team_key}/roster;week={week}/players/stats?format=json'
-            try:
-                rr = yahoo.get(url_roster)
-                if rr.status_code != 200: continue
-                roster = rr.json()['fantasy_content']['team'][1]['roster']['0']['players']
-                
-                all_players = [] 
-                actual_lineup = [] 
-                
-                for idx in range(roster['count']):
-                    p_data = roster[str(idx)]['player']
-                    p_key = p_data[0][0]['player_key']
-                    name = p_data[0][2]['name']['full']
-                    points_obj = find_key_recursive(p_data, 'player_points')
-                    points = float(points_obj['total']) if points_obj else 0.0
-                    selected_pos = find_key_recursive(p_data, 'selected_position')
-                    slot = selected_pos[1]['position']
-                    if slot in ['IR', 'IR+', 'Out', 'RES']: continue
-                    is_starter = slot != 'BN'
-                    display_pos = find_key_recursive(p_data, 'display_position')
-                    player_obj = {'name': name, 'key': p_key, 'points': points, 'pos': display_pos, 'is_starter': is_starter, 'played_slot': slot}
-                    all_players.append(player_obj)
-                    if is_starter: actual_lineup.append(player_obj)
-
-                all_players.sort(key=lambda x: x['points'], reverse=True)
-                used_indices, optimal_lineup = set(), []
-                def pick_best(pos_list, count, label):
-                    picked = 0
-                    for i, p in enumerate(all_players):
-                        if i in used_indices: continue
-                        if picked >= count: break
-                        if p['pos'] in pos_list:
-                            used_indices.add(i)
-                            p_copy = p.copy()
-                            p_copy['optimal_slot'] = label
-                            optimal_lineup.append(p_copy)
-                            picked += 1
-                
-                pick_best(['QB'], 1, 'QB')
-                pick_best(['WR'], 3, 'WR')
-                pick_best(['RB'], 2, 'RB')
-                pick_best(['TE'], 1, 'TE')
-                pick_best(['K'], 1, 'K')
-                pick_best(['DEF'], 1, 'DEF')
-                
-                optimal_keys = {p['key'] for p in optimal_lineup}
-                actual_keys = {p['key'] for p in actual_lineup}
-                gems = [p for p in optimal_lineup if p['key'] not in actual_keys]
-                busts = [p for p in actual_lineup if p['key'] not in optimal_keys]
-                swaps = []
-                
-                gems_by_slot = {}
-                for g in gems: gems_by_slot.setdefault(g['optimal_slot'], []).append(g)
-                busts_by_slot = {}
-                for b in busts: busts_by_slot.setdefault(b['played_slot'], []).append(b)
-                
-                for slot in gems_by_slot:
-                    if slot in busts_by_slot:
-                        g_list = sorted(gems_by_slot[slot], key=lambda x: x['points'], reverse=True)
-                        b_list = sorted(busts_by_slot[slot], key=lambda x: x['points'])
-                        for i in range(min(len(g_list), len(b_list))):
-                            swaps.append({'pos': slot, 'in': g_list[i], 'out': b_list[i]})
-
-                efficiency_data.append({
-                    'Week': week, 'Team': team_name, 
-                    'Roster Points': sum(p['points'] for p in actual_lineup),
-                    'Max Points': sum(p['points'] for p in optimal_lineup),
-                    'Mistakes': swaps,
-                    'Mistake_Count': len(swaps)
-                })
-            except Exception as e: continue
-            
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_SEASON)
+def fetch_league_teams():
+    # ((team_key, name), ...) in league order
+    yahoo = get_yahoo_session()
+    if not yahoo: return ()
+    try:
+        r = yahoo.get(f'{API_BASE}/league/{LEAGUE_ID}/teams?format=json')
+        return parse_teams(r.json()) if r.status_code == 200 else ()
+    except Exception: return ()
+
+def team_names():
+    return dict(fetch_league_teams())
+
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_SETTINGS)
+def fetch_league_settings():
+    # {'roster_positions': ((position, count), ...), 'stat_modifiers': {stat_id: points per unit},
+    #  'stat_names': {stat_id: display name}}
+    yahoo = get_yahoo_session()
+    if not yahoo: return {}
+    try:
+        r = yahoo.get(f'{API_BASE}/league/{LEAGUE_ID}/settings?format=json')
+        if r.status_code != 200: return {}
+        settings = r.json()['fantasy_content']['league'][1]['settings'][0]
+        positions = tuple((p['roster_position']['position'], int(p['roster_position']['count'])) for p in settings['roster_positions'])
+        modifiers = {str(m['stat']['stat_id']): float(m['stat']['value']) for m in settings.get('stat_modifiers', {}).get('stats', [])}
+        names = {str(c['stat']['stat_id']): c['stat'].get('display_name') or c['stat'].get('name', '') for c in settings.get('stat_categories', {}).get('stats', [])}
+        return {'roster_positions': positions, 'stat_modifiers': modifiers, 'stat_names': names}
+    except Exception: return {}
+
+# --- WEEK PARTITIONS ---
+# Every weekly analysis reads the same raw inputs: the team list and roster slots (from
+# LEAGUE METADATA), one scoreboard per week and one roster (points and projections) per
+# team per week. They are fetched once, kept between refreshes as content-hashed
+# partitions and shared by all the fetchers below.
+# A refresh only re-reads the weeks Yahoo may still correct (stat corrections land days
+# after the games) plus anything not stored yet; older weeks are final.
+CORRECTION_WEEKS = int(os.getenv('FFL_CORRECTION_WEEKS', '2'))
+RECHECK_AFTER = 300  # seconds; a retry right after a failure only fetches what's missing
+INACTIVE_SLOTS = ('IR', 'IR+', 'Out', 'RES')
+
+def parse_teams(data):
+    # ((team_key, name), ...) in league order
+    teams_data = data['fantasy_content']['league'][1]['teams']
+    teams = (teams_data[str(i)]['team'] for i in range(teams_data['count']))
+    return tuple((t[0][0]['team_key'], t[0][2]['name']) for t in teams)
+
+def parse_scoreboard(data):
+    # ((team, score, opponent, opponent score), ...) per matchup
+    matchups = data['fantasy_content']['league'][1]['scoreboard']['0']['matchups']
+    games = []
+    for i in range(matchups['count']):
+        m = matchups[str(i)]['matchup']['0']['teams']
+        t0, t1 = m['0']['team'], m['1']['team']
+        games.append((t0[0][2]['name'], float(t0[1]['team_points']['total']), t1[0][2]['name'], float(t1[1]['team_points']['total'])))
+    return tuple(games)
+
+def parse_stat_line(stats_obj):
+    # ((stat_id, value), ...) from a player_stats block; '-' (no stat) is left out
+    line = []
+    for item in (stats_obj or {}).get('stats', []):
+        try: line.append((str(item['stat']['stat_id']), float(item['stat']['value'])))
+        except (KeyError, TypeError, ValueError): continue
+    return tuple(line)
+
+def parse_roster(data):
+    # ((player_key, name, display_position, slot, points, projected, stat line), ...)
+    roster = data['fantasy_content']['team'][1]['roster']['0']['players']
+    players = []
+    for idx in range(roster['count']):
+        p_data = roster[str(idx)]['player']
+        points_obj = find_key_recursive(p_data, 'player_points')
+        proj_obj = find_key_recursive(p_data, 'player_projected_points')
+        players.append((
+            p_data[0][0]['player_key'], p_data[0][2]['name']['full'], find_key_recursive(p_data, 'display_position'),
+            find_key_recursive(p_data, 'selected_position')[1]['position'],
+            float(points_obj['total']) if points_obj else 0.0, float(proj_obj['total']) if proj_obj else 0.0,
+            parse_stat_line(find_key_recursive(p_data, 'player_stats')),
+        ))
+    return tuple(players)
+
+PARSERS = {'scoreboard': parse_scoreboard, 'roster': parse_roster}
+
+def partition_url(key):
+    if key[0] == 'scoreboard': return f'{API_BASE}/league/{LEAGUE_ID}/scoreboard;week={key[1]}?format=json'
+    team_key, week = key[1], key[2]
+    return f'{API_BASE}/team/{team_key}/roster;week={week}/players/stats;type=week;week={week}?format=json'
+
+def fetch_partition(yahoo, key):
+    r = yahoo.get(partition_url(key))
+    if r.status_code != 200: return None
+    return PARSERS[key[0]](r.json())
+
+def partitions_state():
+    return f'partitions-{LEAGUE_ID}-v{PARSER_VERSION}'
+
+def checked_state():
+    return f'partitions-checked-{LEAGUE_ID}-v{PARSER_VERSION}'
+
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_WEEKLY)
+def sync_week_partitions(current_week):
+    # Brings the stored partitions up to date for weeks 1..current_week. Returns the sync
+    # manifest, None without a Yahoo session:
+    #   {'checked': requests made, 'changed': keys whose content changed, 'failed': requests that failed,
+    #    'expected': {'scoreboard': n, 'roster': n}, 'missing': [(kind, team name or None, week)]}
+    # Any failure marks the result partial, so the next load serves it and retries in the
+    # background; that retry only asks for the partitions still missing.
+    yahoo = get_yahoo_session()
+    if not yahoo: return None
+    parts = get_state(partitions_state(), {})  # key -> (hash, payload)
+    checked = get_state(checked_state(), {})   # key -> when it was last fetched
+    # Teams and roster slots come from the metadata cache (no request while it's fresh)
+    fetched = {}
+    teams, slots = fetch_league_teams(), fetch_league_settings().get('roster_positions')
+    if teams: fetched[('teams',)] = teams
+    else: teams = parts.get(('teams',), (None, ()))[1]
+    if slots: fetched[('slots',)] = slots
+    if not teams or not slots: mark_partial()
+
+    now = time.time()
+    recheck = max(1, current_week - CORRECTION_WEEKS + 1)
+    wanted = [('scoreboard', w) for w in range(1, current_week + 1)] + [('roster', tk, w) for w in range(1, current_week + 1) for tk, _ in teams]
+    jobs = [k for k in wanted if k not in parts or (k[-1] >= recheck and now - checked.get(k, 0) > RECHECK_AFTER)]
+    my_bar = progress(0, text="Checking for stat corrections...")
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        futures = {pool.submit(tracing.carry(fetch_partition), yahoo, k): k for k in jobs}
+        try:
+            for done, fut in enumerate(as_completed(futures, timeout=time_left()), 1):
+                my_bar.progress(min(done / len(jobs), 0.99), text=f"Loading Week {futures[fut][-1]}...")
+                try: payload = fut.result()
+                except Exception: continue
+                if payload is not None: fetched[futures[fut]] = payload
+        except FuturesTimeout:
+            # Out of time: keep what arrived, the rest is fetched by the next (background) refresh
+            for fut in futures: fut.cancel()
     my_bar.empty()
+
+    # A failed re-check keeps the stored copy; a partition never stored stays missing
+    failed = [k for k in jobs if k not in fetched]
+    if failed: mark_partial()
+    changed = []
+    for k, payload in fetched.items():
+        h = digest(payload)
+        checked[k] = now
+        if parts.get(k, (None,))[0] != h:
+            parts[k] = (h, payload)
+            changed.append(k)
+    if changed: put_state(partitions_state(), parts)
+    if fetched: put_state(checked_state(), checked)
+    names = dict(teams)
+    return {
+        'checked': len(jobs), 'changed': sorted(changed, key=str), 'failed': len(failed),
+        'expected': {'scoreboard': current_week, 'roster': current_week * len(teams)},
+        'missing': [(k[0], names.get(k[1]) if k[0] == 'roster' else None, k[-1]) for k in wanted if k not in parts],
+    }
+
+def by_team(facts):
+    # {(team_key, team): [fact rows]} in league order
+    teams = {}
+    for row in facts: teams.setdefault((row[0], row[1]), []).append(row)
+    return teams
+
+def week_facts(key, inputs):
+    # Player-week facts: (team_key, team, player_key, player, position, slot, points, projected).
+    # Stat lines stay in the partitions (see the matrix), so a correction to a stat that
+    # doesn't score leaves the facts' hash, and everything downstream, unchanged.
+    team_map = dict(inputs.get(('teams',), ()))
+    return tuple((k[1], team_map.get(k[1], k[1]), *p[:6]) for k, players in inputs.items() if k[0] == 'roster' for p in players)
+
+# --- MANAGER EFFICIENCY & OPTIMIZATION ---
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_WEEKLY)
+def fetch_manager_efficiency(current_week, teams_version=None):
+    # teams_version (the weekly scores version) is only part of the cache key
+    return season_result('efficiency', current_week, [])
+
+# Starting slots filled by the optimal lineup, in pick order; the league's own counts
+# (settings roster_positions) replace these when available. Flex slots aren't filled.
+LINEUP_SLOTS = (('QB', 1), ('WR', 3), ('RB', 2), ('TE', 1), ('K', 1), ('DEF', 1))
+
+def lineup_slots(roster_positions):
+    counts = dict(roster_positions or ())
+    return tuple((pos, counts.get(pos, 0) if counts else n) for pos, n in LINEUP_SLOTS)
+
+def optimal_lineup(all_players, actual_lineup, slots=LINEUP_SLOTS):
+    # Returns (optimal lineup, swaps that would have turned the actual lineup into it)
+    all_players = sorted(all_players, key=lambda x: x['points'], reverse=True)
+    used_indices, optimal_lineup = set(), []
+    def pick_best(pos_list, count, label):
+        picked = 0
+        for i, p in enumerate(all_players):
+            if i in used_indices: continue
+            if picked >= count: break
+            if p['pos'] in pos_list:
+                used_indices.add(i)
+                p_copy = p.copy()
+                p_copy['optimal_slot'] = label
+                optimal_lineup.append(p_copy)
+                picked += 1
+
+    for pos, count in slots: pick_best([pos], count, pos)
+
+    optimal_keys = {p['key'] for p in optimal_lineup}
+    actual_keys = {p['key'] for p in actual_lineup}
+    gems = [p for p in optimal_lineup if p['key'] not in actual_keys]
+    busts = [p for p in actual_lineup if p['key'] not in optimal_keys]
+    swaps = []
+
+    gems_by_slot = {}
+    for g in gems: gems_by_slot.setdefault(g['optimal_slot'], []).append(g)
+    busts_by_slot = {}
+    for b in busts: busts_by_slot.setdefault(b['played_slot'], []).append(b)
+
+    for slot in gems_by_slot:
+        if slot in busts_by_slot:
+            g_list = sorted(gems_by_slot[slot], key=lambda x: x['points'], reverse=True)
+            b_list = sorted(busts_by_slot[slot], key=lambda x: x['points'])
+            for i in range(min(len(g_list), len(b_list))):
+                swaps.append({'pos': slot, 'in': g_list[i], 'out': b_list[i]})
+    return optimal_lineup, swaps
+
+def week_efficiency(key, inputs):
+    week = key[1]
+    slots = lineup_slots(inputs.get(('slots',)))
+    efficiency_data = []
+    for (_, team_name), rows in by_team(inputs[('facts', week)]).items():
+        all_players = []
+        for _, _, p_key, name, display_pos, slot, points, _ in rows:
+            if slot in INACTIVE_SLOTS: continue
+            all_players.append({'name': name, 'key': p_key, 'points': points, 'pos': display_pos, 'is_starter': slot != 'BN', 'played_slot': slot})
+        actual_lineup = [p for p in all_players if p['is_starter']]
+        optimal, swaps = optimal_lineup(all_players, actual_lineup, slots)
+        efficiency_data.append({
+            'Week': week, 'Team': team_name,
+            'Roster Points': sum(p['points'] for p in actual_lineup),
+            'Max Points': sum(p['points'] for p in optimal),
+            'Mistakes': swaps,
+            'Mistake_Count': len(swaps)
+        })
     return efficiency_data
 
+def season_efficiency(key, inputs):
+    return [row for rows in inputs.values() for row in rows]
+
 # --- DRAFT ANALYSIS ---
-@st.cache_data(persist="disk")
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_SEASON)
 def fetch_draft_results():
     yahoo = get_yahoo_session()
-    if not yahoo: return {}
-    url = f'https://fantasysports.yahooapis.com/fantasy/v2/league/{LEAGUE_ID}/draftresults?format=json'
+    if not yahoo: return VersionedDict()
+    url = f'{API_BASE}/league/{LEAGUE_ID}/draftresults?format=json'
     try:
         r = yahoo.get(url)
-        if r.status_code != 200: return {}
+        if r.status_code != 200: return VersionedDict()
         data = r.json()
         draft_results = data['fantasy_content']['league'][1]['draft_results']
         
@@ -251,224 +428,379 @@ def fetch_draft_results():
             if is_keeper:
                 draft_map[pk]['round'] = 0
 
-        return draft_map
-    except Exception: return {}
+        return VersionedDict(draft_map)
+    except Exception: return VersionedDict()
 
 # --- NEW: DRAFT SEASON STATS ---
-@st.cache_data(persist="disk")
-def fetch_draft_season_totals(draft_data):
+# Yahoo caps player_keys at 25 per request; chunks are fetched in parallel.
+MAX_PLAYER_KEYS = 25
+FETCH_WORKERS = 4
+
+def fetch_player_points(yahoo, player_keys, week=None):
+    # Returns {player_key: (name, display_pos, points)} for one chunk of keys
+    stats = f'stats;type=week;week={week}' if week else 'stats'
+    url = f'{API_BASE}/league/{LEAGUE_ID}/players;player_keys={",".join(player_keys)}/{stats}?format=json'
+    r = yahoo.get(url)
+    if r.status_code != 200: return {}
+    league_resp = r.json()['fantasy_content']['league']
+    if isinstance(league_resp, list): league_resp = league_resp[1] # Sometimes wrapped
+    players_obj = league_resp['players']
+    out = {}
+    for j in range(players_obj['count']):
+        p_wrapper = players_obj[str(j)]['player']
+        meta = p_wrapper[0]
+        points_data = find_key_recursive(p_wrapper, 'player_points')
+        out[find_key_recursive(meta, 'player_key')] = (find_key_recursive(meta, 'full'), find_key_recursive(meta, 'display_position'), float(points_data['total']) if points_data else 0.0)
+    return out
+
+def run_parallel(yahoo, jobs, my_bar, text):
+    # jobs: list of (player_keys, week); yields (week, result) as chunks finish.
+    # Progress is reported from the calling thread, workers only do HTTP.
+    # A failed chunk, or stopping at the dataset's deadline (runtime.time_left), marks the result partial.
+    done = 0
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        futures = {pool.submit(tracing.carry(fetch_player_points), yahoo, keys, week): week for keys, week in jobs}
+        try:
+            for fut in as_completed(futures, timeout=time_left()):
+                done += 1
+                my_bar.progress(min(done / max(len(jobs), 1), 0.99), text=text)
+                try: result = fut.result()
+                except Exception: result = None
+                if not result:
+                    mark_partial()
+                    continue
+                yield futures[fut], result
+        except FuturesTimeout:
+            mark_partial()
+            for fut in futures: fut.cancel()
+
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_SEASON)
+def fetch_draft_season_totals(draft_version, current_week=None, _draft_data=None):
+    # Keyed by the draft's version; _draft_data itself is never hashed. Without it (a
+    # background refresh) the draft is read back from fetch_draft_results' cache.
+    draft_data = _draft_data if _draft_data is not None else fetch_draft_results()
     yahoo = get_yahoo_session()
     if not yahoo or not draft_data: return []
     
     player_keys = list(draft_data.keys())
-    stats_data = []
-    chunk_size = 25
+    chunks = [player_keys[i:i + MAX_PLAYER_KEYS] for i in range(0, len(player_keys), MAX_PLAYER_KEYS)]
     
-    my_bar = st.progress(0, text="Analyzing Draft Class...")
+    # Player-week index kept between refreshes: only players whose season total moved
+    # (new games, stat corrections) or who are missing a week get their weeks refetched.
+    state_name = f'draft_player_weeks-{LEAGUE_ID}'
+    index = get_state(state_name, {'totals': {}, 'weeks': {}})
     
-    for i in range(0, len(player_keys), chunk_size):
-        chunk = player_keys[i:i + chunk_size]
-        keys_str = ",".join(chunk)
-        # Fetch Season Totals
-        url = f'https://fantasysports.yahooapis.com/fantasy/v2/league/{LEAGUE_ID}/players;player_keys={keys_str}/stats?format=json'
-        
-        try:
-            r = yahoo.get(url)
-            if r.status_code != 200: continue
-            
-            league_resp = r.json()['fantasy_content']['league']
-            if isinstance(league_resp, list): league_resp = league_resp[1] # Sometimes wrapped
-            players_obj = league_resp['players']
-            
-            for j in range(players_obj['count']):
-                p_wrapper = players_obj[str(j)]['player']
-                meta = p_wrapper[0]
-                p_key = find_key_recursive(meta, 'player_key')
-                name = find_key_recursive(meta, 'full')
-                display_pos = find_key_recursive(meta, 'display_position')
-                
-                points_data = find_key_recursive(p_wrapper, 'player_points')
-                total_pts = float(points_data['total']) if points_data else 0.0
-                
-                d_info = draft_data.get(p_key, {})
-                is_keeper = d_info.get('is_keeper', False)
-                
-                stats_data.append({
-                    'Player': name,
-                    'Position': display_pos,
-                    'Team Key': d_info.get('team_key'),
-                    'Round': int(d_info.get('round', 0)),
-                    'Pick': int(d_info.get('pick', 0)),
-                    'Total Points': total_pts,
-                    'Type': 'Keeper' if is_keeper else 'Regular'
-                })
-        except Exception: continue
-        my_bar.progress(min((i + chunk_size) / len(player_keys), 1.0))
-        time.sleep(0.05)
+    my_bar = progress(0, text="Analyzing Draft Class...")
+    
+    # 1. Season totals for the whole class
+    season = {}
+    for _, result in run_parallel(yahoo, [(c, None) for c in chunks], my_bar, "Analyzing Draft Class..."):
+        season.update(result)
+    
+    # 2. Weekly points, only where something changed
+    if current_week:
+        stale = {pk for pk, (_, _, total) in season.items() if index['totals'].get(pk) != total}
+        jobs = []
+        for week in range(1, current_week + 1):
+            # Draft order, not completion order, so batch URLs are the same on every run
+            need = [pk for pk in player_keys if pk in season and (pk in stale or week not in index['weeks'].get(pk, {}))]
+            jobs += [(need[i:i + MAX_PLAYER_KEYS], week) for i in range(0, len(need), MAX_PLAYER_KEYS)]
+        refreshed = {}
+        for week, result in run_parallel(yahoo, jobs, my_bar, "Loading Weekly Breakdown..."):
+            for pk, (_, _, pts) in result.items():
+                index['weeks'].setdefault(pk, {})[week] = pts
+                refreshed.setdefault(pk, set()).add(week)
+        # A changed player's new total is only recorded once all of the player's weeks came
+        # back, so a failed or cut-short batch leaves that player stale for the next load to refetch
+        for pk, (_, _, total) in season.items():
+            if pk not in stale or len(refreshed.get(pk, ())) == current_week: index['totals'][pk] = total
+        put_state(state_name, index)
+    
+    stats_data = []
+    for p_key in player_keys:
+        if p_key not in season: continue
+        name, display_pos, total_pts = season[p_key]
+        d_info = draft_data.get(p_key, {})
+        is_keeper = d_info.get('is_keeper', False)
+        stats_data.append({
+            'Player': name,
+            'Player Key': p_key,
+            'Position': display_pos,
+            'Team Key': d_info.get('team_key'),
+            'Round': int(d_info.get('round', 0)),
+            'Pick': int(d_info.get('pick', 0)),
+            'Total Points': total_pts,
+            'Type': 'Keeper' if is_keeper else 'Regular'
+        })
         
     my_bar.empty()
     return stats_data
 
-# --- IMPACT ANALYSIS ---
-@st.cache_data(persist="disk")
-def fetch_impact_analysis(current_week):
+def load_draft_weekly_points(player_keys, current_week):
+    # Per-week drilldown straight from the index fetch_draft_season_totals maintains (no API calls)
+    weeks = get_state(f'draft_player_weeks-{LEAGUE_ID}', {'weeks': {}})['weeks']
+    table = PlayerWeekTable()
+    for pk in player_keys:
+        for week, pts in sorted(weeks.get(pk, {}).items()):
+            if week <= current_week: table.append(pk, week, pts)
+    return table
+
+# --- TRANSACTIONS (INCREMENTAL) ---
+# The league's add/drop/trade feed, newest first. A stored cursor (highest transaction id
+# already ingested) means a refresh only pages back until it meets known moves, usually
+# one request. Each move is tagged with the fantasy week it took effect in, for the
+# ownership interval index (see ownership.py).
+TRANSACTIONS_PAGE = 25
+
+@cached(persist=True, version=PARSER_VERSION)
+def fetch_week_calendar():
+    # [(week, first day, last day)] as ISO dates
     yahoo = get_yahoo_session()
     if not yahoo: return []
-    matchups_data = fetch_all_weekly_scores(current_week)
-    matchup_map = {m['Team']: {m['Week']: {'Result': m['Result'], 'Margin': m['Score'] - m['Opponent Score']}} for m in matchups_data}
-    url_teams = f'https://fantasysports.yahooapis.com/fantasy/v2/league/{LEAGUE_ID}/teams?format=json'
+    game_key = str(LEAGUE_ID).split('.l.')[0]
     try:
-        r = yahoo.get(url_teams)
-        if r.status_code == 200:
-            teams_data = r.json()['fantasy_content']['league'][1]['teams']
-            team_keys = {teams_data[str(i)]['team'][0][0]['team_key']: teams_data[str(i)]['team'][0][2]['name'] for i in range(teams_data['count'])}
-    except: return []
-    impact_stats = {} 
-    my_bar = st.progress(0, text="Calculating Normalized Value (VOB)...")
-    total_steps = current_week * len(team_keys)
-    step_count = 0
-    
-    for week in range(1, current_week + 1):
-        league_bench_totals = {}  
-        league_rosters = {} 
-        for t_key in team_keys:
-            step_count += 1
-            my_bar.progress(min(step_count / total_steps, 0.99), text=f"Analyzing Week {week}...")
-            url = f'https://fantasysports.yahooapis.com/fantasy/v2/team/{t_key}/roster;week={week}/players/stats?format=json'
-            try:
-                rr = yahoo.get(url)
-                if rr.status_code == 200:
-                    roster = rr.json()['fantasy_content']['team'][1]['roster']['0']['players']
-                    league_rosters[t_key] = roster
-                    for idx in range(roster['count']):
-                        p_data = roster[str(idx)]['player']
-                        points_obj = find_key_recursive(p_data, 'player_points')
-                        points = float(points_obj['total']) if points_obj else 0.0
-                        slot = find_key_recursive(p_data, 'selected_position')[1]['position']
-                        display_pos = find_key_recursive(p_data, 'display_position')
-                        if slot == 'BN':
-                            if display_pos not in league_bench_totals: league_bench_totals[display_pos] = [0.0, 0]
-                            league_bench_totals[display_pos][0] += points
-                            league_bench_totals[display_pos][1] += 1
-            except: continue
-            time.sleep(0.02)
-
-        avg_bench_score = {pos: (data[0] / data[1]) for pos, data in league_bench_totals.items() if data[1] > 0}
-
-        for t_key, roster_data in league_rosters.items():
-            t_name = team_keys[t_key]
-            game_ctx = matchup_map.get(t_name, {}).get(week, None)
-            starters = {}
-            my_bench_scores = {}
-            for idx in range(roster_data['count']):
-                p_data = roster_data[str(idx)]['player']
-                p_key = p_data[0][0]['player_key']
-                points = float(find_key_recursive(p_data, 'player_points')['total'])
-                slot = find_key_recursive(p_data, 'selected_position')[1]['position']
-                display_pos = find_key_recursive(p_data, 'display_position')
-                if slot in ['IR', 'IR+', 'Out', 'RES']: continue
-                if slot != 'BN':
-                    starters[p_key] = {'key': p_key, 'name': p_data[0][2]['name']['full'], 'points': points, 'pos': display_pos}
-                else:
-                    if display_pos not in my_bench_scores: my_bench_scores[display_pos] = []
-                    my_bench_scores[display_pos].append(points)
-            
-            for pk, p in starters.items():
-                if pk not in impact_stats: 
-                    impact_stats[pk] = {'Player': p['name'], 'Team': t_name, 'Player Key': pk, 'Starter Points': 0.0, 'WAR': 0, 'Value Over Bench': 0.0}
-                
-                impact_stats[pk]['Starter Points'] += p['points']
-                my_best_bench = max(my_bench_scores.get(p['pos'], [0.0]))
-                league_avg = avg_bench_score.get(p['pos'], 0.0)
-                baseline = max(my_best_bench, league_avg)
-                val_added = p['points'] - baseline
-                impact_stats[pk]['Value Over Bench'] += val_added
-
-                if game_ctx and game_ctx['Result'] == 'W':
-                    if val_added > game_ctx['Margin']: impact_stats[pk]['WAR'] += 1
+        r = yahoo.get(f'{API_BASE}/game/{game_key}/game_weeks?format=json')
+        if r.status_code != 200: return []
+        weeks = r.json()['fantasy_content']['game'][1]['game_weeks']
+        return [(int(w['game_week']['week']), w['game_week']['start'], w['game_week']['end']) for w in (weeks[str(i)] for i in range(weeks['count']))]
+    except Exception: return []
 
-    my_bar.empty()
-    return list(impact_stats.values())
+def week_of(timestamp, calendar):
+    # Yahoo's fantasy weeks run on US Eastern dates
+    try: day = datetime.fromtimestamp(int(timestamp), ZoneInfo('America/New_York')).date().isoformat()
+    except Exception: day = datetime.fromtimestamp(int(timestamp), tz=timezone.utc).date().isoformat()
+    for week, start, end in calendar:
+        if day <= end: return week
+    return calendar[-1][0] if calendar else None
 
-# --- POSITIONAL PERFORMANCE (FIXED: STARTERS ONLY) ---
-@st.cache_data(persist="disk")
-def fetch_positional_performance(current_week):
+def parse_transaction(t):
+    meta, body = t[0], (t[1] if len(t) > 1 and isinstance(t[1], dict) else {})
+    players = body.get('players', {})
+    moves = []
+    for i in range(players.get('count', 0)):
+        p = players[str(i)]['player']
+        data = p[1]['transaction_data']
+        if isinstance(data, list): data = data[0]
+        moves.append({
+            'Player Key': p[0][0]['player_key'], 'Player': find_key_recursive(p[0], 'name')['full'],
+            'type': data.get('type'),
+            'source_type': data.get('source_type'), 'source_team_key': data.get('source_team_key'),
+            'destination_type': data.get('destination_type'), 'destination_team_key': data.get('destination_team_key'),
+        })
+    return {'id': int(meta['transaction_id']), 'type': meta.get('type'), 'status': meta.get('status'), 'timestamp': int(meta['timestamp']), 'players': moves}
+
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_LIVE)
+def fetch_transactions(current_week):
+    # current_week only scopes the cache entry, so a new week looks for new moves
     yahoo = get_yahoo_session()
     if not yahoo: return []
-    
-    url_keys = f'https://fantasysports.yahooapis.com/fantasy/v2/league/{LEAGUE_ID}/teams?format=json'
-    try:
-        r = yahoo.get(url_keys)
-        teams_data = r.json()['fantasy_content']['league'][1]['teams']
-        team_keys = {teams_data[str(i)]['team'][0][0]['team_key']: teams_data[str(i)]['team'][0][2]['name'] for i in range(teams_data['count'])}
-    except: return []
+    state_name = f'transactions-{LEAGUE_ID}'
+    log = get_state(state_name, {'cursor': 0, 'transactions': {}})
+    new, start, complete = {}, 0, False
+    while not complete:
+        if time_left() == 0:
+            mark_partial()
+            break
+        url = f'{API_BASE}/league/{LEAGUE_ID}/transactions;start={start};count={TRANSACTIONS_PAGE}?format=json'
+        try:
+            r = yahoo.get(url)
+            if r.status_code != 200: break
+            feed = r.json()['fantasy_content']['league'][1]['transactions']
+        except Exception: break
+        count = feed.get('count', 0) if isinstance(feed, dict) else 0
+        ids = []
+        for i in range(count):
+            try: t = parse_transaction(feed[str(i)]['transaction'])
+            except Exception: continue
+            ids.append(t['id'])
+            if t['id'] > log['cursor'] and t['status'] in (None, 'successful'): new[t['id']] = t
+        # Done once a page reaches already-ingested moves or the feed runs out
+        complete = count < TRANSACTIONS_PAGE or (ids and min(ids) <= log['cursor'])
+        start += TRANSACTIONS_PAGE
 
-    team_pos_stats = {t: {'QB': [], 'RB': [], 'WR': [], 'TE': [], 'K': [], 'DEF': []} for t in team_keys.values()}
-    
-    my_bar = st.progress(0, text="Analyzing Positional Strength...")
-    total_steps = current_week * len(team_keys)
-    step_count = 0
-
-    for week in range(1, current_week + 1):
-        for t_key, t_name in team_keys.items():
-            step_count += 1
-            my_bar.progress(min(step_count / total_steps, 0.99))
-            
-            url = f'https://fantasysports.yahooapis.com/fantasy/v2/team/{t_key}/roster;week={week}/players/stats?format=json'
-            try:
-                rr = yahoo.get(url)
-                if rr.status_code != 200: continue
-                roster = rr.json()['fantasy_content']['team'][1]['roster']['0']['players']
-                
-                for idx in range(roster['count']):
-                    p_data = roster[str(idx)]['player']
-                    points = float(find_key_recursive(p_data, 'player_points')['total'])
-                    display_pos = find_key_recursive(p_data, 'display_position')
-                    
-                    # FILTER: MUST be a Starter (BN excluded) AND must have played (>0 points)
-                    selected_pos = find_key_recursive(p_data, 'selected_position')
-                    slot = selected_pos[1]['position']
-                    
-                    if points > 0 and slot != 'BN' and slot not in ['IR', 'IR+', 'Out', 'RES']:
-                        if display_pos in team_pos_stats[t_name]:
-                            team_pos_stats[t_name][display_pos].append(points)
-            except: continue
-            
-    my_bar.empty()
+    moves = {**log['transactions'], **new}
+    # New moves get their fantasy week, as do stored ones an earlier run couldn't date
+    untagged = [t for t in moves.values() if t.get('week') is None]
+    if untagged:
+        calendar = fetch_week_calendar()
+        for t in untagged: t['week'] = week_of(t['timestamp'], calendar)
+    # Only move the cursor when the gap back to it was fully read and every move has its
+    # week: without the calendar, the moves are served but neither stored nor skipped next time
+    dated = all(t['week'] is not None for t in untagged)
+    if not (complete and dated): mark_partial()
+    if complete and dated and untagged:
+        put_state(state_name, {'cursor': max(moves), 'transactions': moves})
+    return [t for _, t in sorted(moves.items())]
+
+# --- IMPACT ANALYSIS ---
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_WEEKLY)
+def fetch_impact_analysis(current_week):
+    return season_result('impact', current_week, [])
+
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_WEEKLY)
+def fetch_player_weeks(current_week):
+    # Normalized player-week table (war.py) the WAR baselines are computed from
+    return season_result('player_weeks', current_week, pd.DataFrame())
+
+def _season_inputs(inputs):
+    facts = {k[1]: v for k, v in inputs.items() if k[0] == 'facts'}
+    games = {k[1]: v for k, v in inputs.items() if k[0] == 'scoreboard'}
+    return facts, games
+
+def season_player_weeks(key, inputs):
+    return player_week_table(*_season_inputs(inputs))
+
+def season_impact(key, inputs):
+    return war_rows(player_week_table(*_season_inputs(inputs)), DEFAULT_BASELINE)
+
+# --- POSITIONAL PERFORMANCE (FIXED: STARTERS ONLY) ---
+POSITIONS = ('QB', 'RB', 'WR', 'TE', 'K', 'DEF')
+
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_WEEKLY)
+def fetch_positional_performance(current_week):
+    return season_result('positional', current_week, [])
+
+def week_positional(key, inputs):
+    team_pos_stats = {}
+    for (_, t_name), rows in by_team(inputs[('facts', key[1])]).items():
+        stats = team_pos_stats[t_name] = {pos: [] for pos in POSITIONS}
+        for _, _, _, _, display_pos, slot, points, _ in rows:
+            # FILTER: MUST be a Starter (BN excluded) AND must have played (>0 points)
+            if points > 0 and slot != 'BN' and slot not in INACTIVE_SLOTS:
+                if display_pos in stats: stats[display_pos].append(points)
+    return team_pos_stats
+
+def season_positional(key, inputs):
+    team_pos_stats = {t: {pos: [] for pos in POSITIONS} for _, t in inputs.get(('teams',), ())}
+    for k, weekly in inputs.items():
+        if k[0] != 'week_positional': continue
+        for t_name, stats in weekly.items():
+            for pos, points in stats.items(): team_pos_stats.setdefault(t_name, {p: [] for p in POSITIONS})[pos].extend(points)
     return team_pos_stats
 
 # --- PROJECTION ACCURACY ANALYSIS ---
-@st.cache_data(persist="disk")
+# Per-week sufficient statistics (projections.py) memoized in the DAG, so a new week or a
+# stat correction only rebuilds that week's cells; the season is their concatenation.
+@cached(persist=True, version=PARSER_VERSION, fresh_for=FRESH_WEEKLY)
 def fetch_projection_accuracy(current_week):
-    yahoo = get_yahoo_session()
-    if not yahoo: return []
-    url_teams = f'https://fantasysports.yahooapis.com/fantasy/v2/league/{LEAGUE_ID}/teams?format=json'
-    try:
-        r = yahoo.get(url_teams)
-        teams_data = r.json()['fantasy_content']['league'][1]['teams']
-        team_keys = {teams_data[str(i)]['team'][0][0]['team_key']: teams_data[str(i)]['team'][0][2]['name'] for i in range(teams_data['count'])}
-    except: return []
-
-    all_data = []
-    my_bar = st.progress(0, text="Fetching Projections...")
-    total_steps = current_week * len(team_keys)
-    step_count = 0
-    for week in range(1, current_week + 1):
-        for t_key, t_name in team_keys.items():
-            step_count += 1
-            my_bar.progress(min(step_count / total_steps, 0.99), text=f"W{week}: {t_name}")
-            url = f'https://fantasysports.yahooapis.com/fantasy/v2/team/{t_key}/roster;week={week}/players/stats;type=week;week={week}?format=json'
-            try:
-                rr = yahoo.get(url)
-                roster = rr.json()['fantasy_content']['team'][1]['roster']['0']['players']
-                for idx in range(roster['count']):
-                    p_data = roster[str(idx)]['player']
-                    actual = float(find_key_recursive(p_data, 'player_points')['total'])
-                    proj_obj = find_key_recursive(p_data, 'player_projected_points')
-                    projected = float(proj_obj['total']) if proj_obj else 0.0
-                    slot = find_key_recursive(p_data, 'selected_position')[1]['position']
-                    is_starter = slot != 'BN' and slot not in ['IR', 'IR+', 'Out', 'RES']
-                    all_data.append({'Week': week, 'Team': t_name, 'Player': p_data[0][2]['name']['full'], 'Actual': actual, 'Projected': projected, 'Diff': actual - projected, 'IsStarter': is_starter})
-            except: continue
-    my_bar.empty()
-    return all_data
\ No newline at end of file
+    # {'cells': per (week, position, team, starter) sums, 'calibration': per projection bin sums}
+    stats = season_result('projections', current_week, {})
+    if stats: record_projection_season(stats['cells'])
+    return stats
+
+def week_projections(key, inputs):
+    return week_cells(key[1], inputs[('facts', key[1])])
+
+def season_projections(key, inputs):
+    return combine(inputs.values())
+
+def projection_seasons_state():
+    return 'projection-seasons'  # shared by every league/season this install has analyzed
+
+def record_projection_season(cells):
+    # Keeps one compact summary per league season, for reliability trends across seasons
+    info = fetch_league_info()
+    label = f"{info.get('season', LEAGUE_ID)} {info.get('name', '')}".strip()
+    seasons = get_state(projection_seasons_state(), {})
+    summary = season_summary(cells)
+    if seasons.get(LEAGUE_ID, {}).get('summary') != summary:
+        seasons[LEAGUE_ID] = {'label': label, 'summary': summary}
+        put_state(projection_seasons_state(), seasons)
+
+def projection_seasons():
+    return {s['label']: s['summary'] for s in get_state(projection_seasons_state(), {}).values()}
+
+# --- RECOMPUTE DAG ---
+# The weekly fetchers above are roll-ups of one dependency graph over the stored
+# partitions (see pipeline.py):
+#
+#   scoreboard:w ─────────────────────────────────────────> history
+#   teams + roster:t:w ─> facts:w ─┬─> week_efficiency:w ──> efficiency   (+ slots)
+#                                  ├─> week_positional:w ──> positional
+#                                  ├─> week_projections:w ─> projections  (projections.py)
+#   scoreboard:w ──────────────────┴─> player_weeks ───────> impact       (war.py)
+#
+# Per-week nodes are memoized with the hashes of their inputs, so after a refresh only
+# weeks with a changed partition are recomputed; the season roll-ups are plain
+# concatenations, and impact is a few grouped array operations over the whole season.
+# Page tables are keyed by the roll-ups' versions (app.shared) and rebuild only when those change.
+
+def _scoreboards(key, leaves):
+    return [('scoreboard', w) for w in range(1, key[1] + 1) if ('scoreboard', w) in leaves]
+
+def _rosters(key, leaves):
+    teams = leaves.get(('teams',), (None, ()))[1]
+    return [k for k in [('teams',)] if k in leaves] + [('roster', tk, key[1]) for tk, _ in teams if ('roster', tk, key[1]) in leaves]
+
+def _facts(key, leaves):
+    return [('facts', key[1])]
+
+def _season_facts(key, leaves):
+    return [('facts', w) for w in range(1, key[1] + 1)] + _scoreboards(key, leaves)
+
+def _facts_and_slots(key, leaves):
+    return _facts(key, leaves) + [k for k in [('slots',)] if k in leaves]
+
+def _weeks(kind, with_teams=False):
+    return lambda key, leaves: ([('teams',)] if with_teams and ('teams',) in leaves else []) + [(kind, w) for w in range(1, key[1] + 1)]
+
+RULES = {
+    'facts': Rule(_rosters, week_facts),
+    'week_efficiency': Rule(_facts_and_slots, week_efficiency),
+    'week_positional': Rule(_facts, week_positional),
+    'week_projections': Rule(_facts, week_projections),
+    'history': Rule(_scoreboards, season_history, keep=False),
+    'efficiency': Rule(_weeks('week_efficiency'), season_efficiency, keep=False),
+    'positional': Rule(_weeks('week_positional', with_teams=True), season_positional, keep=False),
+    'projections': Rule(_weeks('week_projections'), season_projections, keep=False),
+    'player_weeks': Rule(_season_facts, season_player_weeks, keep=False),
+    'impact': Rule(_season_facts, season_impact, keep=False),
+}
+
+_dag_lock = threading.Lock()
+
+# Which partitions each season table is built from
+NEEDS = {'history': ('scoreboard',), 'efficiency': ('roster',), 'positional': ('roster',), 'projections': ('roster',), 'player_weeks': ('roster', 'scoreboard'), 'impact': ('roster', 'scoreboard')}
+
+def season_result(kind, current_week, empty):
+    # Season table `kind` through current_week, from partitions synced for that week.
+    # Built from whatever is stored; partial (retried in the background) while any input is missing.
+    sync = sync_week_partitions(current_week)
+    if sync is None: return empty
+    if any(part in NEEDS[kind] for part, _, _ in sync['missing']): mark_partial()
+    memo_state = f'dag-{LEAGUE_ID}-v{PARSER_VERSION}'
+    with _dag_lock:
+        graph = Graph(RULES, get_state(partitions_state(), {}), get_state(memo_state, {}))
+        _, value = graph.evaluate((kind, current_week))
+        if any(RULES[k[0]].keep for k in graph.recomputed): put_state(memo_state, graph.memo)
+    return value
+
+def completeness(current_week):
+    # Manifest per season table: {kind: {'expected': partitions, 'missing': [(team, week)]}}.
+    # Cheap: reads the cached sync result.
+    sync = sync_week_partitions(current_week)
+    if not sync: return {}
+    return {kind: {
+        'expected': sum(sync['expected'][part] for part in needs),
+        'missing': [(team or 'All teams', week) for part, team, week in sync['missing'] if part in needs],
+    } for kind, needs in NEEDS.items()}
+
+# --- PLAYER x WEEK MATRIX ---
+_matrix_lock = threading.Lock()
+
+def player_matrix(current_week, refresh=True):
+    # Memory-mapped (player, week) points/projections/slots/teams (see matrix.py), built
+    # from the stored roster partitions and rebuilt only when one of them changed.
+    # refresh=False just opens the last build (no Yahoo calls), or returns None.
+    root = state_path(f'matrix-{LEAGUE_ID}')
+    if not refresh or sync_week_partitions(current_week) is None: return open_matrix(root)
+    parts = get_state(partitions_state(), {})
+    keys = sorted((k for k in parts if k[0] == 'teams' or (k[0] == 'roster' and k[2] <= current_week)), key=lambda k: (k[-1] if k[0] == 'roster' else 0, str(k)))
+    version = digest((current_week, [(k, parts[k][0]) for k in keys]))
+    with _matrix_lock:
+        matrix = open_matrix(root)
+        if matrix is None or matrix.version != version:
+            teams = parts.get(('teams',), (None, ()))[1]
+            rosters = {(k[1], k[2]): parts[k][1] for k in keys if k[0] == 'roster'}
+            matrix = write_matrix(root, version, *build_arrays(teams, rosters, current_week))
+    return matrix
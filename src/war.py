@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from matrix import RESERVE_SLOTS
+
+# --- WAR / VALUE OVER BENCH ---
+# Computed as grouped operations over one normalized player-week table (one row per
+# rostered player per team per week, with that team's result and margin), instead of
+# walking every roster once for the league bench averages and again for the starters:
+#   league bench average per (week, position)   groupby mean over bench rows
+#   team best bench per (week, team, position)  groupby max over bench rows
+#   Value Over Bench = starter points - baseline;  WAR = a win whose margin the VOB exceeds
+# A different baseline definition is a recompute over the same table (milliseconds).
+
+COLUMNS = ['Week', 'Team Key', 'Team', 'Player Key', 'Player', 'Position', 'Slot', 'Points', 'Result', 'Margin']
+
+# Replacement level a starter is measured against
+BASELINES = {
+    'Best Bench': lambda team, league: np.maximum(team, league),  # your best bench player or the league's average one, whichever is higher
+    'League Bench Avg': lambda team, league: league,
+    'Team Best Bench': lambda team, league: team,
+    'Raw Points': lambda team, league: np.zeros_like(team),
+}
+DEFAULT_BASELINE = 'Best Bench'
+
+def player_week_table(facts, games):
+    # facts: {week: ((team_key, team, player_key, player, position, slot, points, projected), ...)}
+    # games: {week: ((team, score, opponent, opponent score), ...)}
+    rows = [(week, *f[:7]) for week, week_facts in facts.items() for f in week_facts]
+    pw = pd.DataFrame.from_records(rows, columns=COLUMNS[:8])
+    ctx = [(week, n0, s0 - s1) for week, week_games in games.items() for n0, s0, n1, s1 in week_games] + \
+          [(week, n1, s1 - s0) for week, week_games in games.items() for n0, s0, n1, s1 in week_games]
+    ctx = pd.DataFrame.from_records(ctx, columns=['Week', 'Team', 'Margin'])
+    ctx['Result'] = np.select([ctx['Margin'] > 0, ctx['Margin'] < 0], ['W', 'L'], 'T')
+    pw = pw.merge(ctx.drop_duplicates(['Week', 'Team']), on=['Week', 'Team'], how='left')
+    pw['Points'] = pw['Points'].astype(float)
+    return pw[COLUMNS]
+
+def war_rows(pw, baseline=DEFAULT_BASELINE):
+    # One row per (player, team that started the player): Starter Points, WAR, Value Over Bench,
+    # First Week, Weeks Started; in order of first start
+    if pw.empty: return []
+    bench = pw[pw['Slot'] == 'BN']
+    starters = pw[(pw['Slot'] != 'BN') & ~pw['Slot'].isin(RESERVE_SLOTS)]
+    league = bench.groupby(['Week', 'Position'])['Points'].mean().rename('League Bench')
+    team = bench.groupby(['Week', 'Team Key', 'Position'])['Points'].max().rename('Team Bench')
+    s = starters.join(league, on=['Week', 'Position']).join(team, on=['Week', 'Team Key', 'Position'])
+    base = BASELINES[baseline](s['Team Bench'].fillna(0.0).to_numpy(), s['League Bench'].fillna(0.0).to_numpy())
+    s = s.assign(**{'Value Over Bench': s['Points'].to_numpy() - base})
+    s['WAR'] = ((s['Result'] == 'W') & (s['Value Over Bench'] > s['Margin'])).astype(int)
+    s = s.sort_values('Week', kind='stable')
+    out = s.groupby(['Player Key', 'Team Key'], sort=False).agg(**{
+        'Player': ('Player', 'first'), 'Team': ('Team', 'first'),
+        'Starter Points': ('Points', 'sum'), 'WAR': ('WAR', 'sum'), 'Value Over Bench': ('Value Over Bench', 'sum'),
+        'First Week': ('Week', 'min'), 'Weeks Started': ('Week', 'size'),
+    }).reset_index()
+    return out[['Player', 'Team', 'Team Key', 'Player Key', 'Starter Points', 'WAR', 'Value Over Bench', 'First Week', 'Weeks Started']].to_dict('records')